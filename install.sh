@@ -75,7 +75,7 @@ pip install -r requirements.txt
 log_success "Python dependencies installed."
 
 log_info "Initializing database..."
-PYTHONPATH=./ python3 src/main.py --init-db
+PYTHONPATH=./ python3 src/main.py init-db
 log_success "Database initialized."
 
 echo ""
@@ -83,7 +83,7 @@ echo "🎉 Podemos Installation Complete!"
 echo "=================================="
 echo ""
 log_success "You can now start the Podemos server:"
-echo -e "  ${GREEN}PYTHONPATH=./ python3 src/main.py --serve &${NC}"
+echo -e "  ${GREEN}PYTHONPATH=./ python3 src/main.py serve &${NC}"
 echo ""
 log_info "Access the web dashboard at: http://localhost:8080/"
 log_info "Access the podcast feed at: http://<YOUR_MAC_IP_ADDRESS>:8080/feed.xml"
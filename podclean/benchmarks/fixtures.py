@@ -0,0 +1,196 @@
+import json
+import random
+import shutil
+import subprocess
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+
+# Words of ordinary conversation and of a typical host-read ad, so text rules fire only in ad blocks
+CONTENT_WORDS = ("we", "talked", "about", "the", "history", "of", "rivers", "and", "how", "cities", "grew", "around",
+                 "them", "it", "was", "really", "interesting", "because", "nobody", "expected", "that", "so", "anyway",
+                 "next", "question", "is", "what", "happened", "after", "war", "people", "moved", "north", "again")
+AD_SENTENCES = ("this episode is brought to you by acme mattress",
+                "use promo code podcast for twenty percent off",
+                "go to acme dot com slash pod today",
+                "thanks to our sponsor for supporting the show",
+                "that's acme.com/pod for $20 off your first order")
+
+# One silent MPEG-1 Layer III frame: 128 kbps, 44.1 kHz, mono, no CRC; zeroed side info and
+# main data decode as silence. 1152 samples per frame.
+MP3_FRAME_HEADER = bytes((0xFF, 0xFB, 0x90, 0xC4))
+MP3_FRAME_BYTES = 417
+MP3_FRAME_SECONDS = 1152 / 44100
+
+
+def ad_spans(duration: float, count: int, rng: random.Random, length: float = 60.0) -> list:
+    """
+    Non-overlapping [start, end] ad blocks: a pre-roll, then evenly spread mid-rolls.
+    """
+    spans = [[0.0, min(length / 2, duration)]]
+    for i in range(1, count):
+        start = max(spans[-1][1] + 1.0, duration * i / count + rng.uniform(-length / 2, length / 2))
+        end = min(duration, start + length)
+        if end > start:
+            spans.append([start, end])
+    return spans
+
+
+def synthetic_transcript(duration: float, ads: list, seed: int = 0, words_per_second: float = 2.5) -> list:
+    """
+    Whisper-shaped segments (with word timestamps) covering `duration`; text inside `ads`
+    is ad copy, everything else filler conversation. No audio or TTS involved.
+    """
+    rng = random.Random(seed)
+    segments = []
+    t = 0.0
+    while t < duration:
+        seg_end = min(duration, t + rng.uniform(3.0, 8.0))
+        in_ad = any(start <= t < end for start, end in ads)
+        if in_ad:
+            tokens = rng.choice(AD_SENTENCES).split()
+        else:
+            tokens = [rng.choice(CONTENT_WORDS) for _ in range(max(1, int((seg_end - t) * words_per_second)))]
+        step = (seg_end - t) / len(tokens)
+        words = [{"word": w, "start": round(t + i * step, 3), "end": round(t + (i + 1) * step, 3)} for i, w in enumerate(tokens)]
+        segments.append({"start": round(t, 3), "end": round(seg_end, 3), "text": " ".join(tokens), "words": words})
+        t = seg_end
+    return segments
+
+
+def synthetic_chapters(duration: float, count: int, ads: list = ()) -> list:
+    """
+    Evenly spaced chapters; the ones that start inside an ad block get sponsor titles.
+    """
+    chapters = []
+    for i in range(count):
+        start = duration * i / count
+        is_ad = any(s <= start < e for s, e in ads)
+        chapters.append({"start": start, "end": duration * (i + 1) / count,
+                         "title": f"Sponsor break {i}" if is_ad else f"Topic {i}"})
+    return chapters
+
+
+def chapter_titles(count: int, seed: int = 0) -> list:
+    """
+    Chapter titles of two to six words; about one in ten is sponsor copy.
+    """
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            titles.append(rng.choice(AD_SENTENCES).capitalize())
+        else:
+            titles.append(" ".join(rng.choice(CONTENT_WORDS) for _ in range(rng.randint(2, 6))).capitalize())
+    return titles
+
+
+def random_cuts(duration: float, count: int, seed: int = 0, max_length: float = 90.0) -> list:
+    """
+    Possibly overlapping cut dicts, as detection produces them before merging.
+    """
+    rng = random.Random(seed)
+    cuts = []
+    for _ in range(count):
+        start = rng.uniform(0, duration)
+        cuts.append({"start": start, "end": min(duration, start + rng.uniform(5.0, max_length)), "type": "ad"})
+    return cuts
+
+
+def write_silent_mp3(path: str, seconds: float) -> int:
+    """
+    Writes a valid MP3 of silent frames without any encoder. Returns its size in bytes.
+    """
+    frame = MP3_FRAME_HEADER + bytes(MP3_FRAME_BYTES - len(MP3_FRAME_HEADER))
+    frames = max(1, int(seconds / MP3_FRAME_SECONDS))
+    with open(path, "wb") as f:
+        f.write(frame * frames)
+    return frames * MP3_FRAME_BYTES
+
+
+def have_ffmpeg() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def write_tone_episode(path: str, duration: float, ads: list) -> bool:
+    """
+    Renders an episode with ffmpeg lavfi tones: 440 Hz for content, 1 kHz for ad blocks.
+    Returns False when ffmpeg is unavailable or fails.
+    """
+    if not have_ffmpeg():
+        return False
+    pieces, t = [], 0.0
+    for start, end in sorted(ads):
+        if start > t:
+            pieces.append((440, start - t))
+        pieces.append((1000, end - max(start, t)))
+        t = end
+    if t < duration:
+        pieces.append((440, duration - t))
+    command = ["ffmpeg", "-v", "error", "-y"]
+    for frequency, length in pieces:
+        command += ["-f", "lavfi", "-i", f"sine=frequency={frequency}:sample_rate=44100:duration={length:.3f}"]
+    command += ["-filter_complex", "".join(f"[{i}:a]" for i in range(len(pieces))) + f"concat=n={len(pieces)}:v=0:a=1[out]",
+                "-map", "[out]", "-c:a", "libmp3lame", "-q:a", "6", path]
+    try:
+        subprocess.run(command, check=True, capture_output=True)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return False
+    return True
+
+
+def write_rss(path: str, show_name: str, items: int, audio_url, seed: int = 0, sizes: dict = None):
+    """
+    A podcast RSS feed with `items` episodes. `audio_url(i)` gives each enclosure URL and
+    `sizes` its byte length (when the enclosures really exist).
+    """
+    rng = random.Random(seed)
+    newest = datetime(2026, 1, 1)
+    entries = []
+    for i in range(items):
+        published = (newest - timedelta(days=i, minutes=rng.randint(0, 600))).strftime("%a, %d %b %Y %H:%M:%S +0000")
+        length = (sizes or {}).get(i, rng.randint(20_000_000, 80_000_000))
+        entries.append(
+            f"<item><title>{escape(show_name)} episode {items - i}</title>"
+            f"<guid>{escape(show_name)}-{seed}-{i}</guid><pubDate>{published}</pubDate>"
+            f"<description>{escape(' '.join(rng.choice(CONTENT_WORDS) for _ in range(40)))}</description>"
+            f'<enclosure url="{escape(audio_url(i))}" length="{length}" type="audio/mpeg"/></item>'
+        )
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0" xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd">'
+                f"<channel><title>{escape(show_name)}</title><link>http://example.com/</link>"
+                f"<description>Synthetic show</description><itunes:author>Bench</itunes:author>{''.join(entries)}</channel></rss>")
+
+
+def write_opml(path: str, feed_urls: list):
+    outlines = "".join(f'<outline type="rss" text="Feed {i}" xmlUrl="{escape(url)}"/>' for i, url in enumerate(feed_urls))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<opml version="1.0"><head><title>Bench</title></head>'
+                f'<body><outline text="Podcasts">{outlines}</outline></body></opml>')
+
+
+def populate_db(session, shows: int, episodes_per_show: int, seed: int = 0) -> int:
+    """
+    Bulk-inserts processed-looking episodes (cleaned, some transcribed, with chapters).
+    Returns the number of episodes added.
+    """
+    from src.store.models import Episode
+    rng = random.Random(seed)
+    newest = datetime(2026, 1, 1)
+    episodes = []
+    for s in range(shows):
+        for i in range(episodes_per_show):
+            duration = rng.uniform(1200, 7200)
+            chapters = synthetic_chapters(duration, 8)
+            status = rng.choice(("cut_ready_for_serving", "transcribed"))
+            episodes.append(Episode(
+                source_guid=f"bench-{seed}-{s}-{i}", title=f"Show {s} episode {i}", show_name=f"Show {s}",
+                pub_date=newest - timedelta(days=i, hours=s), original_audio_url=f"http://example.com/{s}/{i}.mp3",
+                original_file_path=f"/nonexistent/{s}/{i}.mp3", original_file_size=int(duration * 16000),
+                original_duration=duration, cleaned_duration=duration * 0.93,
+                description=" ".join(rng.choice(CONTENT_WORDS) for _ in range(60)),
+                show_author="Bench", cleaned_chapters_json=json.dumps(chapters),
+                status=status, checkpoint="transcribed" if status == "transcribed" else "chapters",
+            ))
+    session.add_all(episodes)
+    session.commit()
+    return len(episodes)
@@ -0,0 +1,287 @@
+import functools
+import http.server
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from benchmarks import fixtures
+
+logger = logging.getLogger(__name__)
+
+# A timed case: run() is measured; setup() (untimed) runs before every measured call
+Case = namedtuple('Case', ['run', 'setup', 'params'])
+DEFAULT_REGRESSION_THRESHOLD = 1.25 # median slower than baseline by this factor counts as a regression
+
+
+class Skip(Exception):
+    pass
+
+
+def _no_setup():
+    pass
+
+
+def case_slide(workdir: str, scale: float) -> Case:
+    from src.detect.fusion import slide
+    duration = 3600 * scale
+    segments = fixtures.synthetic_transcript(duration, fixtures.ad_spans(duration, 4, random.Random(1)), seed=1)
+    return Case(lambda: sum(1 for _ in slide(segments, 30, 10)), _no_setup,
+                {"audio_seconds": duration, "words": sum(len(s["words"]) for s in segments), "window_s": 30, "step_s": 10})
+
+
+def case_text_rules(workdir: str, scale: float) -> Case:
+    from src.config.config_loader import load_show_rules
+    from src.detect.scoring import build_tracks, compile_alternation, compile_patterns, fuse_tracks, get_profile, segment_scores
+    duration = 3 * 3600 * scale
+    segments = fixtures.synthetic_transcript(duration, fixtures.ad_spans(duration, 6, random.Random(2)), seed=2)
+    rules = load_show_rules()
+    profile = get_profile(rules.aggressiveness)
+
+    def run():
+        tracks = build_tracks(duration, profile, segments=segments,
+                              phrase_pattern=compile_alternation(rules.phrases),
+                              url_price_pattern=compile_patterns(rules.url_patterns + rules.price_patterns))
+        return segment_scores(fuse_tracks(tracks, profile["weights"]), tracks, profile["threshold"])
+    return Case(run, _no_setup, {"audio_seconds": duration, "segments": len(segments)})
+
+
+def case_keep_segments(workdir: str, scale: float) -> Case:
+    from src.cut.plan import build_keep_segments
+    duration = 3 * 3600.0
+    cuts = fixtures.random_cuts(duration, max(1, int(5000 * scale)), seed=3)
+    return Case(lambda: build_keep_segments(duration, cuts), _no_setup, {"duration_s": duration, "cuts": len(cuts)})
+
+
+def case_chapters_remap(workdir: str, scale: float) -> Case:
+    from src.cut.plan import build_keep_segments
+    from src.cut.tags_chapters import adjust_chapters_after_cut
+    duration = 3 * 3600.0
+    keeps = build_keep_segments(duration, fixtures.random_cuts(duration, max(1, int(500 * scale)), seed=4))
+    chapters = fixtures.synthetic_chapters(duration, max(1, int(5000 * scale)))
+    return Case(lambda: adjust_chapters_after_cut(chapters, keeps), _no_setup, {"chapters": len(chapters), "keep_segments": len(keeps)})
+
+
+def case_meta_feed(workdir: str, scale: float) -> Case:
+    from src.feed.meta_feed import build_meta_feed
+    from src.store.db import get_session, init_db
+    database_url = f"sqlite:///{os.path.join(workdir, 'feed.sqlite3')}"
+    init_db(database_url)
+    with get_session() as session:
+        episodes = fixtures.populate_db(session, shows=20, episodes_per_show=max(1, int(100 * scale)), seed=5)
+    return Case(lambda: build_meta_feed("http://localhost:8080", max_items=500), lambda: init_db(database_url),
+                {"episodes_in_db": episodes, "max_items": 500})
+
+
+def case_interval_algebra(workdir: str, scale: float) -> Case:
+    from src.cut.intervals import IntervalSet
+    extent = 1_000_000.0
+    count = max(1, int(10_000 * scale))
+    a, b = (IntervalSet.from_dicts(fixtures.random_cuts(extent, count, seed=seed, max_length=30.0)) for seed in (7, 8))
+
+    def run():
+        a.union(b)
+        a.intersection(b)
+        a.difference(b)
+        a.complement(0, extent)
+        return a.pad(8, lo=0).bridge_gaps(2).filter_min_length(5)
+    return Case(run, _no_setup, {"intervals_per_set": count})
+
+
+def case_rms_envelope(workdir: str, scale: float) -> Case:
+    import numpy as np
+    from src.detect.audio_cues import PCM_DTYPE, PCM_SAMPLE_RATE, load_pcm, rms_envelope
+    duration = 3600 * scale
+    pcm_path = os.path.join(workdir, "episode.pcm")
+    np.random.default_rng(9).integers(-6000, 6000, int(duration * PCM_SAMPLE_RATE), dtype=PCM_DTYPE).tofile(pcm_path)
+    return Case(lambda: rms_envelope(load_pcm(pcm_path)), _no_setup, {"audio_seconds": duration})
+
+
+def case_chapter_classifier(workdir: str, scale: float) -> Case:
+    from src.detect.chapters import ChapterClassifier
+    titles = fixtures.chapter_titles(max(1, int(20_000 * scale)), seed=10)
+    classifier = ChapterClassifier()
+    return Case(lambda: [classifier.score(title) for title in titles], _no_setup, {"titles": len(titles)})
+
+
+def case_cli_startup(workdir: str, scale: float) -> Case:
+    """
+    A fresh interpreter importing the CLI entry point (interpreter start-up included).
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    command = [sys.executable, "-c", "import src.main"]
+    return Case(lambda: subprocess.run(command, cwd=root, check=True), _no_setup, {"command": "import src.main"})
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _serve_directory(directory: str):
+    """
+    Serves `directory` over HTTP on a free local port from a daemon thread.
+    """
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def case_bulk_ingest(workdir: str, scale: float) -> Case:
+    """
+    OPML import of several feeds whose enclosures are real (silent) MP3s served from localhost:
+    feed parsing, streaming download with hashing, header probing and the database writes.
+    """
+    from src.config.config_loader import config_service
+    from src.ingest.opml_import import import_opml
+    from src.store.db import init_db
+    site = os.path.join(workdir, "site")
+    os.makedirs(site, exist_ok=True)
+    server, base_url = _serve_directory(site)
+    feeds, items = 4, max(1, int(25 * scale))
+    total_bytes = 0
+    for f in range(feeds):
+        # Every file has a different length, so no two downloads are deduplicated
+        sizes = {i: fixtures.write_silent_mp3(os.path.join(site, f"{f}-{i}.mp3"), 20 + f * items + i) for i in range(items)}
+        total_bytes += sum(sizes.values())
+        fixtures.write_rss(os.path.join(site, f"feed{f}.xml"), f"Bench show {f}", items,
+                           lambda i, f=f: f"{base_url}/{f}-{i}.mp3", seed=f, sizes=sizes)
+    opml_path = os.path.join(workdir, "feeds.opml")
+    fixtures.write_opml(opml_path, [f"{base_url}/feed{f}.xml" for f in range(feeds)])
+    runs = iter(range(1_000_000))
+
+    def setup():
+        # Fresh database and media directory, so every run downloads everything again
+        run_dir = os.path.join(workdir, f"ingest-{next(runs)}")
+        os.makedirs(run_dir)
+        os.environ["PODCLEAN_MEDIA_BASE_PATH"] = run_dir
+        config_service.invalidate()
+        init_db(f"sqlite:///{os.path.join(run_dir, 'db.sqlite3')}")
+    return Case(lambda: import_opml(opml_path), setup, {"feeds": feeds, "episodes": feeds * items, "bytes": total_bytes})
+
+
+def case_ffmpeg_cut(workdir: str, scale: float) -> Case:
+    from src.cut.ffmpeg_exec import cut_with_ffmpeg
+    from src.cut.plan import build_keep_segments
+    duration = 1800 * scale
+    ads = fixtures.ad_spans(duration, 4, random.Random(6))
+    source = os.path.join(workdir, "tones.mp3")
+    if not fixtures.write_tone_episode(source, duration, ads):
+        raise Skip("ffmpeg is not available")
+    keeps = build_keep_segments(duration, [{"start": s, "end": e} for s, e in ads])
+    output = os.path.join(workdir, "tones_clean.mp3")
+
+    def run():
+        if not cut_with_ffmpeg(source, keeps, output):
+            raise RuntimeError("ffmpeg cut failed")
+    return Case(run, _no_setup, {"audio_seconds": duration, "keep_segments": len(keeps)})
+
+
+CASES = {
+    "slide": case_slide,
+    "text_rules": case_text_rules,
+    "keep_segments": case_keep_segments,
+    "chapters_remap": case_chapters_remap,
+    "interval_algebra": case_interval_algebra,
+    "rms_envelope": case_rms_envelope,
+    "chapter_classifier": case_chapter_classifier,
+    "cli_startup": case_cli_startup,
+    "meta_feed": case_meta_feed,
+    "bulk_ingest": case_bulk_ingest,
+    "ffmpeg_cut": case_ffmpeg_cut,
+}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+def time_case(case: Case, repeat: int) -> dict:
+    """
+    One untimed warm-up call, then `repeat` timed calls (each after its setup).
+    """
+    case.setup()
+    case.run()
+    runs = []
+    for _ in range(repeat):
+        case.setup()
+        started = time.perf_counter()
+        case.run()
+        runs.append(time.perf_counter() - started)
+    return {"params": case.params, "runs_s": [round(r, 6) for r in runs], "min_s": round(min(runs), 6),
+            "median_s": round(statistics.median(runs), 6), "mean_s": round(statistics.fmean(runs), 6)}
+
+
+def run_suite(cases: list = None, scale: float = 1.0, repeat: int = 5, workdir: str = None) -> dict:
+    """
+    Runs the selected cases on freshly generated fixtures and returns the results document.
+    Fixtures are deterministic for a given scale, so runs of the same scale are comparable.
+    """
+    unknown = set(cases or ()) - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown benchmark cases: {', '.join(sorted(unknown))}")
+    results = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "scale": scale,
+        "repeat": repeat,
+        "results": {},
+    }
+    saved_media_path = os.environ.get("PODCLEAN_MEDIA_BASE_PATH")
+    with tempfile.TemporaryDirectory(prefix="podclean_bench_", dir=workdir) as root:
+        try:
+            for name in cases or CASES:
+                case_dir = os.path.join(root, name)
+                os.makedirs(case_dir)
+                try:
+                    results["results"][name] = time_case(CASES[name](case_dir, scale), repeat)
+                except Skip as e:
+                    results["results"][name] = {"skipped": str(e)}
+                logger.info(f"Benchmark {name}: {results['results'][name].get('median_s', 'skipped')}")
+        finally:
+            if saved_media_path is None:
+                os.environ.pop("PODCLEAN_MEDIA_BASE_PATH", None)
+            else:
+                os.environ["PODCLEAN_MEDIA_BASE_PATH"] = saved_media_path
+            from src.config.config_loader import config_service
+            config_service.invalidate()
+    return results
+
+
+def compare_results(current: dict, baseline: dict, threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> list:
+    """
+    Median time of every case present in both runs, relative to the baseline.
+    """
+    comparison = []
+    if current.get("scale") != baseline.get("scale"):
+        logger.warning(f"Comparing runs at different scales ({current.get('scale')} vs {baseline.get('scale')}).")
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name, {})
+        if "median_s" not in result or not before.get("median_s"):
+            continue
+        ratio = result["median_s"] / before["median_s"]
+        comparison.append({"case": name, "baseline_median_s": before["median_s"], "median_s": result["median_s"],
+                           "ratio": round(ratio, 3), "regression": ratio > threshold})
+    return comparison
+
+
+def save_results(results: dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
@@ -5,8 +5,9 @@ class DetectorConfig(BaseModel):
     use_chapters: bool = True
     use_text_rules: bool = True
     use_audio_cues: bool = False
-    require_signals: int = 2
     padding_seconds: int = 8
+    refine_boundaries: bool = True # Snap cut edges to low-energy valleys in the decoded audio
+    refined_padding_seconds: float = 1.0 # Padding used instead of padding_seconds once edges are refined
     priors: dict = Field(default_factory=dict)
 
 class EncodingConfig(BaseModel):
@@ -19,6 +20,33 @@ class RetentionPolicyConfig(BaseModel):
     max_episodes_per_show: int = 10
     max_days_per_episode: int = 30
 
+class StorageConfig(BaseModel):
+    max_bytes: int = 0 # Global budget for everything under PODCLEAN_MEDIA_BASE_PATH; 0 disables eviction
+    evict_originals_after_cut: bool = True # Allow dropping originals of episodes that already have a cleaned copy
+
+class SchedulerConfig(BaseModel):
+    new_episode_hours: int = 48 # Episodes published more recently than this are in the "new" priority class
+    recency_weight: float = 3.0 # Priority of a just-published episode, decaying with age
+    recency_half_life_hours: float = 24.0
+    processing_weight: float = 2.0 # Getting an episode cut-ready outranks a full transcription
+    aging_per_hour: float = 0.05 # Priority gained per hour of waiting, so the backlog never starves
+    requeue_after_jobs: int = 6 # Jobs run before the queue is rebuilt, so newly polled episodes can overtake the backlog
+
+class GovernorConfig(BaseModel):
+    enabled: bool = True
+    max_parallel_jobs: int = 3 # Episodes the worker runs at once; their heavy stages are admitted by the governor
+    core_budget: int = 0 # Threads the heavy stages may use together; 0 uses every core
+    fast_whisper_threads: int = 2 # whisper.cpp -t for the fast pass
+    full_whisper_threads: int = 4 # whisper.cpp -t for the full pass
+    ffmpeg_threads: int = 1 # ffmpeg -threads for cutting and decoding
+    max_load_per_core: float = 1.5 # No new heavy stage while the 1-minute load average is above this per core
+    memory_reserve_mb: int = 1024 # RAM left free when admitting a stage (whisper models need their size in RAM)
+    poll_seconds: float = 2.0 # How often a waiting stage re-checks load and memory
+
+class ProfilingConfig(BaseModel):
+    sample_rate: float = 0.0 # Fraction of worker jobs run under cProfile (episodes can also be flagged one by one)
+    top_functions: int = 40 # Functions listed in each profile's JSON summary
+
 class BacklogProcessingConfig(BaseModel):
     strategy: str = "all" # "all", "newest_only", "last_n_episodes"
     last_n_episodes_count: int = 5
@@ -34,13 +62,14 @@ class AppConfig(BaseModel):
     poll_interval_minutes: int = 15
     process_interval_minutes: int = 5
     cleanup_interval_minutes: int = 60
+    mark_mining_interval_minutes: int = 60
 
     # Media storage
     PODCLEAN_MEDIA_BASE_PATH: str = "./data"
 
     # Performance
     MAX_PARALLEL_DOWNLOADS: int = 3
-    MAX_PARALLEL_TRANSCRIBE: int = 2
+    MAX_PARALLEL_TRANSCRIBE: int = 2 # whisper.cpp processes running at once (enforced by the governor)
 
     # Fast pass transcription
     FAST_MODEL: str = "small"
@@ -59,6 +88,11 @@ class AppConfig(BaseModel):
 
     # Feed
     MAX_FEED_ITEMS: int = 500
+    feeds: List[str] = Field(default_factory=list) # Subscribed RSS feed URLs (managed via add/remove feed)
+
+    # Audio serving
+    AUDIO_OFFLOAD_MODE: str = "none" # "none", "x-accel-redirect", "x-sendfile"
+    AUDIO_OFFLOAD_PREFIX: str = "/protected-media" # Internal nginx location mapped to PODCLEAN_MEDIA_BASE_PATH
 
     # Detector
     detector: DetectorConfig = Field(default_factory=DetectorConfig)
@@ -72,6 +106,21 @@ class AppConfig(BaseModel):
     # Retention Policy
     retention_policy: RetentionPolicyConfig = Field(default_factory=RetentionPolicyConfig)
 
+    # Disk budget
+    storage: StorageConfig = Field(default_factory=StorageConfig)
+
+    # Stage timings (stage_metrics table, /metrics)
+    metrics_retention_days: int = 30
+
+    # Opt-in cProfile of worker jobs (artifacts downloadable from /admin/profiles)
+    profiling: ProfilingConfig = Field(default_factory=ProfilingConfig)
+
+    # Job ordering
+    scheduler: SchedulerConfig = Field(default_factory=SchedulerConfig)
+
+    # CPU and memory admission of the heavy stages (whisper, ffmpeg)
+    governor: GovernorConfig = Field(default_factory=GovernorConfig)
+
     # Backlog Processing
     backlog_processing: BacklogProcessingConfig = Field(default_factory=BacklogProcessingConfig)
 
@@ -80,6 +129,10 @@ class AppConfig(BaseModel):
     feed_username: str = "podemos_user"
     feed_password: str = "change_this_password"
 
+    # Admin endpoints (/admin/...) always need these credentials; disabled while admin_password is unset
+    admin_username: str = "admin"
+    admin_password: Optional[str] = None
+
     # Error Handling
     MAX_PROCESSING_RETRIES: int = 3
 
@@ -90,3 +143,6 @@ class ShowRules(BaseModel):
     jingles: List[str] = Field(default_factory=list)
     time_priors: dict = Field(default_factory=dict)
     aggressiveness: str = "conservative"
+    chapter_ad_terms: List[str] = Field(default_factory=list) # Extra chapter-title words/phrases that mark ads for this show
+    chapter_safe_terms: List[str] = Field(default_factory=list) # Title words/phrases that look like ads but are not (e.g. a segment named "The Ad Lab")
+    priority: float = 0.0 # Added to the job priority of this show's episodes (negative to deprioritize)
@@ -1,6 +1,11 @@
 import yaml
 import os
-from src.config.config import AppConfig, ShowRules, DetectorConfig, EncodingConfig, RetentionPolicyConfig, BacklogProcessingConfig
+import time
+import logging
+import threading
+from src.config.config import AppConfig, ShowRules, DetectorConfig, EncodingConfig, RetentionPolicyConfig, BacklogProcessingConfig, StorageConfig, SchedulerConfig, GovernorConfig, ProfilingConfig
+
+logger = logging.getLogger(__name__)
 
 def load_config(config_path: str) -> dict:
     """
@@ -17,23 +22,27 @@ def load_env_config() -> dict:
     """
     env_config = {}
     # Iterate through common expected env vars and load them
-    for key in AppConfig.__fields__.keys():
+    for key in AppConfig.model_fields:
         if key in os.environ:
             env_config[key] = os.environ[key]
     return env_config
 
-def load_show_rules(show_slug: str = None) -> ShowRules:
+def _get_show_rules_dir() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'config', 'shows')
+
+def read_show_rules(show_slug: str = None) -> ShowRules:
     """
-    Loads default and optionally show-specific rules, merging them.
+    Reads default and optionally show-specific rules from disk, merging them.
+    Most callers want the cached load_show_rules instead.
     """
-    base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'config', 'shows')
+    base_dir = _get_show_rules_dir()
     default_rules_path = os.path.join(base_dir, 'default.rules.yaml')
     
-    default_rules_data = load_config(default_rules_path)
+    default_rules_data = load_config(default_rules_path) or {}
     
     if show_slug:
         show_rules_path = os.path.join(base_dir, f'{show_slug}.rules.yaml')
-        show_rules_data = load_config(show_rules_path)
+        show_rules_data = load_config(show_rules_path) or {}
         
         # Simple merge: show-specific rules override default rules
         merged_rules_data = default_rules_data.copy()
@@ -49,7 +58,7 @@ def load_show_rules(show_slug: str = None) -> ShowRules:
     return ShowRules(**default_rules_data)
 
 def save_show_rules(show_slug: str, backlog_strategy: str, last_n_episodes_count: int, aggressiveness: str):
-    base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'config', 'shows')
+    base_dir = _get_show_rules_dir()
     show_rules_path = os.path.join(base_dir, f'{show_slug}.rules.yaml')
 
     # Load existing rules if any, otherwise start with an empty dict
@@ -64,14 +73,128 @@ def save_show_rules(show_slug: str, backlog_strategy: str, last_n_episodes_count
 
     with open(show_rules_path, 'w') as f:
         yaml.safe_dump(current_rules, f, sort_keys=False)
+    config_service.invalidate()
     logger.info(f"Saved settings for show {show_slug} to {show_rules_path}")
 
+def _get_app_config_path() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'config', 'app.yaml')
+
+def _file_mtime(path: str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+class ConfigService:
+    """
+    Caches parsed AppConfig and ShowRules objects and re-reads them only when their
+    source files (or the relevant environment variables) change.
+
+    The environment is compared on every call; the YAML files are stat'ed at most once
+    per `check_interval` seconds.
+    `version` increases every time a cached object is replaced because its source changed,
+    so downstream caches (compiled matchers, feed fragments) can key on it.
+    Cached objects are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._app_config = None
+        self._app_fingerprint = None
+        self._show_rules = {} # show_slug -> (fingerprint, ShowRules)
+        self._last_check = {} # cache key -> monotonic time of last fingerprint check
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _due_for_check(self, key) -> bool:
+        now = time.monotonic()
+        last = self._last_check.get(key)
+        if last is not None and now - last < self.check_interval:
+            return False
+        self._last_check[key] = now
+        return True
+
+    def _env_fingerprint(self):
+        return tuple((key, os.environ.get(key)) for key in AppConfig.model_fields)
+
+    def _show_rules_fingerprint(self, show_slug: str = None):
+        base_dir = _get_show_rules_dir()
+        show_mtime = _file_mtime(os.path.join(base_dir, f'{show_slug}.rules.yaml')) if show_slug else None
+        return (_file_mtime(os.path.join(base_dir, 'default.rules.yaml')), show_mtime)
+
+    def app_config(self) -> AppConfig:
+        with self._lock:
+            env = self._env_fingerprint()
+            if self._app_config is not None and env == self._app_fingerprint[1] and not self._due_for_check('app'):
+                return self._app_config
+            fingerprint = (_file_mtime(_get_app_config_path()), env)
+            if self._app_config is None or fingerprint != self._app_fingerprint:
+                had_config = self._app_config is not None
+                self._app_config = read_app_config()
+                self._app_fingerprint = fingerprint
+                if had_config:
+                    self._version += 1
+                    logger.info(f"Reloaded app config (config version {self._version}).")
+            return self._app_config
+
+    def show_rules(self, show_slug: str = None) -> ShowRules:
+        key = ('show', show_slug)
+        with self._lock:
+            cached = self._show_rules.get(show_slug)
+            if cached is not None and not self._due_for_check(key):
+                return cached[1]
+            fingerprint = self._show_rules_fingerprint(show_slug)
+            if cached is None or fingerprint != cached[0]:
+                rules = read_show_rules(show_slug)
+                self._show_rules[show_slug] = (fingerprint, rules)
+                if cached is not None:
+                    self._version += 1
+                    logger.info(f"Reloaded show rules for {show_slug or 'default'} (config version {self._version}).")
+                return rules
+            return cached[1]
+
+    def invalidate(self):
+        """
+        Drops every cached object, e.g. after this process wrote a config file itself.
+        """
+        with self._lock:
+            self._app_config = None
+            self._app_fingerprint = None
+            self._show_rules.clear()
+            self._last_check.clear()
+            self._version += 1
+
+config_service = ConfigService()
+
 def load_app_config() -> AppConfig:
     """
-    Loads the main application configuration.
+    Returns the main application configuration (cached, see ConfigService).
+    """
+    return config_service.app_config()
+
+def load_show_rules(show_slug: str = None) -> ShowRules:
+    """
+    Returns default rules merged with show-specific rules (cached, see ConfigService).
+    """
+    return config_service.show_rules(show_slug)
+
+def get_config_version() -> int:
     """
-    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'config', 'app.yaml')
-    app_config_data = load_config(config_path)
+    Returns a number that changes whenever the app config or any show rules change.
+    """
+    return config_service.version
+
+def read_app_config() -> AppConfig:
+    """
+    Reads and validates the main application configuration from app.yaml and the environment.
+    Most callers want the cached load_app_config instead.
+    """
+    config_path = _get_app_config_path()
+    app_config_data = load_config(config_path) or {}
     env_config_data = load_env_config()
     
     # Environment variables override app.yaml settings
@@ -82,12 +205,20 @@ def load_app_config() -> AppConfig:
     encoding_data = app_config_data.pop('encoding', {})
     retention_policy_data = app_config_data.pop('retention_policy', {})
     backlog_processing_data = app_config_data.pop('backlog_processing', {})
+    storage_data = app_config_data.pop('storage', {})
+    scheduler_data = app_config_data.pop('scheduler', {})
+    governor_data = app_config_data.pop('governor', {})
+    profiling_data = app_config_data.pop('profiling', {})
 
     # Create Pydantic models
     app_config_data['detector'] = DetectorConfig(**detector_data)
     app_config_data['encoding'] = EncodingConfig(**encoding_data)
     app_config_data['retention_policy'] = RetentionPolicyConfig(**retention_policy_data)
     app_config_data['backlog_processing'] = BacklogProcessingConfig(**backlog_processing_data)
+    app_config_data['storage'] = StorageConfig(**storage_data)
+    app_config_data['scheduler'] = SchedulerConfig(**scheduler_data)
+    app_config_data['governor'] = GovernorConfig(**governor_data)
+    app_config_data['profiling'] = ProfilingConfig(**profiling_data)
 
     # Ensure PODCLEAN_MEDIA_BASE_PATH has a default value if not set
     if 'PODCLEAN_MEDIA_BASE_PATH' not in app_config_data:
@@ -95,9 +226,6 @@ def load_app_config() -> AppConfig:
 
     return AppConfig(**app_config_data)
 
-def _get_app_config_path() -> str:
-    return os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'config', 'app.yaml')
-
 def add_feed_to_config(feed_url: str):
     config_path = _get_app_config_path()
     with open(config_path, 'r+') as f:
@@ -109,6 +237,7 @@ def add_feed_to_config(feed_url: str):
             f.seek(0) # Rewind to the beginning of the file
             yaml.safe_dump(config, f, sort_keys=False)
             f.truncate() # Truncate any remaining old content
+            config_service.invalidate()
             logger.info(f"Added feed: {feed_url} to app.yaml")
         else:
             logger.warning(f"Feed already exists in app.yaml: {feed_url}")
@@ -122,6 +251,7 @@ def remove_feed_from_config(feed_url: str):
             f.seek(0) # Rewind to the beginning of the file
             yaml.safe_dump(config, f, sort_keys=False)
             f.truncate() # Truncate any remaining old content
+            config_service.invalidate()
             logger.info(f"Removed feed: {feed_url} from app.yaml")
         else:
             logger.warning(f"Feed not found in app.yaml: {feed_url}")
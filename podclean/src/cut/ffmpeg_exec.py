@@ -1,7 +1,12 @@
 import subprocess
 import os
+import logging
 
-def cut_with_ffmpeg(input_mp3: str, keeps: list, output_path: str, codec: str = "mp3", bitrate: str = "v4", normalize_loudness: bool = False) -> bool:
+from src.jobs.governor import ffmpeg_thread_args
+
+logger = logging.getLogger(__name__)
+
+def cut_with_ffmpeg(input_mp3: str, keeps: list, output_path: str, codec: str = "mp3", bitrate: str = "v4", normalize_loudness: bool = False, threads: int = None) -> bool:
     """
     Cuts and concatenates audio segments using ffmpeg.
 
@@ -12,12 +17,13 @@ def cut_with_ffmpeg(input_mp3: str, keeps: list, output_path: str, codec: str =
         codec: Audio codec for output (e.g., "mp3", "aac").
         bitrate: Audio bitrate for output (e.g., "v4" for VBR MP3, "96k").
         normalize_loudness: Whether to apply EBU R 128 loudness normalization.
+        threads: ffmpeg -threads for the filter graph and encoder (None lets ffmpeg decide).
 
     Returns:
         True if successful, False otherwise.
     """
     if not keeps:
-        print("No segments to keep. Skipping ffmpeg execution.")
+        logger.warning("No segments to keep. Skipping ffmpeg execution.")
         return False
 
     filter_complex = []
@@ -44,25 +50,31 @@ def cut_with_ffmpeg(input_mp3: str, keeps: list, output_path: str, codec: str =
     else:
         command.extend([f"-b:a", bitrate])
 
-    command.append(output_path)
-    command.append("-y") # Overwrite output files without asking
+    command.extend(ffmpeg_thread_args(threads, filter_graph=True))
+
+    # Encode next to the target and swap it in afterwards: output_path may be a hardlink shared
+    # with a duplicate episode, and ffmpeg -y would truncate that shared inode in place.
+    root, ext = os.path.splitext(output_path)
+    partial_path = f"{root}.part{ext}" # Keep the extension so ffmpeg picks the muxer
+    command.append(partial_path)
+    command.append("-y") # Overwrite a leftover partial file without asking
 
-    print(f"Executing FFmpeg command: {' '.join(command)}")
+    logger.debug(f"Executing FFmpeg command: {' '.join(command)}")
     try:
         # Using subprocess.run with capture_output=True and check=True
         # will raise CalledProcessError if the command returns a non-zero exit code
         result = subprocess.run(command, check=True, capture_output=True, text=True)
-        print("FFmpeg Stdout:", result.stdout)
-        print("FFmpeg Stderr:", result.stderr)
-        print(f"Successfully created cleaned audio at {output_path}")
+        logger.debug(f"FFmpeg stderr: {result.stderr}")
+        os.replace(partial_path, output_path)
+        logger.info(f"Successfully created cleaned audio at {output_path}")
         return True
     except subprocess.CalledProcessError as e:
-        print(f"FFmpeg command failed with error: {e}")
-        print("FFmpeg Stdout:", e.stdout)
-        print("FFmpeg Stderr:", e.stderr)
+        logger.error(f"FFmpeg command failed with error: {e}\nFFmpeg stderr: {e.stderr}")
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
         return False
     except FileNotFoundError:
-        print("Error: ffmpeg not found. Please ensure ffmpeg is installed and in your PATH.")
+        logger.error("ffmpeg not found. Please ensure ffmpeg is installed and in your PATH.")
         return False
 
 if __name__ == "__main__":
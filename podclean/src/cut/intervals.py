@@ -0,0 +1,129 @@
+import numpy as np
+
+
+def _merge_sorted(starts: np.ndarray, ends: np.ndarray, max_gap: float = 0.0):
+    """
+    Merges intervals already sorted by start. Intervals that overlap, touch, or are separated
+    by at most max_gap become one. Returns new (starts, ends) arrays.
+    """
+    if len(starts) == 0:
+        return starts, ends
+    reach = np.maximum.accumulate(ends)
+    # An interval opens a new group when it starts beyond everything before it (plus the bridged gap)
+    new_group = np.empty(len(starts), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = starts[1:] > reach[:-1] + max_gap
+    group_starts = np.flatnonzero(new_group)
+    return starts[group_starts], np.maximum.reduceat(ends, group_starts)
+
+
+class IntervalSet:
+    """
+    A set of disjoint, sorted, half-open [start, end) intervals backed by two NumPy arrays.
+
+    Every operation is a sort, cumulative max or binary search over those arrays, so sets
+    with tens of thousands of intervals combine in milliseconds. Instances are immutable.
+    """
+
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self, starts=(), ends=(), _normalized: bool = False):
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        if not _normalized:
+            keep = ends > starts
+            starts, ends = starts[keep], ends[keep]
+            order = np.argsort(starts, kind='stable')
+            starts, ends = _merge_sorted(starts[order], ends[order])
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_pairs(cls, pairs) -> "IntervalSet":
+        pairs = np.asarray(list(pairs), dtype=np.float64).reshape(-1, 2)
+        return cls(pairs[:, 0], pairs[:, 1])
+
+    @classmethod
+    def from_dicts(cls, items, start_key: str = 'start', end_key: str = 'end') -> "IntervalSet":
+        items = list(items)
+        return cls([i[start_key] for i in items], [i[end_key] for i in items])
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.starts.tolist(), self.ends.tolist())
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, IntervalSet) and np.array_equal(self.starts, other.starts) and np.array_equal(self.ends, other.ends)
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({self.to_list()})"
+
+    @property
+    def total_length(self) -> float:
+        return float(np.sum(self.ends - self.starts))
+
+    def to_list(self) -> list:
+        return [[s, e] for s, e in self]
+
+    def to_dicts(self) -> list:
+        return [{'start': s, 'end': e} for s, e in self]
+
+    def contains(self, points):
+        """
+        Vectorized membership test; returns a boolean array (or bool for a scalar).
+        """
+        points = np.asarray(points, dtype=np.float64)
+        idx = np.searchsorted(self.starts, points, side='right') - 1
+        safe_idx = np.clip(idx, 0, max(len(self.ends) - 1, 0))
+        result = (idx >= 0) & (points < (self.ends[safe_idx] if len(self.ends) else points))
+        return bool(result) if result.ndim == 0 else result
+
+    def union(self, other: "IntervalSet") -> "IntervalSet":
+        return IntervalSet(np.concatenate([self.starts, other.starts]), np.concatenate([self.ends, other.ends]))
+
+    def complement(self, lo: float, hi: float) -> "IntervalSet":
+        """
+        Everything in [lo, hi) not covered by this set.
+        """
+        starts = np.concatenate([[lo], self.ends])
+        ends = np.concatenate([self.starts, [hi]])
+        starts, ends = np.clip(starts, lo, hi), np.clip(ends, lo, hi)
+        keep = ends > starts
+        return IntervalSet(starts[keep], ends[keep], _normalized=True)
+
+    def intersection(self, other: "IntervalSet") -> "IntervalSet":
+        if not len(self) or not len(other):
+            return IntervalSet()
+        lo = min(self.starts[0], other.starts[0])
+        hi = max(self.ends[-1], other.ends[-1])
+        return self.complement(lo, hi).union(other.complement(lo, hi)).complement(lo, hi)
+
+    def difference(self, other: "IntervalSet") -> "IntervalSet":
+        if not len(self) or not len(other):
+            return self
+        return self.intersection(other.complement(self.starts[0], self.ends[-1]))
+
+    def pad(self, before: float, after: float = None, lo: float = 0.0, hi: float = None) -> "IntervalSet":
+        """
+        Widens every interval (clamped to [lo, hi]) and merges any that now overlap.
+        """
+        after = before if after is None else after
+        starts = np.maximum(self.starts - before, lo)
+        ends = self.ends + after
+        if hi is not None:
+            ends = np.minimum(ends, hi)
+        keep = ends > starts
+        # Padding keeps the order of starts, so only a merge pass is needed
+        return IntervalSet(*_merge_sorted(starts[keep], ends[keep]), _normalized=True)
+
+    def bridge_gaps(self, max_gap: float) -> "IntervalSet":
+        """
+        Joins neighbouring intervals separated by at most max_gap.
+        """
+        return IntervalSet(*_merge_sorted(self.starts, self.ends, max_gap), _normalized=True)
+
+    def filter_min_length(self, min_length: float) -> "IntervalSet":
+        keep = (self.ends - self.starts) >= min_length
+        return IntervalSet(self.starts[keep], self.ends[keep], _normalized=True)
@@ -1,32 +1,15 @@
+from src.cut.intervals import IntervalSet
+
+# Keep segments shorter than this are slivers between near-adjacent cuts, not content
+MIN_KEEP_SECONDS = 0.001
+
 def build_keep_segments(duration: float, cuts: list) -> list:
     """
     Builds a list of audio segments to keep, given the total duration and a list of ad cuts.
-    Cuts are expected to be dictionaries with 'start' and 'end' keys.
+    Cuts are expected to be dictionaries with 'start' and 'end' keys; overlapping cuts are merged.
     """
-    # Sort cuts by start time and merge overlapping cuts
-    if not cuts:
-        return [[0.0, duration]]
-
-    sorted_cuts = sorted(cuts, key=lambda x: x['start'])
-    merged_cuts = []
-
-    for cut in sorted_cuts:
-        if not merged_cuts or cut['start'] > merged_cuts[-1]['end']:
-            merged_cuts.append([cut['start'], cut['end']])
-        else:
-            merged_cuts[-1]['end'] = max(merged_cuts[-1]['end'], cut['end'])
-
-    keeps = []
-    cursor = 0.0
-    for seg in merged_cuts:
-        if seg[0] > cursor + 0.001:  # Add a small epsilon to avoid floating point issues
-            keeps.append([cursor, seg[0]])
-        cursor = max(cursor, seg[1])
-
-    if duration > cursor + 0.001:
-        keeps.append([cursor, duration])
-
-    return keeps
+    keep = IntervalSet.from_dicts(cuts).complement(0.0, duration).filter_min_length(MIN_KEEP_SECONDS)
+    return keep.to_list()
 
 if __name__ == "__main__":
     # Example usage
@@ -1,4 +1,5 @@
 import json
+from src.cut.timeline import Timeline, remap_timed_items
 
 def adjust_chapters_after_cut(original_chapters: list, keep_segments: list) -> list:
     """
@@ -10,56 +11,18 @@ def adjust_chapters_after_cut(original_chapters: list, keep_segments: list) -> l
         keep_segments: List of [start, end] segments that were kept from the original audio.
 
     Returns:
-        A new list of chapter dictionaries with adjusted timestamps.
+        A new list of chapter dictionaries with adjusted timestamps. A chapter that starts inside
+        a cut begins at the next kept sample; a chapter that was cut entirely is dropped.
     """
-    adjusted_chapters = []
-    for original_chapter in original_chapters:
-        chapter_start = original_chapter['start']
-        chapter_end = original_chapter['end']
-        adjusted_start = None
-        adjusted_end = None
-        current_offset = 0.0
+    return remap_timed_items(original_chapters, Timeline(keep_segments))
 
-        for k_start, k_end in keep_segments:
-            segment_duration = k_end - k_start
-
-            # Case 1: Chapter starts within this keep segment
-            if k_start <= chapter_start < k_end:
-                adjusted_start = current_offset + (chapter_start - k_start)
-
-            # Case 2: Chapter ends within this keep segment
-            if k_start < chapter_end <= k_end:
-                adjusted_end = current_offset + (chapter_end - k_start)
-
-            # Case 3: Chapter spans across this entire keep segment
-            if chapter_start < k_start and chapter_end > k_end:
-                # If chapter spans this segment, add its duration to the adjusted end if it's the first part
-                # or if it's a continuation of a spanning chapter
-                pass # Handled by start/end within segments, or by total duration if chapter spans multiple
-
-            # If both start and end are found within the current segment or across segments
-            if adjusted_start is not None and adjusted_end is not None:
-                # Ensure adjusted_end is not before adjusted_start due to floating point or complex overlaps
-                if adjusted_end < adjusted_start:
-                    adjusted_end = adjusted_start + (chapter_end - chapter_start) # Approximate duration
-                
-                new_chapter = original_chapter.copy()
-                new_chapter['start'] = adjusted_start
-                new_chapter['end'] = adjusted_end
-                adjusted_chapters.append(new_chapter)
-                break # Move to the next original chapter
-            
-            current_offset += segment_duration
-
-    return adjusted_chapters
-
-def filter_ad_chapters(chapters: list) -> list:
+def filter_ad_chapters(chapters: list, show_slug: str = None) -> list:
     """
-    Filters out chapters that are identified as ad segments.
-    Assumes matches_ad_chapter function is available (from detect.chapters).
+    Filters out chapters that are identified as ad segments (using the show's chapter classifier).
     """
-    from src.detect.chapters import matches_ad_chapter # Import here to avoid circular dependency
-    return [c for c in chapters if not matches_ad_chapter(c['title'])]
+    from src.detect.chapters import get_chapter_classifier # Import here to avoid circular dependency
+    classifier = get_chapter_classifier(show_slug)
+    return [c for c in chapters if not classifier.is_ad(c['title'])]
 
 if __name__ == "__main__":
     # Example Usage
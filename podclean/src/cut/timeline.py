@@ -0,0 +1,75 @@
+from bisect import bisect_right
+from itertools import accumulate
+
+
+class Timeline:
+    """
+    Maps timestamps between the original audio and the cleaned (cut) audio.
+
+    Built once from the keep segments in O(m): prefix sums of the segment durations give each
+    segment's start in cleaned time, and every lookup is a binary search, O(log m).
+    Timestamps that fall inside a cut snap forward to the next kept sample.
+    """
+
+    def __init__(self, keep_segments: list):
+        segments = sorted((float(s), float(e)) for s, e in keep_segments if e > s)
+        self.starts = [s for s, _ in segments]
+        self.ends = [e for _, e in segments]
+        # offsets[i] = cleaned time at which keep segment i begins; offsets[-1] = cleaned duration
+        self.offsets = [0.0] + list(accumulate(e - s for s, e in segments))
+
+    @property
+    def cleaned_duration(self) -> float:
+        return self.offsets[-1]
+
+    def is_kept(self, t: float) -> bool:
+        i = bisect_right(self.starts, t) - 1
+        return i >= 0 and t < self.ends[i]
+
+    def to_cleaned(self, t: float) -> float:
+        """
+        Original time -> cleaned time. Inside a cut, returns the cleaned time of the next kept sample.
+        """
+        i = bisect_right(self.starts, t) - 1
+        if i < 0:
+            return 0.0
+        if t < self.ends[i]:
+            return self.offsets[i] + (t - self.starts[i])
+        return self.offsets[i + 1]
+
+    def to_original(self, t: float) -> float:
+        """
+        Cleaned time -> original time (clamped to the cleaned duration).
+        """
+        if not self.starts:
+            return 0.0
+        t = min(max(t, 0.0), self.cleaned_duration)
+        i = min(bisect_right(self.offsets, t) - 1, len(self.starts) - 1)
+        return self.starts[i] + (t - self.offsets[i])
+
+    def map_range(self, start: float, end: float):
+        """
+        Maps an original [start, end) range to cleaned time, or None if nothing of it was kept.
+        """
+        cleaned_start, cleaned_end = self.to_cleaned(start), self.to_cleaned(end)
+        if cleaned_end <= cleaned_start:
+            return None
+        return cleaned_start, cleaned_end
+
+
+def remap_timed_items(items: list, timeline: Timeline) -> list:
+    """
+    Remaps dicts with 'start'/'end' (chapters, transcript segments, marks) from original to
+    cleaned time. Items that were cut entirely are dropped; nested 'words' are remapped too.
+    """
+    remapped = []
+    for item in items:
+        mapped = timeline.map_range(item['start'], item['end'])
+        if mapped is None:
+            continue
+        new_item = item.copy()
+        new_item['start'], new_item['end'] = mapped
+        if item.get('words'):
+            new_item['words'] = remap_timed_items(item['words'], timeline)
+        remapped.append(new_item)
+    return remapped
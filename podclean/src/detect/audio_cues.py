@@ -0,0 +1,111 @@
+import logging
+import os
+import subprocess
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+# Decoded analysis audio: raw signed 16-bit little-endian mono, the same rate whisper.cpp uses
+PCM_SAMPLE_RATE = 16000
+PCM_DTYPE = np.dtype('<i2')
+FRAME_SECONDS = 0.05 # One RMS value per 50 ms
+BLOCK_FRAMES = 72000 # Frames per envelope block (~1 hour, ~115 MB of PCM), bounds peak memory
+
+
+def decode_pcm(audio_path: str, pcm_path: str) -> str | None:
+    """
+    Decodes audio to the raw mono PCM cache with ffmpeg. Returns the cache path, or None
+    if decoding is not possible. A cache that already exists is reused.
+    """
+    if os.path.exists(pcm_path):
+        return pcm_path
+    os.makedirs(os.path.dirname(pcm_path), exist_ok=True)
+    partial_path = f"{pcm_path}.part"
+    command = [
+        "ffmpeg", "-v", "error",
+        "-i", audio_path,
+        "-ac", "1", "-ar", str(PCM_SAMPLE_RATE),
+        "-f", "s16le", partial_path,
+        "-y",
+    ]
+    try:
+        subprocess.run(command, check=True, capture_output=True, text=True)
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        logger.warning(f"Could not decode {audio_path} to PCM: {e}")
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        return None
+    os.replace(partial_path, pcm_path)
+    return pcm_path
+
+
+def load_pcm(pcm_path: str) -> np.ndarray:
+    """
+    Memory-maps the PCM cache; pages are only read as the envelope walks over them.
+    """
+    if os.path.getsize(pcm_path) < PCM_DTYPE.itemsize:
+        return np.zeros(0, dtype=PCM_DTYPE)
+    return np.memmap(pcm_path, dtype=PCM_DTYPE, mode='r')
+
+
+def rms_envelope(samples: np.ndarray, sample_rate: int = PCM_SAMPLE_RATE, frame_seconds: float = FRAME_SECONDS) -> np.ndarray:
+    """
+    Short-time RMS energy in dBFS, one value per frame. Samples are processed in blocks of
+    whole frames viewed as a 2-D array, so a memory-mapped file is never loaded at once.
+    """
+    frame_len = max(1, int(round(sample_rate * frame_seconds)))
+    n_frames = len(samples) // frame_len
+    envelope = np.empty(n_frames, dtype=np.float32)
+    for first in range(0, n_frames, BLOCK_FRAMES):
+        last = min(n_frames, first + BLOCK_FRAMES)
+        block = np.asarray(samples[first * frame_len:last * frame_len], dtype=np.float32).reshape(-1, frame_len)
+        envelope[first:last] = np.sqrt(np.mean(np.square(block), axis=1))
+    # Full scale is 32768; the floor keeps digital silence finite
+    return 20 * np.log10(np.maximum(envelope / 32768.0, 1e-5))
+
+
+def snap_to_valleys(times, envelope: np.ndarray, frame_seconds: float, radius_seconds: float) -> np.ndarray:
+    """
+    Moves each time to the quietest frame within radius_seconds of it (the nearest one on
+    ties), returning the frame centres. Times beyond the envelope are left unchanged.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    radius = int(round(radius_seconds / frame_seconds))
+    if not len(times) or not len(envelope) or radius <= 0:
+        return times
+    idx = np.floor(times / frame_seconds).astype(np.int64)
+    inside = (idx >= 0) & (idx < len(envelope))
+    # Pad with +inf so windows at either end never pick a frame outside the audio
+    windows = sliding_window_view(np.pad(envelope.astype(np.float64), radius, constant_values=np.inf), 2 * radius + 1)
+    offsets = np.arange(-radius, radius + 1)
+    # A tiny distance penalty breaks ties in favour of the frame closest to the original edge
+    candidates = windows[np.clip(idx, 0, len(envelope) - 1)] + np.abs(offsets) * 1e-6
+    best = idx + offsets[np.argmin(candidates, axis=1)]
+    return np.where(inside, (best + 0.5) * frame_seconds, times)
+
+
+def refine_cut_boundaries(cuts: list, envelope: np.ndarray, radius_seconds: float, frame_seconds: float = FRAME_SECONDS) -> list:
+    """
+    Snaps both edges of every cut to the nearest low-energy valley, so cuts land in the pauses
+    around an ad read instead of relying on wide padding.
+    """
+    if not cuts or not len(envelope):
+        return cuts
+    starts = snap_to_valleys([c['start'] for c in cuts], envelope, frame_seconds, radius_seconds)
+    ends = snap_to_valleys([c['end'] for c in cuts], envelope, frame_seconds, radius_seconds)
+    refined = []
+    for cut, start, end in zip(cuts, starts.tolist(), ends.tolist()):
+        if end > start:
+            refined.append({**cut, 'start': round(start, 3), 'end': round(end, 3)})
+    return refined
+
+
+def boundary_envelope(audio_path: str, pcm_path: str) -> np.ndarray | None:
+    """
+    RMS envelope of an episode, decoding it to the PCM cache first if needed.
+    """
+    if not decode_pcm(audio_path, pcm_path):
+        return None
+    return rms_envelope(load_pcm(pcm_path))
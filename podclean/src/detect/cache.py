@@ -0,0 +1,85 @@
+import hashlib
+import json
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.config.config import AppConfig, ShowRules
+from src.store.models import DetectionCache
+
+logger = logging.getLogger(__name__)
+
+# Bump when detection code changes in a way that alters results for the same inputs
+DETECTOR_VERSION = 1
+
+
+def fingerprint(*parts) -> str:
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def transcript_fingerprint(app_cfg: AppConfig) -> str:
+    """
+    Everything the fast transcript depends on besides the audio. Rules changes leave it intact.
+    """
+    return fingerprint("transcript", app_cfg.FAST_MODEL, app_cfg.FAST_VAD, app_cfg.FAST_BEAM)
+
+
+def detector_fingerprint(app_cfg: AppConfig) -> str:
+    return fingerprint(DETECTOR_VERSION, app_cfg.detector.model_dump(), app_cfg.MIN_CONFIDENCE, transcript_fingerprint(app_cfg))
+
+
+def rules_fingerprint(show_rules: ShowRules, learned_rules: dict = None, chapters_json: str = None) -> str:
+    """
+    Version of the show's configured and learned rules (plus the episode's chapters, which
+    the same rules score).
+    """
+    learned_rules = learned_rules or {}
+    return fingerprint(show_rules.model_dump(), learned_rules.get('phrases', []), learned_rules.get('domains', []), chapters_json or "")
+
+
+class StageCache:
+    """
+    Detection results for one audio file, memoized per stage in the detection_cache table.
+
+    Without a session or content hash every lookup misses and nothing is stored.
+    """
+
+    def __init__(self, session: Session = None, content_hash: str = None):
+        self.session = session
+        self.content_hash = content_hash
+
+    @property
+    def enabled(self) -> bool:
+        return self.session is not None and bool(self.content_hash)
+
+    def _row(self, stage: str, detector_hash: str, rules_hash: str):
+        return self.session.execute(select(DetectionCache).where(
+            DetectionCache.content_hash == self.content_hash,
+            DetectionCache.stage == stage,
+            DetectionCache.detector_hash == detector_hash,
+            DetectionCache.rules_hash == rules_hash,
+        )).scalar_one_or_none()
+
+    def get(self, stage: str, detector_hash: str, rules_hash: str = ''):
+        if not self.enabled:
+            return None
+        row = self._row(stage, detector_hash, rules_hash)
+        if row is None:
+            return None
+        logger.info(f"Detection cache hit for stage '{stage}' ({self.content_hash[:10]}).")
+        return json.loads(row.result_json)
+
+    def put(self, stage: str, detector_hash: str, result, rules_hash: str = ''):
+        """
+        Stores a stage result and commits, so it survives a failure later in processing.
+        """
+        if not self.enabled:
+            return
+        row = self._row(stage, detector_hash, rules_hash)
+        if row is None:
+            row = DetectionCache(content_hash=self.content_hash, stage=stage, detector_hash=detector_hash, rules_hash=rules_hash)
+            self.session.add(row)
+        row.result_json = json.dumps(result)
+        self.session.commit()
+
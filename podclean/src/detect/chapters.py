@@ -1,5 +1,7 @@
 import json
 import os
+import re
+import threading
 
 def load_chapters_from_json(json_string: str):
     """
@@ -29,9 +31,111 @@ def load_chapters_from_file(file_path: str):
     with open(file_path, 'r') as f:
         return load_chapters_from_json(f.read())
 
-def matches_ad_chapter(chapter_title: str) -> bool:
+# Chapter-title terms that mark an ad, with how sure a match makes us. Matching is on whole
+# words of the normalized title, so "Headlines", "Road trip" and "Advice" never match "ad".
+AD_TERMS = {
+    "ad": 0.95, "ads": 0.95, "ad break": 0.98, "ad read": 0.98, "advert": 0.95, "adverts": 0.95,
+    "advertisement": 0.97, "advertisements": 0.97, "advertising": 0.9, "advertiser": 0.9, "advertisers": 0.9,
+    "commercial": 0.9, "commercials": 0.95, "commercial break": 0.98,
+    "sponsor": 0.95, "sponsors": 0.95, "sponsored": 0.95, "sponsorship": 0.95, "sponsor break": 0.98,
+    "a word from our sponsor": 0.99, "a word from our sponsors": 0.99, "message from our sponsor": 0.99,
+    "message from our sponsors": 0.99, "brought to you by": 0.95, "thanks to our sponsor": 0.98,
+    "thanks to our sponsors": 0.98, "paid promotion": 0.98, "promo": 0.85, "promos": 0.85, "promo code": 0.95,
+    "house ad": 0.98, "midroll": 0.95, "mid roll": 0.95, "preroll": 0.95, "pre roll": 0.95,
+    "postroll": 0.95, "post roll": 0.95, "partner": 0.5, "partners": 0.5, "break": 0.5, "promotion": 0.5,
+}
+# Phrases that contain an ad term without being an ad; matches inside them are ignored
+SAFE_TERMS = (
+    "ad hoc", "ad lib", "ad libs", "ad libbing", "ad infinitum", "ad nauseam", "ad astra",
+    "spring break", "lunch break", "break down", "breaking news", "jail break", "prison break",
+    "commercial real estate", "commercial aviation", "commercial space",
+)
+SHOW_TERM_CONFIDENCE = 0.9 # Terms added through ShowRules.chapter_ad_terms
+CHAPTER_AD_THRESHOLD = 0.7 # Scores at or above this count as an ad chapter
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize_title(title: str) -> str:
+    """
+    Lowercases a chapter title and reduces it to single-space separated word tokens.
+    """
+    return _NON_WORD.sub(" ", (title or "").lower().replace("-", "")).strip()
+
+
+def _compile_terms(terms) -> re.Pattern | None:
+    terms = sorted({normalize_title(t) for t in terms if normalize_title(t)}, key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile(r"\b(?:" + "|".join(re.escape(t) for t in terms) + r")\b")
+
+
+class ChapterClassifier:
+    """
+    Scores chapter titles for how likely they are to be ads (0.0 to 1.0) using one compiled,
+    word-boundary regex over the normalized title.
+    """
+
+    def __init__(self, extra_ad_terms=(), extra_safe_terms=(), threshold: float = CHAPTER_AD_THRESHOLD):
+        self.confidence = {normalize_title(t): c for t, c in AD_TERMS.items()}
+        for term in extra_ad_terms:
+            self.confidence[normalize_title(term)] = SHOW_TERM_CONFIDENCE
+        self.threshold = threshold
+        self._ad_pattern = _compile_terms(self.confidence.keys())
+        self._safe_pattern = _compile_terms(list(SAFE_TERMS) + list(extra_safe_terms))
+
+    def score(self, title: str) -> float:
+        normalized = normalize_title(title)
+        if not normalized or self._ad_pattern is None:
+            return 0.0
+        safe_spans = [m.span() for m in self._safe_pattern.finditer(normalized)] if self._safe_pattern else []
+        best = 0.0
+        pos = 0
+        while True:
+            match = self._ad_pattern.search(normalized, pos)
+            if match is None:
+                break
+            start, end = match.span()
+            if not any(s <= start and end <= e for s, e in safe_spans):
+                best = max(best, self.confidence.get(match.group(0), 0.0))
+            # Step one character so shorter overlapping terms ("ad" inside "ad break") are also seen
+            pos = start + 1
+        return best
+
+    def is_ad(self, title: str) -> bool:
+        return self.score(title) >= self.threshold
+
+
+_classifier_cache = {}
+_classifier_lock = threading.Lock()
+
+
+def get_chapter_classifier(show_slug: str = None) -> ChapterClassifier:
+    """
+    Returns the classifier for a show (default terms plus ShowRules overrides), compiled once
+    per show and rebuilt only when the configuration changes.
+    """
+    from src.config.config_loader import load_show_rules, get_config_version
+
+    rules = load_show_rules(show_slug)
+    key = (show_slug, get_config_version())
+    with _classifier_lock:
+        classifier = _classifier_cache.get(show_slug)
+        if classifier is None or classifier[0] != key:
+            classifier = (key, ChapterClassifier(rules.chapter_ad_terms, rules.chapter_safe_terms))
+            _classifier_cache[show_slug] = classifier
+        return classifier[1]
+
+
+def chapter_ad_confidence(chapter_title: str, show_slug: str = None) -> float:
+    """
+    Confidence (0.0 to 1.0) that a chapter title marks an ad segment.
+    """
+    return get_chapter_classifier(show_slug).score(chapter_title)
+
+
+def matches_ad_chapter(chapter_title: str, show_slug: str = None) -> bool:
     """
     Checks if a chapter title indicates an ad segment.
     """
-    ad_keywords = ["ad", "sponsor", "promo", "advertisement", "commercial"]
-    return any(keyword in chapter_title.lower() for keyword in ad_keywords)
+    return get_chapter_classifier(show_slug).is_ad(chapter_title)
@@ -1,8 +1,17 @@
-from src.detect.chapters import load_chapters_from_json, matches_ad_chapter
+import re
+
+from src.detect.chapters import load_chapters_from_json, get_chapter_classifier
 from src.transcribe.fast_whisper import fast_transcribe
-from src.detect.fast_text_rules import contains_phrases, has_url_or_price
 from src.config.config_loader import load_app_config, load_show_rules
 from src.config.config import AppConfig, ShowRules
+from src.cut.intervals import IntervalSet
+from src.detect.audio_cues import boundary_envelope, refine_cut_boundaries
+from src.store.paths import EpisodePaths
+from src.detect.cache import StageCache, detector_fingerprint, rules_fingerprint, transcript_fingerprint
+from src.jobs.governor import get_governor
+from src.store.metrics import span
+from src.detect.scoring import get_profile, build_tracks, fuse_tracks, segment_scores, compile_alternation, compile_patterns
+import numpy as np
 
 def confident_enough(cuts: list, cfg: AppConfig) -> bool:
     """
@@ -13,33 +22,53 @@ def confident_enough(cuts: list, cfg: AppConfig) -> bool:
         return False
     return all(cut.get('confidence', 0) >= min_confidence for cut in cuts)
 
+def _carry_over(cuts: list, merged: IntervalSet) -> list:
+    """
+    Turns merged intervals back into cut dicts, keeping the highest confidence and all the
+    signals of every cut that overlaps each one (cuts merged into it, or split or trimmed to it).
+    """
+    result = merged.to_dicts()
+    if not result:
+        return result
+    # Intervals first..last overlap a cut: those ending after its start and starting before its end
+    first = np.searchsorted(merged.ends, [c['start'] for c in cuts], side='right')
+    last = np.searchsorted(merged.starts, [c['end'] for c in cuts], side='left') - 1
+    for cut, lo, hi in zip(cuts, first.tolist(), last.tolist()):
+        if 'confidence' not in cut:
+            continue
+        signals = {s for s in (cut.get('signals') or [cut.get('type')]) if s}
+        for target in result[lo:hi + 1]:
+            target['confidence'] = max(target.get('confidence', 0.0), cut['confidence'])
+            target['signals'] = sorted(set(target.get('signals', [])) | signals)
+    return result
+
 def merge_and_pad(cuts: list, padding_seconds: float) -> list:
     """
     Merges overlapping cuts and applies padding.
     """
+    return _carry_over(cuts, IntervalSet.from_dicts(cuts).pad(padding_seconds))
+
+def filter_by_policy(cuts: list, policy: dict = None) -> list:
+    """
+    Applies the show's policy: bridges short gaps between cuts and drops cuts shorter than the
+    minimum ad length. Chapter-marked cuts are kept whatever their length.
+    """
     if not cuts:
         return []
+    policy = policy or get_profile("conservative")
+    bridged = _carry_over(cuts, IntervalSet.from_dicts(cuts).bridge_gaps(policy["bridge_gap_seconds"]))
+    return [c for c in bridged if c['end'] - c['start'] >= policy["min_ad_seconds"] or 'chapter' in c.get('signals', [])]
 
-    # Sort cuts by start time
-    sorted_cuts = sorted(cuts, key=lambda x: x['start'])
-    
-    merged = []
-    for cut in sorted_cuts:
-        start = max(0.0, cut['start'] - padding_seconds)
-        end = cut['end'] + padding_seconds
-
-        if not merged or start > merged[-1]['end']:
-            merged.append({'start': start, 'end': end})
-        else:
-            merged[-1]['end'] = max(merged[-1]['end'], end)
-    return merged
-
-def filter_by_policy(cuts: list) -> list:
+def apply_marks(cuts: list, marks: list) -> list:
     """
-    Applies policy rules to filter cuts (e.g., remove very short cuts).
-    For now, a placeholder.
+    Applies user marks to detected cuts: 'ad' spans are always cut, 'not_ad' spans never are.
     """
-    return cuts
+    ad_marks = [{'start': m.start, 'end': m.end, 'type': "mark", 'confidence': 1.0} for m in marks if m.label == 'ad']
+    not_ad = IntervalSet.from_pairs([(m.start, m.end) for m in marks if m.label == 'not_ad'])
+    if not ad_marks and not len(not_ad):
+        return cuts
+    combined = cuts + ad_marks
+    return _carry_over(combined, IntervalSet.from_dicts(combined).difference(not_ad))
 
 def in_time_priors(timestamp: float, episode_duration: float, priors: dict) -> bool:
     """
@@ -129,51 +158,108 @@ def slide(segments, size_s, step_s):
         if current_start >= all_words[-1]['end']:
             break
 
-def detect_ads_fast(audio_path, episode_meta, show_slug: str = None):
+def chapter_pass(episode_meta, show_slug: str = None):
+    """
+    Scores the episode's chapter titles. Returns (chapter cuts, chapter evidence for fusion,
+    whether any title was ambiguous).
+    """
+    cuts, evidence, ambiguous = [], [], False
+    if getattr(episode_meta, 'chapters_json', None):
+        classifier = get_chapter_classifier(show_slug)
+        for c in load_chapters_from_json(episode_meta.chapters_json):
+            confidence = classifier.score(c['title'])
+            if confidence > 0:
+                evidence.append({'start': c['start'], 'end': c['end'], 'confidence': confidence})
+            if confidence >= classifier.threshold:
+                cuts.append({'start': c['start'], 'end': c['end'], 'type': "chapter", 'confidence': confidence})
+            elif confidence > 0:
+                ambiguous = True # e.g. "Break": not cut on its own, the transcript decides
+    return cuts, evidence, ambiguous
+
+def chapters_suffice(cuts: list, ambiguous: bool, cfg: AppConfig) -> bool:
+    """
+    True when chapters alone mark the ads confidently enough to skip transcription.
+    """
+    return not ambiguous and confident_enough(cuts, cfg)
+
+def needs_fast_transcript(episode_meta, show_slug: str = None) -> bool:
+    cuts, _, ambiguous = chapter_pass(episode_meta, show_slug)
+    return not chapters_suffice(cuts, ambiguous, load_app_config())
+
+def detect_ads_fast(audio_path, episode_meta, show_slug: str = None, learned_rules: dict = None, cache: StageCache = None):
+    """
+    Detects ad segments. With a cache, the final cuts are reused while the audio, detector
+    settings and show rules are unchanged, and the fast transcript while the audio and
+    transcription settings are, so a rules change only re-runs the cheap scoring.
+    """
     # Load global app config
     app_cfg: AppConfig = load_app_config()
     # Load show-specific rules, merging with defaults
     show_rules: ShowRules = load_show_rules(show_slug)
+    learned_rules = learned_rules or {}
+    cache = cache or StageCache()
 
-    cuts = []
+    detector_hash = detector_fingerprint(app_cfg)
+    rules_hash = rules_fingerprint(show_rules, learned_rules, getattr(episode_meta, 'chapters_json', None))
+    cached = cache.get("cuts", detector_hash, rules_hash)
+    if cached is not None:
+        return cached["cuts"]
 
-    # 1) Chapters pass (Podcasting 2.0)
-    if hasattr(episode_meta, 'chapters_json') and episode_meta.chapters_json:
-        chap = load_chapters_from_json(episode_meta.chapters_json)
-        for c in chap:
-            if matches_ad_chapter(c['title']):
-                cuts.append({'start': c['start'], 'end': c['end'], 'type': "chapter", 'confidence': 0.99})
+    result, candidates = _detect(audio_path, episode_meta, show_slug, app_cfg, show_rules, learned_rules, cache)
+    cache.put("cuts", detector_hash, {"cuts": result, "candidates": candidates}, rules_hash)
+    return result
 
-    if confident_enough(cuts, app_cfg):
-        return merge_and_pad(cuts, app_cfg.detector.padding_seconds) # Access directly from Pydantic model
+def _detect(audio_path, episode_meta, show_slug, app_cfg: AppConfig, show_rules: ShowRules, learned_rules: dict, cache: StageCache):
+    """
+    Runs the detection stages; returns (final cuts, candidate cuts before boundary refinement).
+    """
+    # 1) Chapters pass (Podcasting 2.0 / ID3)
+    cuts, chapter_evidence, ambiguous_chapters = chapter_pass(episode_meta, show_slug)
+    if chapters_suffice(cuts, ambiguous_chapters, app_cfg):
+        return merge_and_pad(cuts, app_cfg.detector.padding_seconds), cuts # Access directly from Pydantic model
 
     # 2) Transcript rules (small model, VAD, word timestamps)
     # Use model and VAD settings from app_cfg or env.template
     fast_model = app_cfg.FAST_MODEL # Access directly from Pydantic model
     fast_vad = app_cfg.FAST_VAD # Access directly from Pydantic model
 
-    tr = fast_transcribe(audio_path, model_size=fast_model, vad=fast_vad, word_timestamps=True)
+    transcript_hash = transcript_fingerprint(app_cfg)
+    tr = cache.get("transcript", transcript_hash)
+    if tr is None:
+        with get_governor().slot('fast_transcribe', fast_model) as footprint, \
+                span('fast_transcribe', episode_meta, audio_seconds=getattr(episode_meta, 'original_duration', None)):
+            tr = fast_transcribe(audio_path, model_size=fast_model, vad=fast_vad, word_timestamps=True, threads=footprint.threads)
+        cache.put("transcript", transcript_hash, tr)
 
-    # Combine show-specific rules with default rules
-    all_phrases = show_rules.phrases # Access directly from Pydantic model
-    all_url_patterns = show_rules.url_patterns # Access directly from Pydantic model
-    all_price_patterns = show_rules.price_patterns # Access directly from Pydantic model
+    # Phrases and sponsor domains mined from user marks extend the configured rules
+    phrases = show_rules.phrases + learned_rules.get('phrases', [])
+    url_patterns = show_rules.url_patterns + [re.escape(d) for d in learned_rules.get('domains', [])]
 
-    require_signals = app_cfg.detector.require_signals # Access directly from Pydantic model
+    # 3) Fuse every signal into per-second score tracks, weighted by the show's aggressiveness
+    # (chapter evidence, including ambiguous titles, is one of the tracks)
+    profile = get_profile(show_rules.aggressiveness)
+    tracks = build_tracks(
+        episode_meta.original_duration,
+        profile,
+        chapters=chapter_evidence,
+        segments=tr,
+        phrase_pattern=compile_alternation(phrases),
+        url_price_pattern=compile_patterns(url_patterns + show_rules.price_patterns),
+        priors=show_rules.time_priors or app_cfg.detector.priors,
+    )
+    score = fuse_tracks(tracks, profile["weights"])
+    cuts = segment_scores(score, tracks, profile["threshold"])
 
-    for win in slide(tr, size_s=20, step_s=5):
-        score = 0
-        if contains_phrases(win['text'], all_phrases): score += 1
-        if has_url_or_price(win['text'], all_url_patterns, all_price_patterns): score += 1
-        if in_time_priors(win['start'], episode_meta.original_duration, app_cfg.detector.priors): score += 1
-        
-        if score >= require_signals:
-            cuts.append({'start': win['start'], 'end': win['end'], 'type': "text", 'confidence': 0.7})
+    # (optional v2) audio cues / jingle match: pass matches to build_tracks as jingle_matches
+    cuts = candidates = filter_by_policy(cuts, profile)
+    padding = app_cfg.detector.padding_seconds
 
-    # 3) (optional v2) audio cues / jingle match if still low recall
-    # if app_cfg.detector.use_audio_cues and need_more_evidence(cuts):
-    #     for m in match_jingles(audio_path, show_rules.jingles):
-    #         cuts.append(range(m.start, m.end, "audio", conf=0.6))
+    # 4) Snap cut edges to the quietest point nearby; tight edges need only a small safety pad
+    if cuts and app_cfg.detector.refine_boundaries:
+        with get_governor().slot('decode'), span('pcm_decode', episode_meta):
+            envelope = boundary_envelope(audio_path, EpisodePaths.for_episode(episode_meta).pcm)
+        if envelope is not None:
+            cuts = refine_cut_boundaries(cuts, envelope, profile["silence_snap_seconds"])
+            padding = app_cfg.detector.refined_padding_seconds
 
-    # TODO: Implement merge_and_pad and filter_by_policy
-    return merge_and_pad(filter_by_policy(cuts), app_cfg.detector.padding_seconds)
\ No newline at end of file
+    return merge_and_pad(cuts, padding), candidates
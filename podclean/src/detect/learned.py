@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import re
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.config.config_loader import load_app_config
+from src.cut.plan import build_keep_segments
+from src.cut.timeline import Timeline
+from src.detect.cache import StageCache, transcript_fingerprint
+from src.store.models import AdMark, Episode, LearnedRules
+from src.store.transcripts import iter_transcript_segments
+
+logger = logging.getLogger(__name__)
+
+MARK_LABELS = ('ad', 'not_ad')
+MARK_TIMEBASES = ('cleaned', 'original')
+
+# A candidate must turn up under this many different ad marks before it becomes a rule
+MIN_SUPPORT = 2
+PHRASE_WORDS = (3, 4, 5)
+MAX_LEARNED_PHRASES = 30
+MAX_LEARNED_DOMAINS = 30
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from have i if in is it its of on or so that the this "
+    "to was we were what with you your our us they them he she um uh like just yeah".split()
+)
+# Spoken domains ("acme dot com") are normalized to written form before matching
+SPOKEN_DOT_RE = re.compile(r"\s+dot\s+", re.IGNORECASE)
+DOMAIN_RE = re.compile(r"\b((?:[a-z0-9-]+\.)+(?:com|net|org|io|co|fm|ly|app|tv|us))\b")
+WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def mark_to_original(episode: Episode, start: float, end: float, timebase: str = 'cleaned'):
+    """
+    Converts a mark to original-audio time. Marks made while listening to the cleaned episode
+    are mapped back through the episode's current cuts.
+    """
+    if timebase == 'original' or not episode.cleaned_file_path or not episode.ad_segments_json or not episode.original_duration:
+        return start, end
+    timeline = Timeline(build_keep_segments(episode.original_duration, json.loads(episode.ad_segments_json)))
+    return timeline.to_original(start), timeline.to_original(end)
+
+
+def record_mark(session: Session, episode: Episode, start: float, end: float, label: str, timebase: str = 'cleaned') -> AdMark:
+    """
+    Stores a user mark in original-audio time. Does not commit.
+    """
+    original_start, original_end = mark_to_original(episode, start, end, timebase)
+    mark = AdMark(episode_id=episode.id, show_name=episode.show_name, start=original_start, end=original_end, label=label)
+    session.add(mark)
+    return mark
+
+
+def episode_marks(session: Session, episode_id: int) -> list:
+    return session.execute(select(AdMark).where(AdMark.episode_id == episode_id).order_by(AdMark.id)).scalars().all()
+
+
+def _original_time_segments(session: Session, episode: Episode) -> list:
+    """
+    Transcript segments of an episode in original-audio time: the fast transcript from the
+    detection cache when there is one, otherwise the full transcript of the cleaned audio
+    mapped back through the cuts.
+    """
+    segments = StageCache(session, episode.content_hash).get("transcript", transcript_fingerprint(load_app_config()))
+    if isinstance(segments, list) and segments:
+        return segments
+    if episode.transcript_file_path and os.path.exists(episode.transcript_file_path):
+        keep = build_keep_segments(episode.original_duration or 0, json.loads(episode.ad_segments_json or '[]'))
+        timeline = Timeline(keep)
+        return [{**s, 'start': timeline.to_original(s['start']), 'end': timeline.to_original(s['end'])}
+                for s in iter_transcript_segments(episode.transcript_file_path)]
+    return []
+
+
+def text_under(segments: list, start: float, end: float) -> str:
+    return " ".join(s.get('text', '').strip() for s in segments if s['end'] > start and s['start'] < end)
+
+
+def _ngrams(words: list, sizes=PHRASE_WORDS):
+    for n in sizes:
+        for i in range(len(words) - n + 1):
+            gram = words[i:i + n]
+            # Grams that start or end on a filler word are never useful rules
+            if gram[0] in STOPWORDS or gram[-1] in STOPWORDS:
+                continue
+            yield " ".join(gram)
+
+
+def extract_candidates(ad_texts: list, not_ad_texts: list = ()) -> tuple:
+    """
+    Mines (phrases, domains) that recur under several ad marks and never appear under a
+    not_ad mark. Support counts each mark once, however often a phrase repeats inside it.
+    """
+    phrase_support, domain_support = Counter(), Counter()
+    for text in ad_texts:
+        text = SPOKEN_DOT_RE.sub(".", text.lower())
+        domain_support.update(set(DOMAIN_RE.findall(text)))
+        phrase_support.update(set(_ngrams(WORD_RE.findall(DOMAIN_RE.sub(" ", text)))))
+
+    negative = " ".join(SPOKEN_DOT_RE.sub(".", t.lower()) for t in not_ad_texts)
+    negative_words = " " + " ".join(WORD_RE.findall(negative)) + " "
+
+    domains = [d for d, n in domain_support.most_common() if n >= MIN_SUPPORT and d not in negative][:MAX_LEARNED_DOMAINS]
+    phrases = [p for p, n in phrase_support.items() if n >= MIN_SUPPORT and f" {p} " not in negative_words]
+    # Keep the longest form of overlapping phrases with the same support
+    phrases.sort(key=lambda p: (-phrase_support[p], -len(p)))
+    kept = []
+    for phrase in phrases:
+        if not any(phrase in longer and phrase_support[longer] == phrase_support[phrase] for longer in kept):
+            kept.append(phrase)
+    return kept[:MAX_LEARNED_PHRASES], domains
+
+
+def mine_show_marks(session: Session, show_name: str) -> LearnedRules:
+    """
+    Rebuilds the learned rules of one show from all its marks. Does not commit.
+    """
+    marks = session.execute(select(AdMark).where(AdMark.show_name == show_name)).scalars().all()
+    episodes = {e.id: e for e in session.execute(select(Episode).where(Episode.id.in_({m.episode_id for m in marks}))).scalars()}
+    segments_by_episode = {}
+    texts = {'ad': [], 'not_ad': []}
+    for mark in marks:
+        episode = episodes.get(mark.episode_id)
+        if episode is None:
+            continue
+        if episode.id not in segments_by_episode:
+            segments_by_episode[episode.id] = _original_time_segments(session, episode)
+        text = text_under(segments_by_episode[episode.id], mark.start, mark.end)
+        if text:
+            texts.setdefault(mark.label, []).append(text)
+
+    phrases, domains = extract_candidates(texts['ad'], texts['not_ad'])
+    rules = session.execute(select(LearnedRules).where(LearnedRules.show_name == show_name)).scalar_one_or_none()
+    if rules is None:
+        rules = LearnedRules(show_name=show_name, version=0)
+        session.add(rules)
+    phrases_json, domains_json = json.dumps(phrases), json.dumps(domains)
+    if (rules.phrases_json, rules.domains_json) != (phrases_json, domains_json):
+        rules.phrases_json, rules.domains_json = phrases_json, domains_json
+        rules.version = (rules.version or 0) + 1
+    rules.marks_used = len(texts['ad']) + len(texts['not_ad'])
+    now = datetime.now()
+    rules.updated_at = now
+    for mark in marks:
+        mark.mined_at = now
+    return rules
+
+
+def mine_marks(session: Session) -> dict:
+    """
+    Re-mines every show that has marks the job has not seen yet. Returns {show: rules version}.
+    """
+    shows = session.execute(select(AdMark.show_name).where(AdMark.mined_at.is_(None)).distinct()).scalars().all()
+    versions = {}
+    for show_name in shows:
+        rules = mine_show_marks(session, show_name)
+        session.commit()
+        versions[show_name] = rules.version
+        logger.info(f"Learned {len(json.loads(rules.phrases_json))} phrases and {len(json.loads(rules.domains_json))} domains for '{show_name}' from {rules.marks_used} marks.")
+    return versions
+
+
+def get_learned_rules(session: Session, show_name: str) -> dict:
+    """
+    The learned rules detection merges into the show's configured rules.
+    """
+    rules = session.execute(select(LearnedRules).where(LearnedRules.show_name == show_name)).scalar_one_or_none()
+    if rules is None:
+        return {'phrases': [], 'domains': [], 'version': 0}
+    return {'phrases': json.loads(rules.phrases_json), 'domains': json.loads(rules.domains_json), 'version': rules.version}
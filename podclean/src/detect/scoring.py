@@ -0,0 +1,160 @@
+import math
+import re
+
+import numpy as np
+
+from src.cut.intervals import IntervalSet
+
+# Every signal becomes a per-second track with values in [0, 1]
+SIGNALS = ("chapter", "phrase", "url_price", "time_prior", "jingle")
+
+# Per-show weighting and segmentation policy, selected by ShowRules.aggressiveness.
+# Tracks are combined as a noisy-OR (1 - prod(1 - weight * track)), so a weight is the
+# confidence that signal alone gives and independent signals reinforce each other.
+AGGRESSIVENESS_PROFILES = {
+    "conservative": {
+        "weights": {"chapter": 1.0, "phrase": 0.5, "url_price": 0.45, "time_prior": 0.2, "jingle": 0.6},
+        "threshold": 0.7,
+        "spread_seconds": 15, # How far a text hit spreads around itself (ad reads run on past the trigger phrase)
+        "min_ad_seconds": 15,
+        "bridge_gap_seconds": 10,
+        "silence_snap_seconds": 3,
+    },
+    "balanced": {
+        "weights": {"chapter": 1.0, "phrase": 0.55, "url_price": 0.5, "time_prior": 0.25, "jingle": 0.65},
+        "threshold": 0.6,
+        "spread_seconds": 20,
+        "min_ad_seconds": 10,
+        "bridge_gap_seconds": 15,
+        "silence_snap_seconds": 4,
+    },
+    "aggressive": {
+        "weights": {"chapter": 1.0, "phrase": 0.6, "url_price": 0.55, "time_prior": 0.3, "jingle": 0.7},
+        "threshold": 0.5,
+        "spread_seconds": 25,
+        "min_ad_seconds": 8,
+        "bridge_gap_seconds": 20,
+        "silence_snap_seconds": 5,
+    },
+}
+
+
+def get_profile(aggressiveness: str) -> dict:
+    return AGGRESSIVENESS_PROFILES.get((aggressiveness or "").lower(), AGGRESSIVENESS_PROFILES["conservative"])
+
+
+def interval_track(n_seconds: int, intervals: IntervalSet, value: float = 1.0) -> np.ndarray:
+    """
+    Paints an interval set onto a per-second track (a second counts if any part of it is covered).
+    """
+    track = np.zeros(n_seconds, dtype=np.float32)
+    if not len(intervals) or not n_seconds:
+        return track
+    starts = np.clip(np.floor(intervals.starts).astype(np.int64), 0, n_seconds)
+    ends = np.clip(np.ceil(intervals.ends).astype(np.int64), 0, n_seconds)
+    delta = np.zeros(n_seconds + 1, dtype=np.int32)
+    np.add.at(delta, starts, 1)
+    np.add.at(delta, ends, -1)
+    track[np.cumsum(delta[:-1]) > 0] = value
+    return track
+
+
+def scored_interval_track(n_seconds: int, items: list) -> np.ndarray:
+    """
+    Track holding, for each second, the highest 'confidence' of the items covering it.
+    """
+    track = np.zeros(n_seconds, dtype=np.float32)
+    for item in items:
+        start = max(0, int(math.floor(item['start'])))
+        end = min(n_seconds, int(math.ceil(item['end'])))
+        if end > start:
+            track[start:end] = np.maximum(track[start:end], item['confidence'])
+    return track
+
+
+def time_prior_track(n_seconds: int, duration: float, priors: dict) -> np.ndarray:
+    """
+    Vectorized pre-roll / mid-roll / post-roll prior (same rules as fusion.in_time_priors).
+    """
+    t = np.arange(n_seconds, dtype=np.float64)
+    if not priors or not duration:
+        return np.zeros(n_seconds, dtype=np.float32)
+    mask = t <= priors.get('pre_roll_max_s', 0)
+    if priors.get('post_roll_last_s'):
+        mask |= t >= duration - priors['post_roll_last_s']
+    mid_roll_pct = priors.get('mid_roll_pct')
+    if mid_roll_pct and len(mid_roll_pct) == 2:
+        mask |= (t >= duration * mid_roll_pct[0]) & (t <= duration * mid_roll_pct[1])
+    return mask.astype(np.float32)
+
+
+def compile_alternation(phrases: list) -> re.Pattern | None:
+    phrases = [p for p in phrases if p]
+    if not phrases:
+        return None
+    return re.compile("|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True)), re.IGNORECASE)
+
+
+def compile_patterns(patterns: list) -> re.Pattern | None:
+    patterns = [p for p in patterns if p]
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+
+
+def text_hits(segments: list, pattern: re.Pattern | None) -> IntervalSet:
+    """
+    Time ranges of the transcript segments whose text matches the pattern.
+    """
+    if pattern is None:
+        return IntervalSet()
+    hits = [(s['start'], s['end']) for s in segments if pattern.search(s.get('text', ''))]
+    return IntervalSet.from_pairs(hits)
+
+
+def build_tracks(duration: float, profile: dict, chapters: list = (), segments: list = (),
+                 phrase_pattern=None, url_price_pattern=None, priors: dict = None,
+                 jingle_matches: IntervalSet = None) -> dict:
+    """
+    Turns every available signal into a per-second track of the same length.
+    """
+    n_seconds = int(math.ceil(duration))
+    spread = profile["spread_seconds"]
+    return {
+        "chapter": scored_interval_track(n_seconds, list(chapters)),
+        "phrase": interval_track(n_seconds, text_hits(segments, phrase_pattern).pad(spread, lo=0)),
+        "url_price": interval_track(n_seconds, text_hits(segments, url_price_pattern).pad(spread, lo=0)),
+        "time_prior": time_prior_track(n_seconds, duration, priors or {}),
+        "jingle": interval_track(n_seconds, jingle_matches if jingle_matches is not None else IntervalSet()),
+    }
+
+
+def fuse_tracks(tracks: dict, weights: dict) -> np.ndarray:
+    """
+    Noisy-OR combination of the weighted tracks: the per-second confidence that it is an ad.
+    """
+    miss = None
+    for name, track in tracks.items():
+        term = 1.0 - weights.get(name, 0.0) * track
+        miss = term if miss is None else miss * term
+    return 1.0 - miss if miss is not None else np.zeros(0, dtype=np.float32)
+
+
+def segment_scores(score: np.ndarray, tracks: dict, threshold: float) -> list:
+    """
+    Thresholds the fused track and returns one cut per run of seconds above it, with the run's
+    peak confidence and the signals that contributed.
+    """
+    above = score >= threshold
+    if not above.any():
+        return []
+    edges = np.diff(np.concatenate([[0], above.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    peaks = np.maximum.reduceat(score, starts)
+    cuts = []
+    for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        signals = [name for name, track in tracks.items() if track[start:end].any()]
+        cuts.append({'start': float(start), 'end': float(end), 'type': "fused", 'confidence': round(float(peaks[i]), 3), 'signals': signals})
+    return cuts
+
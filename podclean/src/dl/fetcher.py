@@ -1,12 +1,35 @@
 import requests
+import hashlib
 import os
 from urllib.parse import urlparse
 
+CONTENT_HASH_ALGORITHM = "sha256"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def hash_file(path: str) -> str:
+    """
+    Content hash of a file already on disk (same algorithm as the streaming download).
+    """
+    hasher = hashlib.new(CONTENT_HASH_ALGORITHM)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
 def download_file(url: str, destination_folder: str, filename: str = None):
     """
     Downloads a file from a URL to a specified destination folder.
     If filename is not provided, it extracts it from the URL.
     """
+    destination_path, _ = download_file_with_hash(url, destination_folder, filename)
+    return destination_path
+
+def download_file_with_hash(url: str, destination_folder: str, filename: str = None):
+    """
+    Like download_file, but hashes the content while streaming it to disk and returns
+    (path, content_hash), or (None, None) on failure. The file only appears at its final
+    path once it is complete.
+    """
     if not os.path.exists(destination_folder):
         os.makedirs(destination_folder)
 
@@ -17,18 +40,30 @@ def download_file(url: str, destination_folder: str, filename: str = None):
             filename = "downloaded_file"
 
     destination_path = os.path.join(destination_folder, filename)
+    tmp_path = f"{destination_path}.part"
+    hasher = hashlib.new(CONTENT_HASH_ALGORITHM)
 
     try:
         with requests.get(url, stream=True) as r:
             r.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-            with open(destination_path, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
+            written = 0
+            with open(tmp_path, 'wb') as f:
+                for chunk in r.iter_content(chunk_size=65536):
+                    hasher.update(chunk)
                     f.write(chunk)
+                    written += len(chunk)
+            # A connection dropped mid-body can end the stream early without an error
+            content_length = r.headers.get('Content-Length')
+            if content_length and 'Content-Encoding' not in r.headers and written != int(content_length):
+                raise requests.exceptions.ContentDecodingError(f"received {written} of {content_length} bytes")
+        os.replace(tmp_path, destination_path)
         print(f"Successfully downloaded {url} to {destination_path}")
-        return destination_path
-    except requests.exceptions.RequestException as e:
+        return destination_path, hasher.hexdigest()
+    except (requests.exceptions.RequestException, OSError) as e:
         print(f"Error downloading {url}: {e}")
-        return None
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None, None
 
 if __name__ == "__main__":
     # Example usage (for testing purposes)
@@ -1,38 +1,275 @@
 import subprocess
 import json
+import logging
 import os
+import struct
+from functools import lru_cache
 
-def get_audio_duration(file_path: str) -> float | None:
+logger = logging.getLogger(__name__)
+
+# MPEG audio frame header tables (index by version/layer bits of the frame header)
+MPEG_VERSIONS = {0: 2.5, 2: 2, 3: 1} # 1 is reserved
+MPEG_LAYERS = {1: 3, 2: 2, 3: 1} # 0 is reserved
+SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+BITRATES_KBPS = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+SYNC_SEARCH_BYTES = 64 * 1024
+# A Xing/VBRI byte count this much larger than what is on disk means the download was cut short
+TRUNCATION_TOLERANCE = 0.98
+
+
+def _id3v2_size(header: bytes) -> int:
     """
-    Gets the duration of an audio file using ffprobe.
+    Total size of a leading ID3v2 tag (0 if there is none).
+    """
+    if len(header) < 10 or header[:3] != b"ID3":
+        return 0
+    size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+    footer = 10 if header[5] & 0x10 else 0
+    return 10 + size + footer
 
-    Args:
-        file_path: Path to the audio file.
 
-    Returns:
-        Duration in seconds as a float, or None if an error occurs.
+def _parse_frame_header(data: bytes, offset: int):
+    if offset + 4 > len(data):
+        return None
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    if data[offset] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version = MPEG_VERSIONS.get((b1 >> 3) & 0x03)
+    layer = MPEG_LAYERS.get((b1 >> 1) & 0x03)
+    bitrate_index = (b2 >> 4) & 0x0F
+    sample_rate_index = (b2 >> 2) & 0x03
+    if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    bitrates = BITRATES_KBPS[(1 if version == 1 else 2, layer)]
+    sample_rate = SAMPLE_RATES[version][sample_rate_index]
+    if layer == 1:
+        samples_per_frame = 384
+    elif layer == 3 and version != 1:
+        samples_per_frame = 576
+    else:
+        samples_per_frame = 1152
+    bit_rate = bitrates[bitrate_index] * 1000
+    padding = (b2 >> 1) & 0x01
+    if layer == 1:
+        frame_length = (12 * bit_rate // sample_rate + padding) * 4
+    else:
+        frame_length = (samples_per_frame // 8) * bit_rate // sample_rate + padding
+    return {
+        "version": version,
+        "layer": layer,
+        "frame_length": frame_length,
+        "bit_rate": bit_rate,
+        "sample_rate": sample_rate,
+        "channels": 1 if (b3 >> 6) == 3 else 2,
+        "samples_per_frame": samples_per_frame,
+    }
+
+
+def read_mp3_info(file_path: str) -> dict | None:
     """
-    if not os.path.exists(file_path):
-        print(f"Error: File not found at {file_path}")
+    Reads stream parameters and duration straight from the MP3 headers, without a subprocess.
+    Uses the Xing/Info or VBRI header when present (exact for VBR files) and falls back to the
+    constant-bitrate estimate from the first frame otherwise. Returns None for non-MP3 data.
+    """
+    try:
+        file_size = os.path.getsize(file_path)
+        with open(file_path, "rb") as f:
+            audio_start = _id3v2_size(f.read(10))
+            f.seek(audio_start)
+            data = f.read(SYNC_SEARCH_BYTES)
+            has_id3v1 = False
+            if file_size >= 128:
+                f.seek(file_size - 128)
+                has_id3v1 = f.read(3) == b"TAG"
+    except OSError:
+        return None
+
+    # Find the first frame whose successor also looks like a frame header, to skip false syncs
+    frame, offset = None, 0
+    while offset < len(data) - 4:
+        offset = data.find(b"\xFF", offset)
+        if offset < 0:
+            break
+        frame = _parse_frame_header(data, offset)
+        next_offset = offset + frame["frame_length"] if frame else 0
+        if frame and (next_offset + 4 > len(data) or _parse_frame_header(data, next_offset)):
+            break
+        frame = None
+        offset += 1
+    if not frame:
         return None
 
+    audio_bytes = file_size - audio_start - offset - (128 if has_id3v1 else 0)
+    info = {
+        "codec": "mp3",
+        "sample_rate": frame["sample_rate"],
+        "channels": frame["channels"],
+        "bit_rate": frame["bit_rate"],
+        "audio_bytes": audio_bytes,
+        "vbr_header": None,
+        "expected_audio_bytes": None,
+    }
+
+    # Xing/Info header sits after the side information of the first frame
+    if frame["version"] == 1:
+        side_info = 17 if frame["channels"] == 1 else 32
+    else:
+        side_info = 9 if frame["channels"] == 1 else 17
+    frames = None
+    xing = offset + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info") and len(data) >= xing + 16:
+        flags = struct.unpack(">I", data[xing + 4:xing + 8])[0]
+        pos = xing + 8
+        if flags & 0x1:
+            frames = struct.unpack(">I", data[pos:pos + 4])[0]
+            pos += 4
+        if flags & 0x2:
+            info["expected_audio_bytes"] = struct.unpack(">I", data[pos:pos + 4])[0]
+        info["vbr_header"] = "xing" if data[xing:xing + 4] == b"Xing" else "info"
+    elif data[offset + 36:offset + 40] == b"VBRI" and len(data) >= offset + 54:
+        vbri = offset + 36
+        info["expected_audio_bytes"], frames = struct.unpack(">II", data[vbri + 10:vbri + 18])
+        info["vbr_header"] = "vbri"
+
+    if frames:
+        info["duration"] = frames * frame["samples_per_frame"] / frame["sample_rate"]
+        info["bit_rate"] = int(audio_bytes * 8 / info["duration"]) if info["duration"] else frame["bit_rate"]
+    else:
+        info["duration"] = audio_bytes * 8 / frame["bit_rate"]
+    return info
+
+
+def run_ffprobe(file_path: str) -> dict | None:
+    """
+    One ffprobe call for format, stream and chapter metadata. Returns the parsed JSON or None.
+    """
     command = [
         "ffprobe",
         "-v", "error",
-        "-show_entries", "format=duration",
+        "-show_format",
+        "-show_streams",
+        "-show_chapters",
         "-of", "json",
         file_path
     ]
-
     try:
         result = subprocess.run(command, check=True, capture_output=True, text=True)
-        data = json.loads(result.stdout)
-        duration = float(data['format']['duration'])
-        return duration
-    except (subprocess.CalledProcessError, FileNotFoundError, json.JSONDecodeError, KeyError) as e:
-        print(f"Error getting audio duration for {file_path}: {e}")
+        return json.loads(result.stdout)
+    except (subprocess.CalledProcessError, FileNotFoundError, json.JSONDecodeError) as e:
+        logger.error(f"Error probing {file_path}: {e}")
+        return None
+
+
+def _summarize_ffprobe(data: dict) -> dict:
+    fmt = data.get("format", {})
+    stream = next((s for s in data.get("streams", []) if s.get("codec_type") == "audio"), {})
+
+    def _float(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    return {
+        "format_name": fmt.get("format_name"),
+        "codec": stream.get("codec_name"),
+        "sample_rate": int(stream["sample_rate"]) if stream.get("sample_rate") else None,
+        "channels": stream.get("channels"),
+        "bit_rate": int(stream.get("bit_rate") or fmt.get("bit_rate") or 0) or None,
+        "duration": _float(stream.get("duration")) or _float(fmt.get("duration")),
+        "tags": fmt.get("tags", {}),
+        "chapters": [
+            {"start": _float(c.get("start_time")), "end": _float(c.get("end_time")), "title": c.get("tags", {}).get("title")}
+            for c in data.get("chapters", [])
+        ],
+    }
+
+
+class _ProbeFailed(Exception):
+    pass
+
+
+@lru_cache(maxsize=256)
+def _probe_cached(file_path: str, size: int, mtime_ns: int) -> dict:
+    # Failures raise instead of returning None, so lru_cache does not keep them
+    native = read_mp3_info(file_path)
+    if native:
+        # MP3 chapters come from the ID3 CHAP frames (src/ingest/chapters.py), so the
+        # headers alone cover everything; the Xing/VBRI frame count is exact for VBR files
+        probe = {k: native[k] for k in ("codec", "sample_rate", "channels", "bit_rate", "duration")}
+        probe.update(format_name="mp3", tags={}, chapters=[], source="native",
+                     mp3={k: native[k] for k in ("vbr_header", "audio_bytes", "expected_audio_bytes")})
+    else:
+        ffprobe_data = run_ffprobe(file_path)
+        if ffprobe_data is None:
+            raise _ProbeFailed(file_path)
+        probe = _summarize_ffprobe(ffprobe_data)
+        probe["source"] = "ffprobe"
+    probe["file_size"] = size
+    return probe
+
+
+def probe_audio(file_path: str) -> dict | None:
+    """
+    Probes an audio file once: codec, sample rate, channels, bit rate, duration, tags and
+    chapters. MP3s are read from their headers; only other formats spawn ffprobe.
+    Successful results are cached per (path, size, mtime), so repeated calls are free.
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        logger.error(f"File not found at {file_path}")
+        return None
+    try:
+        return _probe_cached(file_path, st.st_size, st.st_mtime_ns)
+    except _ProbeFailed:
         return None
 
+
+def check_audio_complete(file_path: str, probe: dict | None = None, expected_size: int | None = None) -> tuple[bool, str | None]:
+    """
+    Checks that a downloaded file is whole before it enters the processing queue.
+    Returns (ok, reason).
+    """
+    if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+        return False, "file is missing or empty"
+    probe = probe or probe_audio(file_path)
+    if not probe or not probe.get("duration"):
+        return False, "no decodable audio stream"
+
+    mp3 = probe.get("mp3") or {}
+    if mp3.get("expected_audio_bytes") and mp3["audio_bytes"] < mp3["expected_audio_bytes"] * TRUNCATION_TOLERANCE:
+        return False, f"truncated: {mp3['audio_bytes']} of {mp3['expected_audio_bytes']} audio bytes"
+    # Enclosure lengths in feeds are often stale or wrong, so only a large shortfall counts
+    if expected_size and expected_size > 0 and probe["file_size"] < expected_size * 0.5:
+        return False, f"truncated: {probe['file_size']} of {expected_size} bytes announced by the feed"
+    return True, None
+
+
+def get_audio_duration(file_path: str) -> float | None:
+    """
+    Gets the duration of an audio file, from the MP3 headers when possible and ffprobe otherwise.
+
+    Args:
+        file_path: Path to the audio file.
+
+    Returns:
+        Duration in seconds as a float, or None if an error occurs.
+    """
+    probe = probe_audio(file_path)
+    return probe.get("duration") if probe else None
+
 if __name__ == "__main__":
     # Example usage (requires a dummy audio file and ffprobe installed)
     # Create a dummy mp3 for testing:
@@ -0,0 +1,180 @@
+import json
+import os
+import logging
+import struct
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+CHAPTERS_FETCH_TIMEOUT = 15
+# ID3 tags sit at the very start of the file; chapters never need more than the tag itself
+MAX_ID3_TAG_BYTES = 16 * 1024 * 1024
+NO_OFFSET = 0xFFFFFFFF
+
+TEXT_ENCODINGS = {0: 'latin-1', 1: 'utf-16', 2: 'utf-16-be', 3: 'utf-8'}
+
+
+def _syncsafe(data: bytes) -> int:
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _decode_text(data: bytes) -> str:
+    if not data:
+        return ""
+    encoding = TEXT_ENCODINGS.get(data[0], 'latin-1')
+    return data[1:].decode(encoding, errors='replace').rstrip('\x00').strip()
+
+
+def _iter_frames(data: bytes, major_version: int):
+    """
+    Yields (frame_id, body) for each frame in a block of ID3v2.3/2.4 frames.
+    """
+    pos = 0
+    while pos + 10 <= len(data):
+        frame_id = data[pos:pos + 4]
+        if not frame_id.strip(b'\x00') or not frame_id.isalnum():
+            break # Reached padding
+        size = _syncsafe(data[pos + 4:pos + 8]) if major_version == 4 else struct.unpack('>I', data[pos + 4:pos + 8])[0]
+        yield frame_id.decode('latin-1'), data[pos + 10:pos + 10 + size]
+        pos += 10 + size
+
+
+def _parse_chap(body: bytes, major_version: int) -> dict:
+    element_end = body.index(b'\x00')
+    element_id = body[:element_end].decode('latin-1')
+    start_ms, end_ms, _, _ = struct.unpack('>IIII', body[element_end + 1:element_end + 17])
+    title = ""
+    for frame_id, sub_body in _iter_frames(body[element_end + 17:], major_version):
+        if frame_id == 'TIT2':
+            title = _decode_text(sub_body)
+    return {'id': element_id, 'start': start_ms / 1000.0, 'end': end_ms / 1000.0, 'title': title}
+
+
+def _parse_ctoc(body: bytes) -> dict:
+    element_end = body.index(b'\x00')
+    flags, entry_count = body[element_end + 1], body[element_end + 2]
+    children, pos = [], element_end + 3
+    for _ in range(entry_count):
+        child_end = body.index(b'\x00', pos)
+        children.append(body[pos:child_end].decode('latin-1'))
+        pos = child_end + 1
+    return {'top_level': bool(flags & 0x2), 'children': children}
+
+
+def read_id3_chapters(file_path: str) -> list:
+    """
+    Reads ID3v2 CHAP frames (ordered by the top-level CTOC when there is one) straight from
+    the tag at the start of the file; the audio itself is never read or decoded.
+    Returns [{'start', 'end', 'title'}, ...] in seconds.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            header = f.read(10)
+            if len(header) < 10 or header[:3] != b'ID3' or header[3] not in (3, 4):
+                return []
+            tag_size = _syncsafe(header[6:10])
+            if tag_size > MAX_ID3_TAG_BYTES:
+                return []
+            data = f.read(tag_size)
+    except OSError:
+        return []
+
+    major_version, flags = header[3], header[5]
+    if flags & 0x80 and major_version == 3:
+        data = data.replace(b'\xff\x00', b'\xff') # Tag-wide unsynchronisation
+    if flags & 0x40: # Skip the extended header
+        ext_size = _syncsafe(data[:4]) if major_version == 4 else struct.unpack('>I', data[:4])[0] + 4
+        data = data[ext_size:]
+
+    chapters, toc = {}, None
+    try:
+        for frame_id, body in _iter_frames(data, major_version):
+            if frame_id == 'CHAP':
+                chapter = _parse_chap(body, major_version)
+                chapters[chapter['id']] = chapter
+            elif frame_id == 'CTOC':
+                ctoc = _parse_ctoc(body)
+                if toc is None or ctoc['top_level']:
+                    toc = ctoc
+    except (ValueError, struct.error, IndexError) as e:
+        logger.warning(f"Malformed ID3 chapter data in {file_path}: {e}")
+
+    if toc and all(child in chapters for child in toc['children']):
+        ordered = [chapters[child] for child in toc['children']]
+    else:
+        ordered = sorted(chapters.values(), key=lambda c: c['start'])
+    return [{'start': c['start'], 'end': c['end'], 'title': c['title']} for c in ordered]
+
+
+def normalize_podcast_chapters(data: dict, duration: float = None) -> list:
+    """
+    Converts a Podcasting 2.0 chapters document ({"chapters": [{"startTime", "endTime"?, "title"}]})
+    to [{'start', 'end', 'title'}]. A missing endTime runs to the next chapter or the episode end.
+    """
+    entries = sorted(
+        (c for c in (data or {}).get('chapters', []) if isinstance(c, dict) and 'startTime' in c and c.get('toc', True) is not False),
+        key=lambda c: float(c['startTime']),
+    )
+    chapters = []
+    for i, entry in enumerate(entries):
+        start = float(entry['startTime'])
+        if entry.get('endTime') is not None:
+            end = float(entry['endTime'])
+        elif i + 1 < len(entries):
+            end = float(entries[i + 1]['startTime'])
+        else:
+            end = duration if duration else start
+        chapters.append({'start': start, 'end': end, 'title': entry.get('title') or ""})
+    return chapters
+
+
+def fetch_podcast_chapters(url: str, cache_path: str) -> dict | None:
+    """
+    Returns the `podcast:chapters` JSON document for an episode, fetching it only once;
+    later calls are served from cache_path.
+    """
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass # Corrupt cache; fetch again
+
+    try:
+        response = requests.get(url, timeout=CHAPTERS_FETCH_TIMEOUT)
+        response.raise_for_status()
+        data = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.warning(f"Could not fetch chapters from {url}: {e}")
+        return None
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, cache_path)
+    return data
+
+
+def collect_chapters(episode, cache_path: str) -> list:
+    """
+    Gathers an episode's chapters from the best available source: the publisher's
+    `podcast:chapters` document, then ID3 CHAP frames in the original, then chapters
+    reported by the stored audio probe.
+    """
+    duration = episode.original_duration
+    if episode.chapters_url:
+        chapters = normalize_podcast_chapters(fetch_podcast_chapters(episode.chapters_url, cache_path), duration)
+        if chapters:
+            return chapters
+
+    if episode.original_file_path:
+        chapters = read_id3_chapters(episode.original_file_path)
+        if chapters:
+            return chapters
+
+    if episode.probe_json:
+        probe_chapters = json.loads(episode.probe_json).get('chapters') or []
+        return [{'start': c['start'], 'end': c['end'], 'title': c.get('title') or ""} for c in probe_chapters if c.get('start') is not None]
+    return []
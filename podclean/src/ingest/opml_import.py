@@ -1,46 +1,41 @@
-import feedparser
 import os
 import logging
+import xml.etree.ElementTree as ET
 from src.ingest.rss_poll import poll_feed
 
 logger = logging.getLogger(__name__)
 
 def import_opml(opml_file_path: str, poll_limit: int = None):
     """
-    Parses an OPML file and polls each RSS feed found within it.
+    Parses an OPML file and polls each RSS feed found within it (outlines may be nested to any depth).
     """
     if not os.path.exists(opml_file_path):
         logger.error(f"OPML file not found at: {opml_file_path}")
         return
 
     logger.info(f"Importing OPML file: {opml_file_path}")
-    
-    # feedparser can parse OPML files directly
-    opml_data = feedparser.parse(opml_file_path)
 
-    if not hasattr(opml_data, 'opml') or not opml_data.opml.get('body'):
+    # feedparser does not parse OPML, so read the outline tree directly
+    try:
+        root = ET.parse(opml_file_path).getroot()
+    except ET.ParseError as e:
+        logger.error(f"Invalid OPML file format: {e}")
+        return
+    body = root.find('body')
+    if root.tag != 'opml' or body is None:
         logger.error("Invalid OPML file format. Missing opml or body tag.")
         return
 
-    for outline in opml_data.opml.body.outlines:
-        if hasattr(outline, 'xmlUrl'):
-            feed_url = outline.xmlUrl
-            feed_title = outline.get('title', feed_url)
-            logger.info(f"Found feed: {feed_title} ({feed_url})")
-            try:
-                poll_feed(feed_url, limit=poll_limit)
-            except Exception as e:
-                logger.error(f"Error polling feed {feed_url}: {e}")
-        elif hasattr(outline, 'outlines'): # Handle nested outlines
-            for nested_outline in outline.outlines:
-                if hasattr(nested_outline, 'xmlUrl'):
-                    feed_url = nested_outline.xmlUrl
-                    feed_title = nested_outline.get('title', feed_url)
-                    logger.info(f"Found nested feed: {feed_title} ({feed_url})")
-                    try:
-                        poll_feed(feed_url, limit=poll_limit)
-                    except Exception as e:
-                        logger.error(f"Error polling nested feed {feed_url}: {e}")
+    for outline in body.iter('outline'):
+        feed_url = outline.get('xmlUrl')
+        if not feed_url:
+            continue
+        feed_title = outline.get('title') or outline.get('text') or feed_url
+        logger.info(f"Found feed: {feed_title} ({feed_url})")
+        try:
+            poll_feed(feed_url, limit=poll_limit)
+        except Exception as e:
+            logger.error(f"Error polling feed {feed_url}: {e}")
 
     logger.info("OPML import complete.")
 
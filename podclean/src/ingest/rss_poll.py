@@ -1,10 +1,15 @@
 import feedparser
+import json
 import os
 from datetime import datetime
 from sqlalchemy.orm import Session
 from src.store.db import get_session, add_or_update_episode
-from src.dl.fetcher import download_file
-from src.dl.integrity import get_audio_duration
+from src.store.paths import EpisodePaths
+from src.store.usage import record_artifact
+from src.store.dedup import reuse_duplicate_artifacts
+from src.store.metrics import span, file_size
+from src.dl.fetcher import download_file_with_hash
+from src.dl.integrity import probe_audio, check_audio_complete
 from src.config.config_loader import load_app_config
 from src.config.config import AppConfig
 import time
@@ -12,12 +17,26 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-app_config: AppConfig = load_app_config()
-# Define the base directory for original audio files
-ORIGINALS_DIR = os.path.join(app_config.PODCLEAN_MEDIA_BASE_PATH, 'originals')
+DOWNLOAD_FAILURES = ('download_failed', 'download_incomplete')
+
+def _record_download_failure(session: Session, episode, status: str, reason: str | None, max_retries: int):
+    """
+    Counts a failed download; after max_retries attempts the episode is no longer downloaded again.
+    """
+    episode.retry_count = (episode.retry_count or 0) + 1
+    episode.last_error = reason
+    if episode.retry_count >= max_retries:
+        episode.status = 'failed_permanently'
+        logger.error(f"Giving up on downloading {episode.title} after {episode.retry_count} attempts.")
+    else:
+        episode.status = status
+    episode.status_changed_at = datetime.now()
+    session.add(episode)
+    session.commit()
 
 def poll_feed(feed_url: str, limit: int = None):
     feed = feedparser.parse(feed_url)
+    max_retries = load_app_config().MAX_PROCESSING_RETRIES
     processed_count = 0
     for entry in feed.entries:
         if limit is not None and processed_count >= limit:
@@ -37,7 +56,8 @@ def poll_feed(feed_url: str, limit: int = None):
             "image_url": entry.image.href if hasattr(entry, 'image') and hasattr(entry.image, 'href') else None,
             "show_image_url": feed.feed.image.href if hasattr(feed.feed, 'image') and hasattr(feed.feed.image, 'href') else None,
             "show_author": feed.feed.author if hasattr(feed.feed, 'author') else None,
-            "chapters_json": json.dumps(entry.chapters) if hasattr(entry, 'chapters') else None, # Assuming chapters are directly available
+            # <podcast:chapters url="..."> (feedparser exposes its attributes as a dict); fetched when the episode is processed
+            "chapters_url": entry.get('podcast_chapters', {}).get('url') if isinstance(entry.get('podcast_chapters'), dict) else None,
         }
         # Basic validation for required fields
         if not all([episode_data['source_guid'], episode_data['title'], episode_data['original_audio_url']]):
@@ -49,34 +69,45 @@ def poll_feed(feed_url: str, limit: int = None):
             logger.info(f"Processed episode: {episode.title} from {episode.show_name}")
             processed_count += 1
 
-            # Download audio if not already downloaded
+            # Download audio if not already downloaded (and not given up on)
             if episode.original_audio_url and not episode.original_file_path:
+                if episode.status == 'failed_permanently' or (episode.status in DOWNLOAD_FAILURES and (episode.retry_count or 0) >= max_retries):
+                    logger.info(f"Not downloading {episode.title} again: {episode.last_error or episode.status}")
+                    continue
                 logger.info(f"Attempting to download: {episode.original_audio_url}")
-                # Generate a unique filename using show name, episode title, and download date
-                file_extension = os.path.splitext(os.path.basename(episode.original_audio_url).split('?')[0])[1] or ".mp3"
-                # Sanitize title and show name for filename
-                sanitized_title = "".join(c for c in episode.title if c.isalnum() or c in (' ', '-')).strip().replace(' ', '_')
-                sanitized_show_name = "".join(c for c in episode.show_name if c.isalnum() or c in (' ', '-')).strip().replace(' ', '_')
-                download_date_str = datetime.now().strftime("%m%d%y")
-                unique_filename = f"{sanitized_show_name}-{sanitized_title}-{download_date_str}{file_extension}"
-                downloaded_path = download_file(episode.original_audio_url, ORIGINALS_DIR, filename=unique_filename)
-                if downloaded_path:
+                # Sharded, deterministic location derived from the guid (see src/store/paths.py)
+                original_path = EpisodePaths.for_episode(episode).original
+                with span('ingest', episode) as ingest_span:
+                    downloaded_path, content_hash = download_file_with_hash(episode.original_audio_url, os.path.dirname(original_path), filename=os.path.basename(original_path))
+                    # Probe once; the result is kept on the episode for every later stage
+                    probe = probe_audio(downloaded_path) if downloaded_path else None
+                    complete, reason = check_audio_complete(downloaded_path, probe, episode.original_file_size) if downloaded_path else (False, None)
+                    ingest_span.bytes_out = file_size(downloaded_path)
+                    ingest_span.audio_seconds = (probe or {}).get('duration')
+                    ingest_span.ok = bool(downloaded_path and complete)
+                if downloaded_path and not complete:
+                    # Leave original_file_path empty so a later poll downloads it again, up to max_retries times
+                    os.remove(downloaded_path)
+                    logger.error(f"Discarded incomplete download of {episode.title}: {reason}")
+                    _record_download_failure(session, episode, 'download_incomplete', reason, max_retries)
+                elif downloaded_path:
                     episode.original_file_path = downloaded_path
-                    # Get duration after download
-                    duration = get_audio_duration(downloaded_path)
-                    if duration is not None:
-                        episode.original_duration = duration
-                    episode.status = 'downloaded'
+                    episode.content_hash = content_hash
+                    episode.probe_json = json.dumps(probe)
+                    episode.original_duration = probe['duration']
+                    episode.retry_count = 0 # The worker's processing retries start from here
+                    record_artifact(session, episode, 'original', downloaded_path)
+                    # Identical audio seen before (syndicated or re-GUIDed episode): reuse its results
+                    if not reuse_duplicate_artifacts(session, episode):
+                        episode.status = 'downloaded'
+                        episode.status_changed_at = datetime.now()
                     session.add(episode)
                     session.commit()
                     session.refresh(episode)
                     logger.info(f"Downloaded and updated path for {episode.title}")
                 else:
-                    episode.status = 'download_failed'
-                    session.add(episode)
-                    session.commit()
-                    session.refresh(episode)
                     logger.error(f"Failed to download {episode.title}")
+                    _record_download_failure(session, episode, 'download_failed', "download failed", max_retries)
 
 if __name__ == "__main__":
     # Example usage (will be replaced by main runner)
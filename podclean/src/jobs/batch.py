@@ -0,0 +1,177 @@
+import logging
+import os
+import time
+from functools import partial
+
+from src.config.config_loader import load_app_config
+from src.detect.cache import StageCache, transcript_fingerprint
+from src.detect.fusion import needs_fast_transcript
+from src.dl.fetcher import hash_file
+from src.processor.episode_processor import process_episode, perform_full_transcription
+from src.store.db import get_session
+from src.store.models import Episode
+from src.store.states import PENDING_PROCESSING_STATUSES, RETRYABLE_FAILURES, has_reached
+from src.jobs.governor import get_governor, whisper_thread_args
+from src.jobs.worker import run_episode_job
+from src.store.metrics import span, file_size
+from src.transcribe.batch_whisper import transcribe_many
+
+logger = logging.getLogger(__name__)
+
+BATCH_STAGES = ('fast', 'full')
+DEFAULT_BATCH_SIZE = 8 # Episodes per whisper.cpp process (one model load each)
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _pending_ids(session, statuses, show_name: str = None, limit: int = None, max_retries: int = None) -> list:
+    query = session.query(Episode.id).filter(Episode.status.in_(statuses))
+    if show_name:
+        query = query.filter(Episode.show_name == show_name)
+    if max_retries is not None:
+        query = query.filter(Episode.retry_count < max_retries)
+    query = query.order_by(Episode.pub_date.desc(), Episode.id.desc())
+    if limit:
+        query = query.limit(limit)
+    return [row.id for row in query]
+
+
+def _new_report() -> dict:
+    return {"episodes": 0, "transcribed_files": 0, "audio_seconds": 0.0, "wall_seconds": 0.0}
+
+
+def _finish_report(report: dict) -> dict:
+    hours = report["wall_seconds"] / 3600
+    report["audio_hours_per_hour"] = round(report["audio_seconds"] / 3600 / hours, 2) if hours else 0.0
+    report["wall_seconds"] = round(report["wall_seconds"], 1)
+    report["audio_seconds"] = round(report["audio_seconds"], 1)
+    return report
+
+
+def _transcribe_group(paths: list, model_size: str, stage: str) -> dict:
+    if not paths:
+        return {}
+    try:
+        with get_governor().slot(stage, model_size) as footprint, \
+                span(f"{stage}_batch", bytes_in=sum(file_size(p) or 0 for p in paths)) as batch_span:
+            results = transcribe_many(paths, model_size=model_size, extra_args=whisper_thread_args(footprint.threads))
+            batch_span.ok = len(results) == len(paths)
+            return results
+    except Exception as e:
+        # Leave the episodes to the per-episode path, which records failures stage by stage
+        logger.error(f"Batched transcription of {len(paths)} files failed: {e}")
+        return {}
+
+
+def run_fast_batch(episode_ids: list, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """
+    Initial processing for many episodes. Per chunk: the cheap stages run first, then every
+    episode that still needs a fast transcript goes through one whisper.cpp process, and the
+    transcripts land in the detection cache, where the detection stage picks them up (an
+    episode the group run produced nothing for transcribes itself there). Errors are recorded
+    per episode, as by the worker.
+    """
+    app_cfg = load_app_config()
+    max_retries = app_cfg.MAX_PROCESSING_RETRIES
+    transcript_hash = transcript_fingerprint(app_cfg)
+    report = _new_report()
+    started = time.monotonic()
+    for chunk in _chunks(episode_ids, batch_size):
+        started_ok = [episode_id for episode_id in chunk
+                      if run_episode_job(episode_id, 'process', max_retries, run=partial(process_episode, through='probed'))]
+
+        with get_session() as session:
+            pending, probed = {}, []
+            for episode in session.query(Episode).filter(Episode.id.in_(started_ok)):
+                if not has_reached(episode, 'probed'):
+                    continue
+                probed.append(episode.id)
+                if has_reached(episode, 'detected'):
+                    continue
+                if not episode.content_hash:
+                    try:
+                        episode.content_hash = hash_file(episode.original_file_path)
+                    except OSError as e:
+                        logger.warning(f"Could not hash episode {episode.id}; it transcribes on its own: {e}")
+                        continue
+                    session.commit()
+                cached = StageCache(session, episode.content_hash).get("transcript", transcript_hash)
+                if cached is None and needs_fast_transcript(episode, episode.show_name):
+                    pending[episode.original_file_path] = episode
+
+            results = _transcribe_group(list(pending), app_cfg.FAST_MODEL, 'fast_transcribe')
+            for path, segments in results.items():
+                StageCache(session, pending[path].content_hash).put("transcript", transcript_hash, segments)
+            report["transcribed_files"] += len(results)
+
+        for episode_id in probed:
+            run_episode_job(episode_id, 'process', max_retries, new_attempt=False) # Same attempt as the probe
+
+        with get_session() as session:
+            for episode in session.query(Episode).filter(Episode.id.in_(chunk)):
+                if has_reached(episode, 'chapters'):
+                    report["episodes"] += 1
+                    report["audio_seconds"] += episode.original_duration or 0
+    report["wall_seconds"] = time.monotonic() - started
+    return _finish_report(report)
+
+
+def run_full_batch(episode_ids: list, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """
+    Full transcription of many cleaned episodes, one whisper.cpp process per chunk. Episodes
+    the group run produced nothing for (or all of a chunk, when the run failed) fall back to
+    their own whisper.cpp run; errors are recorded per episode, as by the worker.
+    """
+    app_cfg = load_app_config()
+    max_retries = app_cfg.MAX_PROCESSING_RETRIES
+    report = _new_report()
+    started = time.monotonic()
+    for chunk in _chunks(episode_ids, batch_size):
+        with get_session() as session:
+            paths = {
+                episode.cleaned_file_path: (episode.id, episode.cleaned_duration or 0)
+                for episode in session.query(Episode).filter(Episode.id.in_(chunk))
+                if has_reached(episode, 'chapters') and not has_reached(episode, 'transcribed')
+                and episode.cleaned_file_path and os.path.exists(episode.cleaned_file_path)
+            }
+        results = _transcribe_group(list(paths), app_cfg.FULL_MODEL, 'full_transcribe')
+        report["transcribed_files"] += len(results)
+        for path, (episode_id, duration) in paths.items():
+            run = partial(perform_full_transcription, transcription_results=results[path]) if results.get(path) else None
+            if run_episode_job(episode_id, 'transcribe', max_retries, run=run):
+                with get_session() as session:
+                    if has_reached(session.get(Episode, episode_id), 'transcribed'):
+                        report["episodes"] += 1
+                        report["audio_seconds"] += duration
+    report["wall_seconds"] = time.monotonic() - started
+    return _finish_report(report)
+
+
+def run_batch(stages=BATCH_STAGES, show_name: str = None, limit: int = None, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """
+    Pushes pending episodes through the pipeline grouped by stage and model: every fast pass
+    first, then every full pass. Returns a throughput report per stage.
+    """
+    app_cfg = load_app_config()
+    reports = {}
+    if 'fast' in stages:
+        with get_session() as session:
+            episode_ids = _pending_ids(session, PENDING_PROCESSING_STATUSES, show_name, limit)
+            episode_ids += _pending_ids(session, RETRYABLE_FAILURES, show_name, limit, app_cfg.MAX_PROCESSING_RETRIES)
+        logger.info(f"Batch fast pass over {len(episode_ids)} episodes.")
+        reports['fast'] = run_fast_batch(episode_ids[:limit] if limit else episode_ids, batch_size)
+    if 'full' in stages:
+        if not app_cfg.FULL_PASS_ENABLED:
+            logger.info("Full transcription pass is disabled; skipping the full batch.")
+        else:
+            with get_session() as session:
+                episode_ids = _pending_ids(session, ('cut_ready_for_serving',), show_name, limit)
+            logger.info(f"Batch full pass over {len(episode_ids)} episodes.")
+            reports['full'] = run_full_batch(episode_ids, batch_size)
+    for stage, report in reports.items():
+        logger.info(f"Batch {stage} pass: {report['episodes']} episodes, {report['audio_seconds'] / 3600:.2f} audio hours "
+                    f"in {report['wall_seconds'] / 3600:.2f} h ({report['audio_hours_per_hour']} audio-hours per hour).")
+    return reports
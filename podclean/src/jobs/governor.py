@@ -0,0 +1,194 @@
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from src.config.config import GovernorConfig
+
+logger = logging.getLogger(__name__)
+
+# Resident memory of a whisper.cpp model while transcribing (whisper.cpp README figures, rounded up)
+MODEL_MEMORY_MB = {
+    "tiny": 300, "base": 400,
+    "small": 900, "small.en": 900,
+    "medium": 2200, "medium.en": 2200,
+    "large-v1": 4000, "large-v2": 4000, "large": 4000,
+}
+FFMPEG_MEMORY_MB = 150
+# A just-started whisper process has not allocated its model yet; admissions within this
+# window count its model against available memory
+MODEL_LOAD_SECONDS = 30
+
+WHISPER_STAGES = ('fast_transcribe', 'full_transcribe')
+FFMPEG_STAGES = ('cut', 'decode')
+
+Footprint = namedtuple('Footprint', ['stage', 'threads', 'memory_mb'])
+
+
+def available_memory_mb() -> int | None:
+    """
+    Memory available to new processes: MemAvailable on Linux, free + inactive pages on macOS.
+    None when it cannot be read (the memory check is then skipped).
+    """
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    if sys.platform == 'darwin':
+        try:
+            output = subprocess.run(['vm_stat'], check=True, capture_output=True, text=True).stdout
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return None
+        page_size = 4096
+        pages = 0
+        for line in output.splitlines():
+            if 'page size of' in line:
+                page_size = int(line.split('page size of')[1].split()[0])
+            elif line.startswith(('Pages free:', 'Pages inactive:', 'Pages speculative:')):
+                pages += int(line.split(':')[1].strip().rstrip('.'))
+        return pages * page_size // (1024 * 1024)
+    return None
+
+
+def load_average() -> float | None:
+    try:
+        return os.getloadavg()[0]
+    except (OSError, AttributeError):
+        return None
+
+
+def whisper_thread_args(threads: int | None) -> list:
+    """
+    whisper.cpp arguments for a granted thread count (None leaves whisper.cpp's default).
+    """
+    return ["-t", str(threads)] if threads else []
+
+
+def ffmpeg_thread_args(threads: int | None, filter_graph: bool = False) -> list:
+    """
+    ffmpeg arguments for a granted thread count; filter_graph also limits -filter_complex.
+    """
+    if not threads:
+        return []
+    return ["-threads", str(threads)] + (["-filter_complex_threads", str(threads)] if filter_graph else [])
+
+
+class ResourceGovernor:
+    """
+    Admits heavy stages against a core budget. Each stage declares its thread footprint
+    (the -t / -threads it passes to whisper.cpp or ffmpeg) and memory need; a stage waits
+    while the running stages would oversubscribe the cores, while the machine's load average
+    is too high, or while RAM for its model is short. A stage is always admitted when nothing
+    else is running, so an oversized footprint degrades to running alone.
+    """
+
+    def __init__(self, cfg: GovernorConfig = None, max_parallel_transcribe: int = 2, cpu_count: int = None,
+                 memory_probe=available_memory_mb, load_probe=load_average):
+        self.cfg = cfg or GovernorConfig()
+        self.cpu_count = cpu_count or os.cpu_count() or 1
+        self.core_budget = self.cfg.core_budget or self.cpu_count
+        self.max_parallel_transcribe = max(1, max_parallel_transcribe)
+        self._memory_probe = memory_probe
+        self._load_probe = load_probe
+        self._condition = threading.Condition()
+        self._active = {} # slot id -> (Footprint, admitted at)
+        self._next_id = 0
+
+    def footprint(self, stage: str, model_size: str = None) -> Footprint:
+        if stage == 'fast_transcribe':
+            threads, memory_mb = self.cfg.fast_whisper_threads, MODEL_MEMORY_MB.get(model_size, MODEL_MEMORY_MB['small'])
+        elif stage == 'full_transcribe':
+            threads, memory_mb = self.cfg.full_whisper_threads, MODEL_MEMORY_MB.get(model_size, MODEL_MEMORY_MB['medium'])
+        elif stage == 'cut':
+            threads, memory_mb = self.cfg.ffmpeg_threads, FFMPEG_MEMORY_MB
+        elif stage == 'decode':
+            threads, memory_mb = 1, FFMPEG_MEMORY_MB # MP3 decoding is single-threaded
+        else:
+            raise ValueError(f"Unknown stage '{stage}'.")
+        return Footprint(stage, max(1, min(threads, self.core_budget)), memory_mb)
+
+    def _used_threads(self) -> int:
+        return sum(fp.threads for fp, _ in self._active.values())
+
+    def _blocker(self, fp: Footprint) -> str | None:
+        """
+        Why `fp` cannot start yet, or None. Called with the condition held.
+        """
+        if not self._active:
+            return None
+        if self._used_threads() + fp.threads > self.core_budget:
+            return "core budget"
+        if fp.stage in WHISPER_STAGES and sum(1 for f, _ in self._active.values() if f.stage in WHISPER_STAGES) >= self.max_parallel_transcribe:
+            return "whisper process limit"
+        load = self._load_probe()
+        if load is not None and load > self.cfg.max_load_per_core * self.cpu_count:
+            return f"load average {load:.1f}"
+        available = self._memory_probe()
+        if available is not None:
+            now = time.monotonic()
+            loading = sum(f.memory_mb for f, admitted in self._active.values() if now - admitted < MODEL_LOAD_SECONDS)
+            if available - loading - fp.memory_mb < self.cfg.memory_reserve_mb:
+                return f"memory ({available - loading} MB available, {fp.memory_mb} MB needed)"
+        return None
+
+    @contextmanager
+    def slot(self, stage: str, model_size: str = None):
+        """
+        Blocks until the stage is admitted; yields its Footprint (pass .threads to the tool).
+        """
+        fp = self.footprint(stage, model_size)
+        if not self.cfg.enabled:
+            yield fp
+            return
+        with self._condition:
+            waited_for = None
+            while (blocker := self._blocker(fp)) is not None:
+                if blocker != waited_for:
+                    logger.info(f"Stage '{stage}' ({fp.threads} threads, {fp.memory_mb} MB) waiting for {blocker}.")
+                    waited_for = blocker
+                # Load and memory change outside our control, so re-check periodically too
+                self._condition.wait(timeout=self.cfg.poll_seconds)
+            slot_id = self._next_id
+            self._next_id += 1
+            self._active[slot_id] = (fp, time.monotonic())
+        try:
+            yield fp
+        finally:
+            with self._condition:
+                del self._active[slot_id]
+                self._condition.notify_all()
+
+    def snapshot(self) -> dict:
+        with self._condition:
+            running = [fp.stage for fp, _ in self._active.values()]
+            return {
+                "core_budget": self.core_budget,
+                "threads_in_use": self._used_threads(),
+                "running": {stage: running.count(stage) for stage in set(running)},
+                "load_average": self._load_probe(),
+                "available_memory_mb": self._memory_probe(),
+            }
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor() -> ResourceGovernor:
+    """
+    The process-wide governor, built from the app config on first use.
+    """
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            from src.config.config_loader import load_app_config
+            app_cfg = load_app_config()
+            _governor = ResourceGovernor(app_cfg.governor, app_cfg.MAX_PARALLEL_TRANSCRIBE)
+        return _governor
@@ -0,0 +1,160 @@
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from src.config.config import ProfilingConfig
+from src.store.models import ArtifactUsage, StageMetric
+from src.store.paths import EpisodePaths
+from src.store.usage import record_artifact
+
+try:
+    import resource
+except ImportError: # Not available on Windows; profiles then carry no rusage figures
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = ".prof" # pstats dump: python -m pstats, snakeviz, ...
+SUMMARY_SUFFIX = ".json"
+
+# Only one cProfile can be active at a time on newer Pythons, so concurrent worker jobs
+# are never profiled together; a job that finds the profiler busy runs unprofiled
+_profiler_lock = threading.Lock()
+
+
+def should_profile(episode, cfg: ProfilingConfig) -> bool:
+    return bool(episode.profile_requested) or (cfg.sample_rate > 0 and random.random() < cfg.sample_rate)
+
+
+def _rusage(children: bool = False) -> dict | None:
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    maxrss_mb = usage.ru_maxrss / (1024 * 1024) if sys.platform == 'darwin' else usage.ru_maxrss / 1024
+    return {"user_s": usage.ru_utime, "system_s": usage.ru_stime, "maxrss_mb": round(maxrss_mb, 1),
+            "block_in": usage.ru_inblock, "block_out": usage.ru_oublock,
+            "voluntary_switches": usage.ru_nvcsw, "involuntary_switches": usage.ru_nivcsw}
+
+
+def _rusage_delta(before: dict | None, after: dict | None) -> dict | None:
+    if before is None or after is None:
+        return None
+    # maxrss is a high-water mark, not a counter
+    return {k: (after[k] if k == "maxrss_mb" else round(after[k] - before[k], 3)) for k in after}
+
+
+def top_functions(profiler: cProfile.Profile, limit: int) -> list:
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{"function": func, "file": filename, "line": line, "calls": nc,
+             "total_s": round(tt, 4), "cumulative_s": round(ct, 4)}
+            for (filename, line, func), (cc, nc, tt, ct, callers) in rows]
+
+
+def _stage_spans(session, episode_id: int, since: datetime) -> list:
+    rows = session.query(StageMetric).filter(StageMetric.episode_id == episode_id, StageMetric.started_at >= since)\
+                  .order_by(StageMetric.started_at).all()
+    return [{"stage": r.stage, "parent": r.parent_stage, "duration_s": round(r.duration_seconds, 3), "ok": r.ok} for r in rows]
+
+
+@contextmanager
+def profile_job(session, episode, kind: str, cfg: ProfilingConfig = None):
+    """
+    Runs the enclosed job under cProfile and saves, next to the episode's other artifacts,
+    the pstats dump plus a JSON summary: wall time, rusage of this process and of the child
+    processes (ffmpeg, whisper.cpp) that exited meanwhile, the stage spans and the top
+    functions by cumulative time. Child rusage is process-wide, so it also counts children
+    of jobs running concurrently in other worker threads.
+    """
+    cfg = cfg or ProfilingConfig()
+    if not _profiler_lock.acquire(blocking=False):
+        logger.info(f"Profiler busy; running '{kind}' for episode {episode.id} unprofiled.")
+        yield None
+        return
+    try:
+        profiler = cProfile.Profile()
+        started_at = datetime.now()
+        self_before, children_before = _rusage(), _rusage(children=True)
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+        except ValueError as e: # Another profiler or monitoring tool is active
+            logger.info(f"Cannot profile episode {episode.id}: {e}")
+            yield None
+            return
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+            wall_seconds = time.perf_counter() - started
+            try:
+                _save_profile(session, episode, kind, cfg, profiler, started_at, wall_seconds,
+                              _rusage_delta(self_before, _rusage()), _rusage_delta(children_before, _rusage(children=True)))
+            except Exception as e:
+                logger.warning(f"Could not save the profile of episode {episode.id}: {e}")
+    finally:
+        _profiler_lock.release()
+
+
+def _save_profile(session, episode, kind, cfg, profiler, started_at, wall_seconds, self_usage, children_usage):
+    # The job ran in its own sessions; read the episode's state as it left it
+    session.refresh(episode)
+    prefix = EpisodePaths.for_episode(episode).profile(f"{kind}-{started_at:%Y%m%dT%H%M%S}")
+    os.makedirs(os.path.dirname(prefix), exist_ok=True)
+    profiler.dump_stats(prefix + PROFILE_SUFFIX)
+    summary = {
+        "episode_id": episode.id,
+        "kind": kind,
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "wall_seconds": round(wall_seconds, 3),
+        "status_after": episode.status,
+        "python_rusage": self_usage,
+        "children_rusage": children_usage,
+        "stage_spans": _stage_spans(session, episode.id, started_at),
+        "top_functions": top_functions(profiler, cfg.top_functions),
+    }
+    with open(prefix + SUMMARY_SUFFIX, "w") as f:
+        json.dump(summary, f, indent=2)
+
+    record_artifact(session, episode, 'profile', prefix + PROFILE_SUFFIX)
+    record_artifact(session, episode, 'profile', prefix + SUMMARY_SUFFIX)
+    episode.profile_requested = None
+    session.add(episode)
+    session.commit()
+    logger.info(f"Saved profile of '{kind}' for episode {episode.id} ({wall_seconds:.1f}s) to {prefix}{PROFILE_SUFFIX}")
+
+
+def list_profiles(session, episode_id: int = None, limit: int = 100) -> list:
+    """
+    Saved profiles, newest first: the summary's headline figures and the artifact ids of the
+    summary and of the pstats dump (for the admin download endpoint).
+    """
+    query = session.query(ArtifactUsage).filter(ArtifactUsage.kind == 'profile')
+    if episode_id is not None:
+        query = query.filter(ArtifactUsage.episode_id == episode_id)
+    rows = query.order_by(ArtifactUsage.recorded_at.desc(), ArtifactUsage.id.desc()).limit(limit * 2).all()
+    dumps = {row.path[:-len(PROFILE_SUFFIX)]: row.id for row in rows if row.path.endswith(PROFILE_SUFFIX)}
+    profiles = []
+    for row in rows:
+        if not row.path.endswith(SUMMARY_SUFFIX):
+            continue
+        try:
+            with open(row.path) as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            continue
+        profiles.append({
+            "episode_id": row.episode_id, "show_name": row.show_name, "kind": summary.get("kind"),
+            "started_at": summary.get("started_at"), "wall_seconds": summary.get("wall_seconds"),
+            "summary_artifact_id": row.id, "profile_artifact_id": dumps.get(row.path[:-len(SUMMARY_SUFFIX)]),
+        })
+    return profiles[:limit]
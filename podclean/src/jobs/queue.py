@@ -0,0 +1,150 @@
+import bisect
+import heapq
+import logging
+import math
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+from src.config.config import AppConfig
+from src.config.config_loader import load_show_rules
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ('process', 'transcribe') # Initial processing (up to cut-ready) and full transcription
+PRIORITY_CLASSES = ('new', 'backlog')
+# Upper bounds (seconds) of the wait-time histogram buckets; the last one catches everything
+WAIT_BUCKETS_SECONDS = (60, 300, 900, 3600, 4 * 3600, 12 * 3600, 86400, 3 * 86400, 7 * 86400, math.inf)
+
+Job = namedtuple('Job', ['priority', 'episode_id', 'kind', 'priority_class', 'waited_seconds'])
+
+
+def priority_class(pub_date: datetime, now: datetime, new_episode_hours: int) -> str:
+    if pub_date and (now - pub_date).total_seconds() <= new_episode_hours * 3600:
+        return 'new'
+    return 'backlog'
+
+
+def job_priority(episode, kind: str, now: datetime, app_cfg: AppConfig, show_priority: float = 0.0) -> Job:
+    """
+    Scores one pending job. Higher runs first:
+    recency (decaying with the episode's age) + stage weight + per-show priority + aging,
+    where aging grows with the time the job has been waiting, so old backlog eventually wins.
+    """
+    cfg = app_cfg.scheduler
+    age_hours = max(0.0, (now - episode.pub_date).total_seconds() / 3600) if episode.pub_date else math.inf
+    # Never the publication date: rows from before status_changed_at existed would otherwise
+    # collect years of aging and outrank every new episode; without a timestamp there is none
+    waiting_since = episode.status_changed_at or episode.checkpoint_at or now
+    waited_seconds = max(0.0, (now - waiting_since).total_seconds())
+
+    recency = cfg.recency_weight * 0.5 ** (age_hours / cfg.recency_half_life_hours) if cfg.recency_half_life_hours > 0 else 0.0
+    stage = cfg.processing_weight if kind == 'process' else 0.0
+    aging = cfg.aging_per_hour * waited_seconds / 3600
+    priority = recency + stage + show_priority + aging
+    return Job(priority, episode.id, kind, priority_class(episode.pub_date, now, cfg.new_episode_hours), waited_seconds)
+
+
+class QueueStats:
+    """
+    Queue depth and wait-time histograms per priority class, kept in memory for /status.
+    'queued' describes the pending jobs of the latest queue, less those started since;
+    'started' accumulates the wait of every job taken off the queue.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queued = {}
+        self._started = {c: [0] * len(WAIT_BUCKETS_SECONDS) for c in PRIORITY_CLASSES}
+        self._started_sum = {c: 0.0 for c in PRIORITY_CLASSES}
+
+    @staticmethod
+    def _bucket(waited_seconds: float) -> int:
+        return bisect.bisect_left(WAIT_BUCKETS_SECONDS, waited_seconds)
+
+    def snapshot(self, jobs):
+        queued = {c: {'depth': 0, 'wait_buckets': [0] * len(WAIT_BUCKETS_SECONDS)} for c in PRIORITY_CLASSES}
+        for job in jobs:
+            entry = queued[job.priority_class]
+            entry['depth'] += 1
+            entry['wait_buckets'][self._bucket(job.waited_seconds)] += 1
+        with self._lock:
+            self._queued = queued
+
+    def observe_start(self, job: Job):
+        with self._lock:
+            queued = self._queued.get(job.priority_class)
+            bucket = self._bucket(job.waited_seconds)
+            if queued and queued['depth'] > 0:
+                queued['depth'] -= 1
+                queued['wait_buckets'][bucket] = max(0, queued['wait_buckets'][bucket] - 1)
+            self._started[job.priority_class][bucket] += 1
+            self._started_sum[job.priority_class] += job.waited_seconds
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                'bucket_upper_bounds_seconds': [b if b != math.inf else "inf" for b in WAIT_BUCKETS_SECONDS],
+                'classes': {
+                    c: {
+                        'depth': self._queued.get(c, {}).get('depth', 0),
+                        'queued_wait_buckets': list(self._queued.get(c, {}).get('wait_buckets', [0] * len(WAIT_BUCKETS_SECONDS))),
+                        'started_wait_buckets': list(self._started[c]),
+                        'started_wait_seconds_sum': round(self._started_sum[c], 1),
+                    } for c in PRIORITY_CLASSES
+                },
+            }
+
+
+queue_stats = QueueStats()
+
+
+class JobQueue:
+    """
+    Max-priority queue of episode jobs (a heap of negated priorities). Ties go to the
+    older episode id, so the order is stable between runs. Several worker threads may pop
+    from one queue.
+    """
+
+    def __init__(self, jobs=()):
+        self._lock = threading.Lock()
+        self._heap = [(-job.priority, job.episode_id, job.kind, job) for job in jobs]
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def pop(self) -> Job | None:
+        """
+        The highest-priority job, or None once the queue is empty.
+        """
+        with self._lock:
+            if not self._heap:
+                return None
+            job = heapq.heappop(self._heap)[-1]
+        queue_stats.observe_start(job)
+        return job
+
+    def drain(self):
+        while (job := self.pop()) is not None:
+            yield job
+
+
+def build_queue(candidates, app_cfg: AppConfig, now: datetime = None) -> JobQueue:
+    """
+    Builds the queue from (episode, kind) pairs. An episode queued for both kinds keeps only
+    its initial processing job; full transcription needs the cleaned audio first.
+    """
+    now = now or datetime.now()
+    show_priorities = {}
+    jobs = {}
+    for episode, kind in candidates:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}'.")
+        if episode.id in jobs and jobs[episode.id].kind == 'process':
+            continue
+        if episode.show_name not in show_priorities:
+            show_priorities[episode.show_name] = load_show_rules(episode.show_name).priority
+        jobs[episode.id] = job_priority(episode, kind, now, app_cfg, show_priorities[episode.show_name])
+    queue_stats.snapshot(jobs.values())
+    return JobQueue(jobs.values())
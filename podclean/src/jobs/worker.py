@@ -0,0 +1,234 @@
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from src.store.db import get_session
+from src.store.models import Episode
+from src.ingest.rss_poll import poll_feed
+from src.processor.episode_processor import process_episode, perform_full_transcription
+from src.config.config_loader import load_app_config
+from src.store.states import PENDING_PROCESSING_STATUSES, RETRYABLE_FAILURES, rewind
+from src.jobs.queue import build_queue
+from src.jobs.profiling import profile_job, should_profile
+
+logger = logging.getLogger(__name__)
+
+# What each job kind runs, and the status its failure leaves behind
+JOB_RUNNERS = {
+    'process': (process_episode, 'processing_failed'),
+    'transcribe': (perform_full_transcription, 'full_transcription_failed'),
+}
+
+# Episodes with a job running in this process, and rewinds requested while they run
+_running_lock = threading.Lock()
+_running_episodes = set()
+_deferred_rewinds = {} # episode id -> stage
+
+
+def request_rewind(session, episode, stage: str) -> bool:
+    """
+    Rewinds the episode to `stage` now or, while one of this process's jobs is running it,
+    as soon as that job finishes (its own stage updates would undo an earlier rewind).
+    The worker's next pass re-processes the episode. Returns True when the rewind was deferred.
+    """
+    with _running_lock:
+        if episode.id in _running_episodes:
+            _deferred_rewinds[episode.id] = stage
+            return True
+        rewind(session, episode, stage)
+        return False
+
+
+@contextmanager
+def _tracked(episode_id: int):
+    with _running_lock:
+        _running_episodes.add(episode_id)
+    try:
+        yield
+    finally:
+        with _running_lock:
+            _running_episodes.discard(episode_id)
+            stage = _deferred_rewinds.pop(episode_id, None)
+            if stage is not None:
+                with get_session() as session:
+                    rewind(session, session.get(Episode, episode_id), stage)
+                logger.info(f"Applied the rewind of episode {episode_id} to '{stage}' requested during its job.")
+
+
+def _full_transcription_candidates(session, app_config, max_retries) -> list:
+    """
+    Episodes ready for full transcription under the backlog strategy, including episodes that
+    previously failed full transcription and are within retry limits.
+    """
+    ready = (Episode.status == 'cut_ready_for_serving') | ((Episode.status == 'full_transcription_failed') & (Episode.retry_count < max_retries))
+    backlog_strategy = app_config.backlog_processing.strategy
+    last_n_episodes_count = app_config.backlog_processing.last_n_episodes_count
+
+    if backlog_strategy == "newest_only":
+        episodes = []
+        for show_name_tuple in session.query(Episode.show_name).distinct().all():
+            newest_episode = session.query(Episode).filter(
+                (Episode.show_name == show_name_tuple[0]) & ready
+            ).order_by(Episode.pub_date.desc()).first()
+            if newest_episode:
+                episodes.append(newest_episode)
+        return episodes
+    if backlog_strategy == "last_n_episodes":
+        episodes = []
+        for show_name_tuple in session.query(Episode.show_name).distinct().all():
+            episodes.extend(session.query(Episode).filter(
+                (Episode.show_name == show_name_tuple[0]) & ready
+            ).order_by(Episode.pub_date.desc()).limit(last_n_episodes_count).all())
+        return episodes
+    # "all" strategy or any other unrecognized strategy
+    return session.query(Episode).filter(ready).all()
+
+
+def run_episode_job(episode_id: int, kind: str, max_retries: int, run=None, new_attempt: bool = True, note: str = "") -> bool:
+    """
+    Runs one job of an episode with the worker's bookkeeping: an exception is recorded as the
+    kind's failure status, or as failed_permanently once the retries are used up. `run` (called
+    with the episode id) replaces the kind's runner; with new_attempt=False the job continues an
+    attempt that was already counted. Returns False when the job raised.
+    """
+    default_run, failure_status = JOB_RUNNERS[kind]
+    run = run or default_run
+    profiling = load_app_config().profiling
+    with _tracked(episode_id), get_session() as session:
+        episode = session.get(Episode, episode_id)
+        try:
+            logger.info(f"Running '{kind}' for episode: {episode.title} (ID: {episode.id}{note})")
+            if new_attempt:
+                # Reset error and increment retry count before processing attempt
+                episode.last_error = None
+                episode.retry_count += 1
+                session.add(episode)
+                session.commit()
+
+            with profile_job(session, episode, kind, profiling) if should_profile(episode, profiling) else nullcontext():
+                run(episode.id)
+            # Both runners record each completed stage, or the failure, themselves
+            return True
+
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"Error during '{kind}' of episode {episode.id}: {error_msg}")
+            episode.last_error = error_msg
+            if episode.retry_count >= max_retries:
+                episode.status = 'failed_permanently'
+                logger.error(f"Episode {episode.id} failed permanently after {max_retries} retries.")
+            else:
+                episode.status = failure_status
+                logger.warning(f"Episode {episode.id} failed, retrying ({episode.retry_count}/{max_retries}).")
+            episode.status_changed_at = datetime.now()
+            session.add(episode)
+            session.commit()
+            return False
+
+
+def _run_job(job, max_retries):
+    run_episode_job(job.episode_id, job.kind, max_retries,
+                    note=f", priority {job.priority:.2f}, {job.priority_class}, waited {job.waited_seconds / 3600:.1f} h")
+
+
+def _pending_jobs(session, app_config, max_retries) -> list:
+    """
+    (episode, kind) pairs for every episode waiting for initial processing (downloaded, or a
+    previously failed run within retry limits) or for full transcription.
+    """
+    # Interrupted runs and retries resume after the episode's last completed stage
+    initial_processing_candidates = session.query(Episode).filter(
+        Episode.status.in_(PENDING_PROCESSING_STATUSES) |
+        (Episode.status.in_(RETRYABLE_FAILURES) & (Episode.retry_count < max_retries))
+    ).all()
+    candidates = [(episode, 'process') for episode in initial_processing_candidates]
+    candidates += [(episode, 'transcribe') for episode in _full_transcription_candidates(session, app_config, max_retries)]
+    return candidates
+
+
+def _run_queue(queue, max_retries, parallel_jobs: int = 1, max_jobs: int = None) -> set:
+    """
+    Runs queued jobs highest priority first, `parallel_jobs` at a time, stopping after
+    `max_jobs` (None runs the whole queue). Their whisper and ffmpeg stages are admitted by the
+    resource governor, so running several episodes at once does not oversubscribe the cores.
+    Returns the (episode_id, kind) pairs attempted.
+    """
+    attempted = set()
+    lock = threading.Lock()
+
+    def runner():
+        while True:
+            with lock:
+                job = queue.pop() if max_jobs is None or len(attempted) < max_jobs else None
+                if job is None:
+                    return
+                attempted.add((job.episode_id, job.kind))
+            try:
+                _run_job(job, max_retries)
+            except Exception as e:
+                logger.error(f"Could not record the outcome of '{job.kind}' for episode {job.episode_id}: {e}")
+
+    threads = [threading.Thread(target=runner, name=f"episode-worker-{i}") for i in range(max(1, min(parallel_jobs, len(queue))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return attempted
+
+
+def scheduled_job_part(poll_feeds=False, process_episodes=False, cleanup_episodes=False, mine_marks=False):
+    logger.info("Running scheduled job part...")
+    app_config = load_app_config()
+    max_retries = app_config.MAX_PROCESSING_RETRIES
+
+    if poll_feeds:
+        logger.info("Polling feeds...")
+        feeds = app_config.feeds # Assuming 'feeds' is a list of URLs in app.yaml
+        for feed_url in feeds:
+            try:
+                logger.info(f"Polling feed: {feed_url}")
+                poll_feed(feed_url) # Poll without limit to get all new episodes
+            except Exception as e:
+                logger.error(f"Error polling feed {feed_url}: {e}")
+
+    if process_episodes:
+        logger.info("Processing episodes...")
+        parallel_jobs = app_config.governor.max_parallel_jobs if app_config.governor.enabled else 1
+        requeue_after = max(parallel_jobs, app_config.scheduler.requeue_after_jobs)
+        attempted = set()
+        with get_session() as session:
+            # One priority queue for both kinds of work: new episodes and cut-ready work run first,
+            # and aging lifts the backlog so it is never starved. The queue is rebuilt every few
+            # jobs, so episodes polled or rewound meanwhile (and those cut in this run, for their
+            # full transcription) don't wait behind the rest of the backlog. Each job runs at most
+            # once per pass; failures are retried by the next scheduled run.
+            while True:
+                session.expire_all() # The jobs ran in their own sessions
+                candidates = [(episode, kind) for episode, kind in _pending_jobs(session, app_config, max_retries)
+                              if (episode.id, kind) not in attempted]
+                if not candidates:
+                    break
+                if not attempted:
+                    logger.info(f"Found {len(candidates)} jobs for initial processing and full transcription "
+                                f"(backlog strategy '{app_config.backlog_processing.strategy}', including retries).")
+                attempted |= _run_queue(build_queue(candidates, app_config), max_retries, parallel_jobs, max_jobs=requeue_after)
+            if not attempted:
+                logger.info("No episodes for processing, full transcription or retries.")
+
+    if cleanup_episodes:
+        logger.info("Running cleanup job...")
+        from src.store.cleanup import cleanup_old_episodes, apply_storage_budget
+        cleanup_old_episodes()
+        apply_storage_budget()
+        from src.store.metrics import prune_stage_metrics
+        with get_session() as session:
+            removed = prune_stage_metrics(session, app_config.metrics_retention_days)
+            if removed:
+                logger.info(f"Pruned {removed} stage metrics older than {app_config.metrics_retention_days} days.")
+
+    if mine_marks:
+        logger.info("Mining user marks...")
+        from src.detect.learned import mine_marks as mine_new_marks
+        with get_session() as session:
+            mine_new_marks(session)
@@ -1,210 +1,229 @@
 import argparse
-import uvicorn
-import os
 import logging
-from apscheduler.schedulers.background import BackgroundScheduler
 
-from src.store.db import init_db, get_session
-from src.store.models import Episode
-from src.ingest.rss_poll import poll_feed
-from src.ingest.opml_import import import_opml
-from src.serve.api import app as api_app # Import the FastAPI app
-from src.processor.episode_processor import process_episode, perform_full_transcription
-from src.config.config_loader import load_app_config
+# Heavy dependencies (uvicorn, FastAPI, APScheduler, SQLAlchemy, the processing pipeline) are
+# imported inside the subcommand that needs them, so cron-style invocations start quickly.
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def scheduled_job_part(poll_feeds=False, process_episodes=False, cleanup_episodes=False):
-    logger.info("Running scheduled job part...")
-    app_config = load_app_config()
-    max_retries = app_config.MAX_PROCESSING_RETRIES
-
-    if poll_feeds:
-        logger.info("Polling feeds...")
-        feeds = app_config.feeds # Assuming 'feeds' is a list of URLs in app.yaml
-        for feed_url in feeds:
-            try:
-                logger.info(f"Polling feed: {feed_url}")
-                poll_feed(feed_url) # Poll without limit to get all new episodes
-            except Exception as e:
-                logger.error(f"Error polling feed {feed_url}: {e}")
-
-    if process_episodes:
-        logger.info("Processing episodes...")
-        with get_session() as session:
-            # Initial processing: downloaded or previously failed initial processing
-            initial_processing_candidates = session.query(Episode).filter(
-                (Episode.status == 'downloaded') |
-                ((Episode.status == 'processing_failed') & (Episode.retry_count < max_retries))
-            ).all()
-
-            if initial_processing_candidates:
-                logger.info(f"Found {len(initial_processing_candidates)} episodes for initial processing (downloaded or retrying failed). ")
-                for episode in initial_processing_candidates:
-                    try:
-                        logger.info(f"Performing initial processing (ad detection, cutting) for episode: {episode.title} (ID: {episode.id})")
-                        # Reset error and increment retry count before processing attempt
-                        episode.last_error = None
-                        episode.retry_count += 1
-                        session.add(episode)
-                        session.commit()
-
-                        process_episode(episode.id)
-                        # Status is updated by process_episode to 'cut_ready_for_serving' or 'cut_failed'
-
-                    except Exception as e:
-                        error_msg = str(e)
-                        logger.error(f"Error during initial processing of episode {episode.id}: {error_msg}")
-                        episode.last_error = error_msg
-                        if episode.retry_count >= max_retries:
-                            episode.status = 'failed_permanently'
-                            logger.error(f"Episode {episode.id} failed permanently after {max_retries} retries.")
-                        else:
-                            episode.status = 'processing_failed'
-                            logger.warning(f"Episode {episode.id} failed, retrying ({episode.retry_count}/{max_retries}).")
-                        session.add(episode)
-                        session.commit()
-            else:
-                logger.info("No new episodes for initial processing or retries.")
-
-            # Process episodes ready for full transcription based on backlog strategy
-            # Also include episodes that previously failed full transcription and are within retry limits
-            episodes_for_full_transcription = []
-            
-            # Load app_config again to ensure latest values for backlog_processing
-            app_config = load_app_config()
-            backlog_strategy = app_config.backlog_processing.strategy
-            last_n_episodes_count = app_config.backlog_processing.last_n_episodes_count
-
-            if backlog_strategy == "newest_only":
-                shows = session.query(Episode.show_name).distinct().all()
-                for show_name_tuple in shows:
-                    show_name = show_name_tuple[0]
-                    newest_episode = session.query(Episode).filter(
-                        (Episode.show_name == show_name) &
-                        ((Episode.status == 'cut_ready_for_serving') | ((Episode.status == 'full_transcription_failed') & (Episode.retry_count < max_retries)))
-                    ).order_by(Episode.pub_date.desc()).first()
-                    if newest_episode:
-                        episodes_for_full_transcription.append(newest_episode)
-            elif backlog_strategy == "last_n_episodes":
-                shows = session.query(Episode.show_name).distinct().all()
-                for show_name_tuple in shows:
-                    show_name = show_name_tuple[0]
-                    latest_n_episodes = session.query(Episode).filter(
-                        (Episode.show_name == show_name) &
-                        ((Episode.status == 'cut_ready_for_serving') | ((Episode.status == 'full_transcription_failed') & (Episode.retry_count < max_retries)))
-                    ).order_by(Episode.pub_date.desc()).limit(last_n_episodes_count).all()
-                    episodes_for_full_transcription.extend(latest_n_episodes)
-            else: # "all" strategy or any other unrecognized strategy
-                episodes_for_full_transcription = session.query(Episode).filter(
-                    (Episode.status == 'cut_ready_for_serving') | ((Episode.status == 'full_transcription_failed') & (Episode.retry_count < max_retries))
-                ).all()
-
-            if episodes_for_full_transcription:
-                logger.info(f"Found {len(episodes_for_full_transcription)} episodes for full transcription based on backlog strategy '{backlog_strategy}' (including retries).")
-                for episode in episodes_for_full_transcription:
-                    try:
-                        logger.info(f"Performing full transcription for episode: {episode.title} (ID: {episode.id})")
-                        # Reset error and increment retry count before processing attempt
-                        episode.last_error = None
-                        episode.retry_count += 1
-                        session.add(episode)
-                        session.commit()
-
-                        perform_full_transcription(episode.id)
-
-                    except Exception as e:
-                        error_msg = str(e)
-                        logger.error(f"Error during full transcription of episode {episode.id}: {error_msg}")
-                        episode.last_error = error_msg
-                        if episode.retry_count >= max_retries:
-                            episode.status = 'failed_permanently'
-                            logger.error(f"Episode {episode.id} failed permanently after {max_retries} retries.")
-                        else:
-                            episode.status = 'full_transcription_failed'
-                            logger.warning(f"Episode {episode.id} failed, retrying ({episode.retry_count}/{max_retries}).")
-                        session.add(episode)
-                        session.commit()
-            else:
-                logger.info("No episodes ready for full transcription or retries.")
-
-    if cleanup_episodes:
-        logger.info("Running cleanup job...")
-        from src.store.cleanup import cleanup_old_episodes
-        cleanup_old_episodes()
-
-def main():
-    parser = argparse.ArgumentParser(description="Podemos CLI for podcast processing.")
-    parser.add_argument("--init-db", action="store_true", help="Initialize the database schema.")
-    parser.add_argument("--poll-feed", type=str, help="Poll a given RSS feed URL.")
-    parser.add_argument("--poll-limit", type=int, help="Limit the number of episodes to poll.")
-    parser.add_argument("--import-opml", type=str, help="Import podcasts from an OPML file.")
-    parser.add_argument("--add-feed", type=str, help="Add a new RSS feed URL to the configuration.")
-    parser.add_argument("--remove-feed", type=str, help="Remove an RSS feed URL from the configuration.")
-    parser.add_argument("--process-episode", type=int, help="Process a specific episode by ID.")
-    parser.add_argument("--list-episodes", action="store_true", help="List all episodes in the database.")
-    parser.add_argument("--serve", action="store_true", help="Start the FastAPI server.")
-
-    args = parser.parse_args()
-
-    # Always initialize the database
+def _init_db():
+    from src.store.db import init_db
     logger.info("Initializing database...")
     init_db()
     logger.info("Database initialized.")
 
-    if args.init_db:
-        logger.info("Database already initialized by default.")
-
-    if args.poll_feed:
-        logger.info(f"Polling feed: {args.poll_feed}")
-        poll_feed(args.poll_feed, limit=args.poll_limit)
-        logger.info("Feed polling complete.")
-
-    if args.import_opml:
-        logger.info(f"Importing OPML from: {args.import_opml}")
-        import_opml(args.import_opml, poll_limit=args.poll_limit)
-        logger.info("OPML import complete.")
-
-    if args.add_feed:
-        from src.config.config_loader import add_feed_to_config
-        add_feed_to_config(args.add_feed)
+def cmd_init_db(args):
+    _init_db()
+
+def cmd_poll_feed(args):
+    from src.ingest.rss_poll import poll_feed
+    _init_db()
+    logger.info(f"Polling feed: {args.url}")
+    poll_feed(args.url, limit=args.limit)
+    logger.info("Feed polling complete.")
+
+def cmd_import_opml(args):
+    from src.ingest.opml_import import import_opml
+    _init_db()
+    logger.info(f"Importing OPML from: {args.path}")
+    import_opml(args.path, poll_limit=args.limit)
+    logger.info("OPML import complete.")
+
+def cmd_add_feed(args):
+    from src.config.config_loader import add_feed_to_config
+    add_feed_to_config(args.url)
+
+def cmd_remove_feed(args):
+    from src.config.config_loader import remove_feed_from_config
+    remove_feed_from_config(args.url)
+
+def cmd_process_episode(args):
+    from contextlib import nullcontext
+    from src.processor.episode_processor import process_episode
+    _init_db()
+    logger.info(f"Processing episode ID: {args.episode_id}")
+    if args.profile:
+        from src.jobs.profiling import profile_job
+        from src.store.db import get_session
+        from src.store.models import Episode
+        with get_session() as session:
+            episode = session.get(Episode, args.episode_id)
+            with profile_job(session, episode, 'process') if episode else nullcontext():
+                process_episode(args.episode_id)
+    else:
+        process_episode(args.episode_id)
+    logger.info("Episode processing complete.")
+
+def cmd_list_episodes(args):
+    from src.store.db import get_session
+    from src.store.listing import iter_episodes
+    _init_db()
+    logger.info("Listing all episodes...")
+    with get_session() as session:
+        listed = 0
+        for e in iter_episodes(session, status=args.status, show_name=args.show):
+            print(f'ID: {e.id}, Title: {e.title}, Show: {e.show_name}, Status: {e.status}')
+            listed += 1
+        if not listed:
+            logger.info("No episodes found in the database.")
+    logger.info("Episode listing complete.")
+
+def cmd_run_jobs(args):
+    from src.jobs.worker import scheduled_job_part
+    _init_db()
+    scheduled_job_part(poll_feeds=args.poll, process_episodes=args.process, cleanup_episodes=args.cleanup, mine_marks=args.mine_marks)
+    if args.cleanup:
+        # Let the background unlinker finish before the process exits
+        from src.store.cleanup import file_unlinker
+        file_unlinker.drain()
+
+def cmd_migrate_layout(args):
+    from src.store.paths import migrate_to_sharded_layout
+    _init_db()
+    logger.info(f"Migrating media to the sharded layout (mode={args.mode}, dry_run={args.dry_run})...")
+    migrate_to_sharded_layout(mode=args.mode, dry_run=args.dry_run)
+
+def cmd_storage_usage(args):
+    import json
+    from src.store.db import get_session
+    from src.store.usage import rescan_artifact_usage, usage_summary
+    _init_db()
+    with get_session() as session:
+        if args.rescan:
+            rescan_artifact_usage(session)
+        print(json.dumps(usage_summary(session), indent=2))
+
+def cmd_batch(args):
+    import json
+    from src.jobs.batch import run_batch
+    _init_db()
+    stages = ('fast', 'full') if args.stage == 'all' else (args.stage,)
+    reports = run_batch(stages, show_name=args.show, limit=args.limit, batch_size=args.batch_size)
+    print(json.dumps(reports, indent=2))
+
+def cmd_bench(args):
+    import json
+    from benchmarks.suite import compare_results, run_suite, save_results
+    # Keep per-episode log lines out of the timings and the report
+    logging.getLogger().setLevel(logging.WARNING)
+    cases = args.cases.split(",") if args.cases else None
+    results = run_suite(cases, scale=args.scale, repeat=args.repeat)
+    if args.output:
+        save_results(results, args.output)
+    print(json.dumps(results["results"], indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            comparison = compare_results(results, json.load(f), args.threshold)
+        for row in comparison:
+            flag = "  REGRESSION" if row["regression"] else ""
+            print(f"{row['case']:<16} {row['baseline_median_s']:.4f}s -> {row['median_s']:.4f}s (x{row['ratio']}){flag}")
+        if any(row["regression"] for row in comparison):
+            raise SystemExit(1)
+
+def cmd_serve(args):
+    import uvicorn
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from src.config.config_loader import load_app_config
+    from src.jobs.worker import scheduled_job_part
+    from src.serve.api import app as api_app
+
+    _init_db()
+    logger.info("Starting FastAPI server...")
+    scheduler = BackgroundScheduler()
+    app_config = load_app_config()
 
-    if args.remove_feed:
-        from src.config.config_loader import remove_feed_from_config
-        remove_feed_from_config(args.remove_feed)
+    # Schedule polling job
+    scheduler.add_job(lambda: scheduled_job_part(poll_feeds=True), 'interval', minutes=app_config.poll_interval_minutes, id='poll_feeds_job')
+    # Schedule processing job
+    scheduler.add_job(lambda: scheduled_job_part(process_episodes=True), 'interval', minutes=app_config.process_interval_minutes, id='process_episodes_job')
+    # Schedule cleanup job
+    scheduler.add_job(lambda: scheduled_job_part(cleanup_episodes=True), 'interval', minutes=app_config.cleanup_interval_minutes, id='cleanup_episodes_job')
+    # Schedule mark mining job (learns per-show rules from /mark labels)
+    scheduler.add_job(lambda: scheduled_job_part(mine_marks=True), 'interval', minutes=app_config.mark_mining_interval_minutes, id='mine_marks_job')
 
-    if args.process_episode:
-        logger.info(f"Processing episode ID: {args.process_episode}")
-        process_episode(args.process_episode)
-        logger.info("Episode processing complete.")
+    scheduler.start()
+    logger.info("Scheduler started. Press Ctrl+C to exit.")
+    uvicorn.run(api_app, host=args.host or app_config.PODCLEAN_BIND, port=args.port or app_config.PODCLEAN_PORT)
 
-    if args.list_episodes:
-        logger.info("Listing all episodes...")
-        with get_session() as session:
-            episodes = session.query(Episode).all()
-            if not episodes:
-                logger.info("No episodes found in the database.")
-            for e in episodes:
-                print(f'ID: {e.id}, Title: {e.title}, Show: {e.show_name}, Status: {e.status}')
-        logger.info("Episode listing complete.")
-
-    if args.serve:
-        logger.info("Starting FastAPI server...")
-        scheduler = BackgroundScheduler()
-        app_config = load_app_config()
-
-        # Schedule polling job
-        scheduler.add_job(lambda: scheduled_job_part(poll_feeds=True), 'interval', minutes=app_config.poll_interval_minutes, id='poll_feeds_job')
-        # Schedule processing job
-        scheduler.add_job(lambda: scheduled_job_part(process_episodes=True), 'interval', minutes=app_config.process_interval_minutes, id='process_episodes_job')
-        # Schedule cleanup job
-        scheduler.add_job(lambda: scheduled_job_part(cleanup_episodes=True), 'interval', minutes=app_config.cleanup_interval_minutes, id='cleanup_episodes_job')
-
-        scheduler.start()
-        logger.info("Scheduler started. Press Ctrl+C to exit.")
-        uvicorn.run(api_app, host="0.0.0.0", port=8080)
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Podemos CLI for podcast processing.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p = subparsers.add_parser("init-db", help="Initialize the database schema.")
+    p.set_defaults(func=cmd_init_db)
+
+    p = subparsers.add_parser("poll-feed", help="Poll a given RSS feed URL.")
+    p.add_argument("url", type=str)
+    p.add_argument("--limit", "--poll-limit", dest="limit", type=int, help="Limit the number of episodes to poll.")
+    p.set_defaults(func=cmd_poll_feed)
+
+    p = subparsers.add_parser("import-opml", help="Import podcasts from an OPML file.")
+    p.add_argument("path", type=str)
+    p.add_argument("--limit", "--poll-limit", dest="limit", type=int, help="Limit the number of episodes to poll per feed.")
+    p.set_defaults(func=cmd_import_opml)
+
+    p = subparsers.add_parser("add-feed", help="Add a new RSS feed URL to the configuration.")
+    p.add_argument("url", type=str)
+    p.set_defaults(func=cmd_add_feed)
+
+    p = subparsers.add_parser("remove-feed", help="Remove an RSS feed URL from the configuration.")
+    p.add_argument("url", type=str)
+    p.set_defaults(func=cmd_remove_feed)
+
+    p = subparsers.add_parser("process-episode", help="Process a specific episode by ID.")
+    p.add_argument("episode_id", type=int)
+    p.add_argument("--profile", action="store_true", help="Run under cProfile and save the profile as an episode artifact.")
+    p.set_defaults(func=cmd_process_episode)
+
+    p = subparsers.add_parser("list-episodes", help="List episodes in the database.")
+    p.add_argument("--status", type=str, help="Only list episodes with this status (comma-separated for several).")
+    p.add_argument("--show", type=str, help="Only list episodes of this show.")
+    p.set_defaults(func=cmd_list_episodes)
+
+    p = subparsers.add_parser("run-jobs", help="Run scheduled jobs once (for cron).")
+    p.add_argument("--poll", action="store_true", help="Poll configured feeds.")
+    p.add_argument("--process", action="store_true", help="Process downloaded episodes.")
+    p.add_argument("--cleanup", action="store_true", help="Apply the retention policy.")
+    p.add_argument("--mine-marks", action="store_true", help="Learn per-show rules from new /mark labels.")
+    p.set_defaults(func=cmd_run_jobs)
+
+    p = subparsers.add_parser("migrate-layout", help="Move existing media files into the sharded directory layout.")
+    p.add_argument("--mode", choices=("rename", "link"), default="rename", help="Rename files, or hardlink them and remove the old name after the DB is updated.")
+    p.add_argument("--dry-run", action="store_true", help="Only log what would be moved.")
+    p.set_defaults(func=cmd_migrate_layout)
+
+    p = subparsers.add_parser("storage-usage", help="Show recorded disk usage per show and artifact type.")
+    p.add_argument("--rescan", action="store_true", help="Rebuild the usage records from the files on disk first.")
+    p.set_defaults(func=cmd_storage_usage)
+
+    p = subparsers.add_parser("batch", help="Process the pending backlog in batches, loading each whisper model once per batch.")
+    p.add_argument("--stage", choices=("fast", "full", "all"), default="all", help="Fast pass (detect and cut), full transcription, or both.")
+    p.add_argument("--show", type=str, help="Only process episodes of this show.")
+    p.add_argument("--limit", type=int, help="Process at most this many episodes per stage.")
+    p.add_argument("--batch-size", type=int, default=8, help="Episodes per whisper.cpp process.")
+    p.set_defaults(func=cmd_batch)
+
+    p = subparsers.add_parser("bench", help="Time core pipeline functions on synthetic fixtures and save the results as JSON.")
+    p.add_argument("--cases", type=str, help="Comma-separated cases (default: all): slide, text_rules, keep_segments, chapters_remap, interval_algebra, rms_envelope, chapter_classifier, cli_startup, meta_feed, bulk_ingest, ffmpeg_cut.")
+    p.add_argument("--scale", type=float, default=1.0, help="Fixture size multiplier (compare only runs of the same scale).")
+    p.add_argument("--repeat", type=int, default=5, help="Timed runs per case, after one warm-up run.")
+    p.add_argument("--output", type=str, help="Write the results JSON here.")
+    p.add_argument("--compare", type=str, help="Baseline results JSON; exits non-zero when a case regressed.")
+    p.add_argument("--threshold", type=float, default=1.25, help="Median slowdown factor counted as a regression.")
+    p.set_defaults(func=cmd_bench)
+
+    p = subparsers.add_parser("serve", help="Start the FastAPI server and scheduler.")
+    p.add_argument("--host", type=str, help="Bind address (defaults to PODCLEAN_BIND).")
+    p.add_argument("--port", type=int, help="Port (defaults to PODCLEAN_PORT).")
+    p.set_defaults(func=cmd_serve)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
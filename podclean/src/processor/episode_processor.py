@@ -3,88 +3,193 @@ import json
 from sqlalchemy.orm import Session
 from src.store.db import get_session
 from src.store.models import Episode
-from src.detect.fusion import detect_ads_fast
+from src.detect.fusion import detect_ads_fast, apply_marks
+from src.detect.learned import episode_marks, get_learned_rules
+from src.detect.cache import StageCache
 from src.cut.plan import build_keep_segments
 from src.cut.ffmpeg_exec import cut_with_ffmpeg
 from src.cut.tags_chapters import adjust_chapters_after_cut, filter_ad_chapters
 from src.config.config_loader import load_app_config
 from src.config.config import AppConfig
 from src.transcribe.full_whisper import full_transcribe
-from src.transcribe.md_formatter import format_transcript_to_md
+from src.store.transcripts import write_transcript
+from src.store.paths import EpisodePaths
+from src.store.usage import record_artifact
+from src.store.metrics import span, file_size
+from src.store.dedup import reuse_duplicate_artifacts
+from src.dl.integrity import probe_audio
+from src.ingest.chapters import collect_chapters
+from src.serve.audio_cache import invalidate_audio_cache
+from src.jobs.governor import get_governor
+from src.store.states import complete_stage, fail_stage, has_reached, remaining_stages
+from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
-app_cfg: AppConfig = load_app_config()
-# Define the base directory for cleaned audio files
-CLEANED_DIR = os.path.join(app_cfg.PODCLEAN_MEDIA_BASE_PATH, 'cleaned')
-TRANSCRIPTS_DIR = os.path.join(app_cfg.PODCLEAN_MEDIA_BASE_PATH, 'transcripts')
-
-def perform_full_transcription(episode_id: int):
+def perform_full_transcription(episode_id: int, transcription_results: list = None):
+    """
+    Transcribes the cleaned audio with the full model. Batch mode passes in results it
+    already produced, so only the bookkeeping runs here.
+    """
     with get_session() as session:
         episode = session.query(Episode).filter_by(id=episode_id).first()
         if not episode:
             logger.error(f"Episode with ID {episode_id} not found for full transcription.")
             return
-        if episode.status == 'transcribed':
+        if has_reached(episode, 'transcribed'):
             logger.info(f"Episode {episode.id} already fully transcribed. Skipping.")
             return
-        if not episode.cleaned_file_path or not os.path.exists(episode.cleaned_file_path):
+        if not has_reached(episode, 'chapters') or not episode.cleaned_file_path or not os.path.exists(episode.cleaned_file_path):
             logger.warning(f"Cleaned audio file not found for episode ID {episode.id}. Cannot perform full transcription.")
-            episode.status = 'full_transcription_failed' # Or a more appropriate error status
-            session.add(episode)
-            session.commit()
+            fail_stage(session, episode, 'full_transcription_failed', "Cleaned audio not found")
             return
 
-        app_cfg = load_app_config() # Reload config for latest settings
+        if transcription_results is None:
+            app_cfg = load_app_config() # Reload config for latest settings
+            if not app_cfg.FULL_PASS_ENABLED:
+                logger.info(f"Full transcription pass is disabled for episode {episode.id}.")
+                return
 
-        if app_cfg.FULL_PASS_ENABLED:
             logger.info(f"Initiating full transcription for episode: {episode.title}")
-            full_model_size = app_cfg.FULL_MODEL
-            full_vad = app_cfg.FULL_VAD
-            full_beam = app_cfg.FULL_BEAM
-            full_word_ts = app_cfg.FULL_WORD_TS
-
-            transcription_results = full_transcribe(
-                episode.cleaned_file_path, 
-                model_size=full_model_size, 
-                vad=full_vad, 
-                beam_size=full_beam, 
-                word_timestamps=full_word_ts
-            )
-
-            if transcription_results:
-                episode.transcript_json = json.dumps(transcription_results)
-                episode.status = 'transcribed'
-                # Save JSON transcript to file
-                if not os.path.exists(TRANSCRIPTS_DIR):
-                    os.makedirs(TRANSCRIPTS_DIR)
-                transcript_filename = f"{os.path.splitext(os.path.basename(episode.cleaned_file_path))[0]}.json"
-                transcript_filepath = os.path.join(TRANSCRIPTS_DIR, transcript_filename)
-                with open(transcript_filepath, 'w') as f:
-                    json.dump(transcription_results, f, indent=4)
-                logger.info(f"Full JSON transcript saved to: {transcript_filepath}")
-
-                # Generate and save Markdown transcript
-                md_content = format_transcript_to_md(episode.transcript_json)
-                md_filename = f"{os.path.splitext(os.path.basename(episode.cleaned_file_path))[0]}.md"
-                md_filepath = os.path.join(TRANSCRIPTS_DIR, md_filename)
-                with open(md_filepath, 'w') as f:
-                    f.write(md_content)
-                episode.md_transcript_file_path = md_filepath
-                logger.info(f"Markdown transcript saved to: {md_filepath}")
-            else:
-                episode.status = 'full_transcription_failed'
-                logger.error(f"Full transcription failed for episode ID {episode.id}.")
-
-            session.add(episode)
-            session.commit()
-            session.refresh(episode)
-        else:
-            logger.info(f"Full transcription pass is disabled for episode {episode.id}.")
-
+            with get_governor().slot('full_transcribe', app_cfg.FULL_MODEL) as footprint, \
+                    span('full_transcribe', episode, bytes_in=file_size(episode.cleaned_file_path), audio_seconds=episode.cleaned_duration) as transcribe_span:
+                transcription_results = full_transcribe(
+                    episode.cleaned_file_path,
+                    model_size=app_cfg.FULL_MODEL,
+                    vad=app_cfg.FULL_VAD,
+                    beam_size=app_cfg.FULL_BEAM,
+                    word_timestamps=app_cfg.FULL_WORD_TS,
+                    threads=footprint.threads
+                )
+                transcribe_span.ok = bool(transcription_results)
+        if not transcription_results:
+            logger.error(f"Full transcription failed for episode ID {episode.id}.")
+            fail_stage(session, episode, 'full_transcription_failed', "Full transcription returned no segments")
+            return
 
-def process_episode(episode_id: int):
+        # Single canonical artifact; the Markdown view is rendered lazily when first requested
+        transcript_filepath = EpisodePaths.for_episode(episode).transcript
+        write_transcript(transcript_filepath, transcription_results)
+        record_artifact(session, episode, 'transcript', transcript_filepath)
+        complete_stage(session, episode, 'transcribed', transcript_file_path=transcript_filepath, transcript_json=None)
+        logger.info(f"Full transcript saved to: {transcript_filepath}")
+
+
+def _probe_stage(session, episode, app_cfg) -> bool:
+    # Episodes downloaded before probe results were stored are probed here; the rest already have them
+    if not episode.original_duration or not episode.probe_json:
+        probe = probe_audio(episode.original_file_path)
+        if not probe or not probe.get('duration'):
+            logger.error(f"Could not determine the duration of episode ID {episode.id}. Skipping processing.")
+            fail_stage(session, episode, 'probe_failed', "Audio probe failed")
+            return False
+        episode.probe_json = json.dumps(probe)
+        episode.original_duration = probe['duration']
+
+    # Chapters are free evidence: when they mark every ad, detection skips transcription
+    if not episode.chapters_json:
+        chapters_cache = EpisodePaths.for_episode(episode).chapters
+        chapters = collect_chapters(episode, chapters_cache)
+        if chapters:
+            episode.chapters_json = json.dumps(chapters)
+            logger.info(f"Found {len(chapters)} chapters for episode {episode.id}.")
+        if os.path.exists(chapters_cache):
+            record_artifact(session, episode, 'chapters', chapters_cache)
+
+    complete_stage(session, episode, 'probed')
+    return True
+
+
+def _detect_stage(session, episode, app_cfg) -> bool:
+    # Pass episode.show_name as show_slug for config loading
+    learned_rules = get_learned_rules(session, episode.show_name)
+    # Retries and re-processing after a mark reuse cached stages for the same audio and rules
+    cache = StageCache(session, episode.content_hash)
+    ad_cuts = detect_ads_fast(episode.original_file_path, episode, episode.show_name, learned_rules=learned_rules, cache=cache)
+    # The listener's own marks on this episode override detection
+    ad_cuts = apply_marks(ad_cuts, episode_marks(session, episode.id))
+    pcm_cache = EpisodePaths.for_episode(episode).pcm
+    if os.path.exists(pcm_cache):
+        record_artifact(session, episode, 'pcm', pcm_cache)
+    complete_stage(session, episode, 'detected', ad_segments_json=json.dumps(ad_cuts))
+    return True
+
+
+def _cut_stage(session, episode, app_cfg) -> bool:
+    keep_segments = build_keep_segments(episode.original_duration, json.loads(episode.ad_segments_json or '[]'))
+    cleaned_output_path = EpisodePaths.for_episode(episode).cleaned
+    os.makedirs(os.path.dirname(cleaned_output_path), exist_ok=True)
+
+    codec = app_cfg.encoding.codec
+    bitrate = app_cfg.encoding.bitrate
+    normalize_loudness = app_cfg.encoding.normalize_loudness
+
+    with get_governor().slot('cut') as footprint:
+        success = cut_with_ffmpeg(episode.original_file_path, keep_segments, cleaned_output_path, codec=codec, bitrate=bitrate,
+                                  normalize_loudness=normalize_loudness, threads=footprint.threads)
+    if not success:
+        logger.error(f"Failed to cut audio for episode ID {episode.id}.")
+        fail_stage(session, episode, 'cut_failed', "ffmpeg cut failed")
+        return False
+
+    record_artifact(session, episode, 'cleaned', cleaned_output_path)
+    complete_stage(
+        session, episode, 'cut',
+        cleaned_file_path=cleaned_output_path,
+        cleaned_duration=sum(end - start for start, end in keep_segments),
+        cleaned_file_size=os.path.getsize(cleaned_output_path),
+    )
+    invalidate_audio_cache(episode.source_guid)
+    logger.info(f"Cleaned audio saved to: {cleaned_output_path}")
+    return True
+
+
+def _chapters_stage(session, episode, app_cfg) -> bool:
+    adjusted_chapters = None
+    if episode.chapters_json:
+        keep_segments = build_keep_segments(episode.original_duration, json.loads(episode.ad_segments_json or '[]'))
+        filtered_chapters = filter_ad_chapters(json.loads(episode.chapters_json), episode.show_name)
+        adjusted_chapters = json.dumps(adjust_chapters_after_cut(filtered_chapters, keep_segments))
+        logger.info(f"Chapters adjusted for episode ID {episode.id}.")
+    complete_stage(session, episode, 'chapters', cleaned_chapters_json=adjusted_chapters, cleaned_ready_at=datetime.now())
+    return True
+
+
+# Initial processing, in stage order; full transcription runs separately under the backlog strategy
+STAGE_RUNNERS = {
+    'probed': _probe_stage,
+    'detected': _detect_stage,
+    'cut': _cut_stage,
+    'chapters': _chapters_stage,
+}
+
+# Name of each stage's span in stage_metrics and /metrics
+STAGE_SPANS = {
+    'probed': 'probe',
+    'detected': 'detect',
+    'cut': 'cut',
+    'chapters': 'chapters',
+}
+
+
+def _run_stage(session, episode, stage, app_cfg) -> bool:
+    with span(STAGE_SPANS[stage], episode) as stage_span:
+        ok = STAGE_RUNNERS[stage](session, episode, app_cfg)
+        stage_span.ok = ok
+        if stage != 'chapters': # Chapter remapping touches no audio
+            stage_span.bytes_in = file_size(episode.original_file_path)
+            stage_span.audio_seconds = episode.original_duration
+        if stage == 'cut' and ok:
+            stage_span.bytes_out = episode.cleaned_file_size
+    return ok
+
+
+def process_episode(episode_id: int, through: str = 'chapters'):
+    """
+    Runs the initial processing stages the episode has not completed yet, up to `through`,
+    resuming after its last checkpoint. Each stage commits its result in one short transaction.
+    """
     with get_session() as session:
         episode = session.query(Episode).filter_by(id=episode_id).first()
         if not episode:
@@ -93,73 +198,26 @@ def process_episode(episode_id: int):
 
         if not episode.original_file_path or not os.path.exists(episode.original_file_path):
             logger.warning(f"Original audio file not found for episode ID {episode_id}. Skipping processing.")
-            episode.status = 'original_missing'
+            fail_stage(session, episode, 'original_missing', "Original audio file not found")
+            return
+
+        # A copy of the same audio may have been processed since this one was downloaded
+        if not has_reached(episode, 'detected') and reuse_duplicate_artifacts(session, episode):
             session.add(episode)
             session.commit()
+            invalidate_audio_cache(episode.source_guid)
+            logger.info(f"Episode {episode.id} reuses the results of an identical episode; skipping processing.")
             return
 
-        logger.info(f"Processing episode: {episode.title}")
+        stages = remaining_stages(episode, through=through)
+        if not stages:
+            logger.info(f"Episode {episode.id} has no processing stages left.")
+            return
+        logger.info(f"Processing episode: {episode.title} (stages: {', '.join(stages)})")
         app_cfg = load_app_config()
-
-        # 1. Ad Detection (Fast Pass)
-        # Pass episode.show_name as show_slug for config loading
-        ad_cuts = detect_ads_fast(episode.original_file_path, episode, episode.show_name)
-        episode.ad_segments_json = json.dumps(ad_cuts) # Store detected ad segments
-        episode.fast_transcript_json = json.dumps(episode.fast_transcript_json) # Convert fast transcript to JSON string
-        session.add(episode)
-        session.commit()
-        session.refresh(episode)
-
-        # 2. Build Keep Segments
-        if not episode.original_duration:
-            logger.warning(f"original_duration not set for episode {episode.id}. Cannot accurately plan cuts. Using dummy duration.")
-            # TODO: Implement audio duration extraction (e.g., using ffprobe) if not already done by rss_poll
-            # For now, let's assume a dummy duration for testing purposes if not set
-            episode.original_duration = 3600 # Dummy 1 hour for testing
-            session.add(episode)
-            session.refresh(episode)
-
-        keep_segments = build_keep_segments(episode.original_duration, ad_cuts)
-
-        # 3. Cut with FFmpeg
-        if not os.path.exists(CLEANED_DIR):
-            os.makedirs(CLEANED_DIR)
-        
-        # Generate a unique filename for the cleaned audio
-        original_filename_with_query = os.path.basename(episode.original_file_path)
-        original_filename_base = os.path.splitext(original_filename_with_query.split('?')[0])[0]
-        file_extension = os.path.splitext(original_filename_with_query.split('?')[0])[1] or ".mp3"
-        cleaned_filename = f"{original_filename_base}_CLEAN{file_extension}"
-        cleaned_output_path = os.path.join(CLEANED_DIR, cleaned_filename)
-
-        codec = app_cfg.encoding.codec
-        bitrate = app_cfg.encoding.bitrate
-        normalize_loudness = app_cfg.encoding.normalize_loudness
-
-        success = cut_with_ffmpeg(episode.original_file_path, keep_segments, cleaned_output_path, codec=codec, bitrate=bitrate, normalize_loudness=normalize_loudness)
-
-        if success:
-            episode.cleaned_file_path = cleaned_output_path
-            episode.status = 'cut_ready_for_serving' # <--- NEW STATUS
-            logger.info(f"Cleaned audio saved to: {cleaned_output_path}")
-        else:
-            episode.status = 'cut_failed'
-            logger.error(f"Failed to cut audio for episode ID {episode_id}.")
-        
-        session.add(episode)
-        session.commit()
-        session.refresh(episode)
-
-        # 4. Adjust Chapters
-        if episode.chapters_json:
-            original_chapters = json.loads(episode.chapters_json)
-            filtered_chapters = filter_ad_chapters(original_chapters)
-            adjusted_chapters = adjust_chapters_after_cut(filtered_chapters, keep_segments)
-            episode.cleaned_chapters_json = json.dumps(adjusted_chapters)
-            session.add(episode)
-            session.commit()
-            session.refresh(episode)
-            logger.info(f"Chapters adjusted for episode ID {episode_id}.")
+        for stage in stages:
+            if not _run_stage(session, episode, stage, app_cfg):
+                return
 
         logger.info(f"Finished initial processing for episode: {episode.title} with status: {episode.status}")
 
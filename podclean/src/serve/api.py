@@ -1,34 +1,44 @@
-from fastapi import FastAPI, Response, HTTPException, Request, Form
-from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel
-from src.feed.meta_feed import build_meta_feed
-from src.store.db import init_db, get_session
-from src.store.models import Episode
-from src.processor.episode_processor import process_episode, perform_full_transcription # Import both
 from fastapi import FastAPI, Response, HTTPException, Request, Form, Depends
-from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse
+from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from pydantic import BaseModel
 from src.feed.meta_feed import build_meta_feed
 from src.store.db import init_db, get_session
-from src.store.models import Episode
+from src.store.models import Episode, ArtifactUsage
 from src.processor.episode_processor import process_episode, perform_full_transcription # Import both
-from src.config.config_loader import load_app_config, add_feed_to_config, remove_feed_from_config # Import config loader and feed management functions
+from src.config.config_loader import load_app_config, load_show_rules, add_feed_to_config, remove_feed_from_config # Import config loader and feed management functions
 from src.config.config import AppConfig # Import AppConfig
 from fastapi.staticfiles import StaticFiles # Import StaticFiles
 from sqlalchemy import func # Import func for counting
+from src.serve.audio import build_audio_response
+from src.serve.audio_cache import resolve_audio
+from src.serve.transcripts import build_gzip_artifact_response
+from src.store.transcripts import ensure_md_cache, md_cache_path
+from src.store.usage import record_artifact, usage_summary
+from src.detect.learned import record_mark, MARK_LABELS, MARK_TIMEBASES
+from src.store.states import SERVABLE_STATUSES
+from src.jobs.queue import queue_stats
+from src.jobs.governor import get_governor
+from src.jobs.profiling import list_profiles, PROFILE_SUFFIX
+from src.jobs.worker import request_rewind
+from src.serve.metrics import render_prometheus, PROMETHEUS_CONTENT_TYPE
+from starlette.concurrency import run_in_threadpool
+from src.store.listing import list_episodes_page, episode_row_to_dict, DEFAULT_PAGE_SIZE
+import os
+import secrets
+
+SERVE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 app = FastAPI()
 
-templates = Jinja2Templates(directory="podclean/src/serve/templates")
+templates = Jinja2Templates(directory=os.path.join(SERVE_DIR, "templates"))
 
 # Mount static files directory
-app.mount("/static", StaticFiles(directory="podclean/src/serve/static"), name="static")
+app.mount("/static", StaticFiles(directory=os.path.join(SERVE_DIR, "static")), name="static")
 
-# Basic Authentication setup
-security = HTTPBasic()
+# Basic Authentication setup (credentials are only required when feed_auth_enabled is set)
+security = HTTPBasic(auto_error=False)
 
 # Pydantic model for the /mark endpoint payload
 class MarkRequest(BaseModel):
@@ -36,6 +46,7 @@ class MarkRequest(BaseModel):
     start: float
     end: float
     label: str # "ad" or "not_ad"
+    timebase: str = "cleaned" # "cleaned" (times in the served episode) or "original"
 
 # Initialize the database when the application starts
 @app.on_event("startup")
@@ -45,10 +56,24 @@ async def startup_event():
     app.base_url = app_cfg.PODCLEAN_BASE_URL # Load base URL from config
 
 async def verify_feed_credentials(credentials: HTTPBasicCredentials = Depends(security)):
-    app_cfg = load_app_config()
+    app_cfg = load_app_config() # Cached; only re-read when app.yaml or the environment changes
     if app_cfg.feed_auth_enabled:
-        if not (credentials.username == app_cfg.feed_username and credentials.password == app_cfg.feed_password):
-            raise HTTPException(status_code=401, detail="Unauthorized")
+        if credentials is None or not (
+            secrets.compare_digest(credentials.username, app_cfg.feed_username)
+            and secrets.compare_digest(credentials.password, app_cfg.feed_password)
+        ):
+            raise HTTPException(status_code=401, detail="Unauthorized", headers={"WWW-Authenticate": "Basic"})
+    return True
+
+async def verify_admin_credentials(credentials: HTTPBasicCredentials = Depends(security)):
+    app_cfg = load_app_config()
+    if not app_cfg.admin_password:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set admin_password to enable them.")
+    if credentials is None or not (
+        secrets.compare_digest(credentials.username, app_cfg.admin_username)
+        and secrets.compare_digest(credentials.password, app_cfg.admin_password)
+    ):
+        raise HTTPException(status_code=401, detail="Unauthorized", headers={"WWW-Authenticate": "Basic"})
     return True
 
 @app.get("/feed.xml")
@@ -57,60 +82,35 @@ async def get_feed(auth_ok: bool = Depends(verify_feed_credentials)):
     base_url = app.base_url # Use the base_url from app state
     feed_content = build_meta_feed(base_url)
     return Response(content=feed_content, media_type="application/xml")
-from src.config.config import AppConfig # Import AppConfig
-from fastapi.staticfiles import StaticFiles # Import StaticFiles
-from sqlalchemy import func # Import func for counting
-
-app = FastAPI()
-
-templates = Jinja2Templates(directory="podclean/src/serve/templates")
-
-# Mount static files directory
-app.mount("/static", StaticFiles(directory="podclean/src/serve/static"), name="static")
-
-# Pydantic model for the /mark endpoint payload
-class MarkRequest(BaseModel):
-    episode_id: int
-    start: float
-    end: float
-    label: str # "ad" or "not_ad"
-
-# Initialize the database when the application starts
-@app.on_event("startup")
-async def startup_event():
-    init_db()
-    app_cfg: AppConfig = load_app_config()
-    app.base_url = app_cfg.PODCLEAN_BASE_URL # Load base URL from config
 
-@app.get("/feed.xml")
-async def get_feed():
-    # In a real application, base_url would come from config
-    base_url = app.base_url # Use the base_url from app state
-    feed_content = build_meta_feed(base_url)
-    return Response(content=feed_content, media_type="application/xml")
+@app.api_route("/audio/{episode_guid}.mp3", methods=["GET", "HEAD"])
+async def get_audio(request: Request, episode_guid: str):
+    entry = resolve_audio(episode_guid)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Audio file not found.")
 
-@app.get("/audio/{episode_guid}.mp3")
-async def get_audio(episode_guid: str):
-    with get_session() as session:
-        episode = session.query(Episode).filter_by(source_guid=episode_guid).first()
-        if not episode or (not episode.cleaned_file_path and not episode.original_file_path):
-            raise HTTPException(status_code=404, detail="Audio file not found.")
-        
-        file_path = episode.cleaned_file_path if episode.cleaned_file_path else episode.original_file_path
-        
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="Audio file not found on disk.")
-        
-        return FileResponse(path=file_path, media_type="audio/mpeg")
+    app_cfg = load_app_config()
+    return build_audio_response(
+        request,
+        episode_guid,
+        entry,
+        offload_mode=app_cfg.AUDIO_OFFLOAD_MODE,
+        offload_prefix=app_cfg.AUDIO_OFFLOAD_PREFIX,
+        media_base_path=app_cfg.PODCLEAN_MEDIA_BASE_PATH,
+    )
 
 @app.get("/transcripts/{episode_guid}.json")
-async def get_transcript(episode_guid: str):
+async def get_transcript(request: Request, episode_guid: str):
     with get_session() as session:
-        episode = session.query(Episode).filter_by(source_guid=episode_guid).first()
-        if not episode or not episode.transcript_json:
+        row = session.query(Episode.id, Episode.transcript_file_path).filter_by(source_guid=episode_guid).first()
+        if row and row.transcript_file_path and os.path.exists(row.transcript_file_path):
+            return build_gzip_artifact_response(request, row.transcript_file_path, "application/json")
+
+        # Legacy rows still carry the transcript in the DB
+        legacy = session.query(Episode.transcript_json).filter_by(source_guid=episode_guid).scalar() if row else None
+        if not legacy:
             raise HTTPException(status_code=404, detail="Transcript not found.")
-        
-        return Response(content=episode.transcript_json, media_type="application/json")
+        return Response(content=legacy, media_type="application/json")
 
 @app.get("/chapters/{episode_guid}.json")
 async def get_chapters(episode_guid: str):
@@ -122,22 +122,26 @@ async def get_chapters(episode_guid: str):
         return Response(content=episode.cleaned_chapters_json, media_type="application/json")
 
 @app.get("/transcripts/{episode_guid}.md")
-async def get_md_transcript(episode_guid: str):
+async def get_md_transcript(request: Request, episode_guid: str):
     with get_session() as session:
-        episode = session.query(Episode).filter_by(source_guid=episode_guid).first()
-        if not episode or not episode.md_transcript_file_path or not os.path.exists(episode.md_transcript_file_path):
-            raise HTTPException(status_code=404, detail="Markdown transcript not found.")
-        
-        with open(episode.md_transcript_file_path, 'r') as f:
-            content = f.read()
-        return Response(content=content, media_type="text/markdown")
+        row = session.query(Episode.id, Episode.show_name, Episode.transcript_file_path, Episode.md_transcript_file_path).filter_by(source_guid=episode_guid).first()
+    if row and row.transcript_file_path and os.path.exists(row.transcript_file_path):
+        newly_rendered = not os.path.exists(md_cache_path(row.transcript_file_path))
+        md_path = await run_in_threadpool(ensure_md_cache, row.transcript_file_path)
+        if newly_rendered:
+            with get_session() as session:
+                record_artifact(session, row, 'transcript', md_path)
+                session.commit()
+        return build_gzip_artifact_response(request, md_path, "text/markdown")
+    if row and row.md_transcript_file_path and os.path.exists(row.md_transcript_file_path):
+        return FileResponse(path=row.md_transcript_file_path, media_type="text/markdown")
+    raise HTTPException(status_code=404, detail="Markdown transcript not found.")
 
 @app.get("/new_episodes")
 async def get_new_episodes(limit: int = 10, offset: int = 0):
     with get_session() as session:
-        # For now, return episodes that have been processed (cut or transcribed)
-        # In a real scenario, this might involve a 'published' flag or a timestamp
-        episodes = session.query(Episode).filter(Episode.status.in_(['cut', 'transcribed']))\
+        # Episodes whose cleaned audio is ready (see src/store/states.py)
+        episodes = session.query(Episode).filter(Episode.status.in_(SERVABLE_STATUSES))\
                                         .order_by(Episode.pub_date.desc())\
                                         .offset(offset).limit(limit).all()
         
@@ -151,7 +155,7 @@ async def get_new_episodes(limit: int = 10, offset: int = 0):
                 "pub_date": ep.pub_date.isoformat(),
                 "cleaned_audio_url": f"{app.base_url}/audio/{ep.source_guid}.mp3" if ep.cleaned_file_path else None,
                 "original_audio_url": f"{app.base_url}/audio/{ep.source_guid}.mp3" if ep.original_file_path and not ep.cleaned_file_path else None,
-                "transcript_url": f"{app.base_url}/transcripts/{ep.source_guid}.json" if ep.transcript_json else None,
+                "transcript_url": f"{app.base_url}/transcripts/{ep.source_guid}.json" if ep.transcript_file_path or ep.transcript_json else None,
                 "status": ep.status,
                 "cleaned_duration": ep.cleaned_duration,
                 "cleaned_file_size": ep.cleaned_file_size,
@@ -167,22 +171,44 @@ async def get_new_episodes(limit: int = 10, offset: int = 0):
 async def get_status():
     with get_session() as session:
         episode_counts = session.query(Episode.status, func.count(Episode.id)).group_by(Episode.status).all()
-        return {"episode_counts": dict(episode_counts)}
+        storage = usage_summary(session)
+        storage["max_bytes"] = load_app_config().storage.max_bytes
+        return {"episode_counts": dict(episode_counts), "storage": storage, "queue": queue_stats.as_dict(),
+                "governor": get_governor().snapshot()}
+
+@app.get("/episodes")
+async def list_episodes(status: str = None, show: str = None, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
+    with get_session() as session:
+        try:
+            rows, next_cursor = list_episodes_page(session, status=status, show_name=show, cursor=cursor, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"episodes": [episode_row_to_dict(row) for row in rows], "next_cursor": next_cursor}
 
 @app.get("/")
-async def read_root(request: Request):
+async def read_root(request: Request, status: str = None, show: str = None, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
     with get_session() as session:
-        episodes = session.query(Episode).order_by(Episode.pub_date.desc()).all()
-        return templates.TemplateResponse("index.html", {"request": request, "episodes": episodes})
+        try:
+            episodes, next_cursor = list_episodes_page(session, status=status, show_name=show, cursor=cursor, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return templates.TemplateResponse(request, "index.html", {
+            "episodes": episodes,
+            "next_cursor": next_cursor,
+            "status": status or "",
+            "show": show or "",
+            "limit": limit,
+        })
 
 @app.post("/process_episode")
 async def process_episode_web(episode_id: int = Form(...)):
-    process_episode(episode_id)
+    # Detection and cutting block (and wait for governor slots), so keep them off the event loop
+    await run_in_threadpool(process_episode, episode_id)
     return RedirectResponse(url="/", status_code=303)
 
 @app.post("/perform_full_transcription")
 async def perform_full_transcription_web(episode_id: int = Form(...)):
-    perform_full_transcription(episode_id)
+    await run_in_threadpool(perform_full_transcription, episode_id)
     return RedirectResponse(url="/", status_code=303)
 
 @app.get("/feeds", response_class=HTMLResponse)
@@ -237,6 +263,46 @@ async def post_show_settings(
     except Exception as e:
         return RedirectResponse(url=f"/feeds/{show_name}/settings?message=Error saving settings: {e}&message_type=error", status_code=303)
 
+@app.get("/metrics")
+async def get_metrics():
+    def render():
+        with get_session() as session:
+            return render_prometheus(session)
+    return PlainTextResponse(await run_in_threadpool(render), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.post("/admin/episodes/{episode_id}/profile")
+async def request_episode_profile(episode_id: int, auth_ok: bool = Depends(verify_admin_credentials)):
+    """
+    Profiles the episode's next processing or full transcription run.
+    """
+    with get_session() as session:
+        episode = session.get(Episode, episode_id)
+        if episode is None:
+            raise HTTPException(status_code=404, detail="Episode not found")
+        episode.profile_requested = True
+        session.commit()
+    return {"episode_id": episode_id, "profile_requested": True}
+
+@app.get("/admin/profiles")
+async def get_profiles(episode_id: int = None, limit: int = 100, auth_ok: bool = Depends(verify_admin_credentials)):
+    with get_session() as session:
+        profiles = list_profiles(session, episode_id=episode_id, limit=limit)
+    for profile in profiles:
+        profile["summary_url"] = f"/admin/profiles/{profile['summary_artifact_id']}"
+        if profile["profile_artifact_id"]:
+            profile["profile_url"] = f"/admin/profiles/{profile['profile_artifact_id']}"
+    return {"profiles": profiles}
+
+@app.get("/admin/profiles/{artifact_id}")
+async def download_profile(artifact_id: int, auth_ok: bool = Depends(verify_admin_credentials)):
+    with get_session() as session:
+        artifact = session.query(ArtifactUsage).filter_by(id=artifact_id, kind='profile').first()
+        path = artifact.path if artifact else None
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "application/octet-stream" if path.endswith(PROFILE_SUFFIX) else "application/json"
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
+
 @app.get("/health")
 async def health_check():
     try:
@@ -247,25 +313,28 @@ async def health_check():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Health check failed: {e}")
 
-@app.post("/mark")
+@app.post("/mark", status_code=202)
 async def post_mark(mark_request: MarkRequest):
     with get_session() as session:
         episode = session.query(Episode).filter_by(id=mark_request.episode_id).first()
         if not episode:
             raise HTTPException(status_code=404, detail="Episode not found.")
 
-        # For now, just print the mark. In a real implementation, this would
-        # store the mark and trigger a re-processing of the episode.
-        print(f"Received mark for episode {mark_request.episode_id}: "
-              f"start={mark_request.start}, end={mark_request.end}, label={mark_request.label}")
-        
-        # TODO: Store the mark in the database (e.g., in a new table or as part of episode.ad_segments_json)
-        # For now, we'll just reprocess the episode to demonstrate the flow.
-        # This will re-run ad detection and cutting with potentially updated rules/overrides.
-        # In a more sophisticated system, marks would influence future detection.
-        process_episode(mark_request.episode_id)
-
-        return {"message": "Mark received and episode re-processing initiated."}
+        if mark_request.label not in MARK_LABELS:
+            raise HTTPException(status_code=400, detail=f"label must be one of {', '.join(MARK_LABELS)}.")
+        if mark_request.timebase not in MARK_TIMEBASES:
+            raise HTTPException(status_code=400, detail=f"timebase must be one of {', '.join(MARK_TIMEBASES)}.")
+        if mark_request.end <= mark_request.start:
+            raise HTTPException(status_code=400, detail="end must be after start.")
+
+        # Stored in original-audio time; the mining job learns show rules from it and
+        # re-processing applies it to this episode
+        record_mark(session, episode, mark_request.start, mark_request.end, mark_request.label, mark_request.timebase)
+        session.commit()
+        # Detection onwards runs again on the worker's next pass; cached detection stages make that cheap
+        request_rewind(session, episode, 'probed')
+
+        return {"message": "Mark saved; the episode will be re-processed."}
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,158 @@
+import os
+from typing import Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse, Response
+
+from src.serve.audio_cache import AudioEntry, invalidate_audio_cache
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def etag_matches(header_value: str, etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against our ETag.
+    """
+    if not header_value:
+        return False
+    if header_value.strip() == "*":
+        return True
+    for candidate in header_value.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def parse_range_header(value: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single "bytes=" Range header into an inclusive (start, end) pair.
+
+    Returns None when the header should be ignored (missing, malformed or multi-range),
+    in which case the whole file is served. Raises RangeNotSatisfiable for ranges
+    that start past the end of the file.
+    """
+    if not value:
+        return None
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            # Suffix range: the last N bytes
+            suffix = int(last)
+            if suffix <= 0:
+                raise RangeNotSatisfiable()
+            start, end = max(0, size - suffix), size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+class AudioFileResponse(Response):
+    """
+    Streams a byte range of an audio file.
+
+    Uses the ASGI "http.response.zerocopysend" extension (sendfile) when the server
+    offers it, otherwise falls back to positional reads in a worker thread.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, guid: str, entry: AudioEntry, byte_range: Optional[Tuple[int, int]] = None, media_type: str = "audio/mpeg"):
+        self.guid = guid
+        self.entry = entry
+        self.byte_range = byte_range
+        self.status_code = 206 if byte_range else 200
+        self.media_type = media_type
+        self.background = None
+
+        start, end = byte_range or (0, entry.size - 1)
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": entry.etag,
+            "content-length": str(max(0, end - start + 1)),
+        }
+        if byte_range:
+            headers["content-range"] = f"bytes {start}-{end}/{entry.size}"
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        try:
+            f = await anyio.to_thread.run_sync(open, self.entry.path, "rb")
+        except FileNotFoundError:
+            invalidate_audio_cache(self.guid)
+            return await PlainTextResponse("Audio file not found on disk.", status_code=404)(scope, receive, send)
+
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            start, end = self.byte_range or (0, self.entry.size - 1)
+            count = max(0, end - start + 1)
+
+            if scope["method"].upper() == "HEAD" or count == 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            elif "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({"type": "http.response.zerocopysend", "file": f, "offset": start, "count": count, "more_body": False})
+            else:
+                fd = f.fileno()
+                offset = start
+                remaining = count
+                while remaining > 0:
+                    chunk = await anyio.to_thread.run_sync(os.pread, fd, min(self.chunk_size, remaining), offset)
+                    if not chunk:
+                        break
+                    offset += len(chunk)
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+                if remaining > 0:
+                    # File shrank underneath us; close the body and force a fresh stat next time.
+                    invalidate_audio_cache(self.guid)
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            f.close()
+
+
+def build_audio_response(request, guid: str, entry: AudioEntry, offload_mode: str = "none", offload_prefix: str = "", media_base_path: str = None) -> Response:
+    """
+    Builds the response for an audio request: 304 on a matching If-None-Match,
+    an X-Accel-Redirect/X-Sendfile hand-off when a front proxy serves the bytes,
+    or a full/partial AudioFileResponse.
+    """
+    request_headers = Headers(scope=request.scope)
+
+    if etag_matches(request_headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers={"etag": entry.etag, "accept-ranges": "bytes"})
+
+    if offload_mode == "x-accel-redirect":
+        relative_path = os.path.relpath(entry.path, media_base_path) if media_base_path else os.path.basename(entry.path)
+        internal_uri = f"{offload_prefix.rstrip('/')}/{relative_path.replace(os.sep, '/')}"
+        return Response(status_code=200, media_type="audio/mpeg", headers={"x-accel-redirect": internal_uri, "etag": entry.etag})
+    if offload_mode == "x-sendfile":
+        return Response(status_code=200, media_type="audio/mpeg", headers={"x-sendfile": os.path.abspath(entry.path), "etag": entry.etag})
+
+    byte_range = None
+    if_range = request_headers.get("if-range")
+    if if_range is None or if_range.strip() == entry.etag:
+        try:
+            byte_range = parse_range_header(request_headers.get("range"), entry.size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={"content-range": f"bytes */{entry.size}", "etag": entry.etag})
+
+    return AudioFileResponse(guid, entry, byte_range)
@@ -0,0 +1,112 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from src.store.db import get_session
+from src.store.models import Episode
+from src.store.paths import EpisodePaths
+
+
+class AudioEntry(NamedTuple):
+    path: str
+    size: int
+    mtime: float
+    etag: str
+    mtime_ns: int = 0
+    pending_cleaned: Optional[str] = None # Where the cleaned file will appear while the original is served
+
+
+class AudioLocationCache:
+    """
+    In-memory LRU of episode guid -> AudioEntry.
+
+    Entries are dropped when an episode changes state in this process (see
+    invalidate_audio_cache), and revalidated with one stat on every hit for changes made by
+    other processes (cron-run workers, migrate-layout), so repeated Range requests from
+    podcast players skip the DB lookup.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, AudioEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, guid: str) -> Optional[AudioEntry]:
+        with self._lock:
+            entry = self._entries.get(guid)
+            if entry is not None:
+                self._entries.move_to_end(guid)
+            return entry
+
+    def put(self, guid: str, entry: AudioEntry):
+        with self._lock:
+            self._entries[guid] = entry
+            self._entries.move_to_end(guid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, guid: str = None):
+        with self._lock:
+            if guid is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(guid, None)
+
+
+audio_cache = AudioLocationCache()
+
+
+def invalidate_audio_cache(guid: str = None):
+    """
+    Drops the cached audio location for an episode (or all episodes if guid is None).
+    Call this whenever an episode's cleaned/original file changes.
+    """
+    audio_cache.invalidate(guid)
+
+
+def make_etag(size: int, mtime_ns: int) -> str:
+    return f'"{size:x}-{mtime_ns:x}"'
+
+
+def _still_valid(entry: AudioEntry) -> bool:
+    # The file was replaced or removed, or the episode got its cleaned file, since the entry was cached
+    try:
+        st = os.stat(entry.path)
+    except OSError:
+        return False
+    if (st.st_size, st.st_mtime_ns) != (entry.size, entry.mtime_ns):
+        return False
+    return not (entry.pending_cleaned and os.path.exists(entry.pending_cleaned))
+
+
+def resolve_audio(guid: str) -> Optional[AudioEntry]:
+    """
+    Returns the AudioEntry for an episode, preferring the cleaned file over the original.
+    Cache hits cost one stat; only misses and stale entries touch the database.
+    """
+    entry = audio_cache.get(guid)
+    if entry is not None:
+        if _still_valid(entry):
+            return entry
+        audio_cache.invalidate(guid)
+
+    with get_session() as session:
+        row = session.query(Episode.cleaned_file_path, Episode.original_file_path, Episode.source_guid,
+                            Episode.show_name, Episode.title, Episode.original_audio_url).filter_by(source_guid=guid).first()
+    if not row:
+        return None
+
+    file_path = row.cleaned_file_path or row.original_file_path
+    if not file_path:
+        return None
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+
+    pending_cleaned = None if row.cleaned_file_path else EpisodePaths.for_episode(row).cleaned
+    entry = AudioEntry(path=file_path, size=st.st_size, mtime=st.st_mtime, etag=make_etag(st.st_size, st.st_mtime_ns),
+                       mtime_ns=st.st_mtime_ns, pending_cleaned=pending_cleaned)
+    audio_cache.put(guid, entry)
+    return entry
@@ -0,0 +1,107 @@
+import math
+
+from sqlalchemy import case, func
+
+from src.jobs.queue import queue_stats
+from src.store.metrics import StageStats, stage_stats
+from src.store.models import Episode, StageMetric
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram_lines(name: str, help_text: str, field: str, stages: dict) -> list:
+    """
+    Cumulative histogram per stage of one StageStats histogram.
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for stage, entry in stages.items():
+        histogram, cumulative = entry[field], 0
+        for bound, count in zip(StageStats.HISTOGRAMS[field], histogram['buckets']):
+            cumulative += count
+            lines.append(f'{name}_bucket{{stage="{_label(stage)}",le="{_number(bound)}"}} {cumulative}')
+        lines.append(f'{name}_sum{{stage="{_label(stage)}"}} {_number(float(histogram["sum"]))}')
+        lines.append(f'{name}_count{{stage="{_label(stage)}"}} {histogram["count"]}')
+    return lines
+
+
+def _counter_lines(name: str, help_text: str, field: str, stages: dict) -> list:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    for stage, entry in stages.items():
+        lines.append(f'{name}{{stage="{_label(stage)}"}} {_number(entry[field])}')
+    return lines
+
+
+def _recent_stage_lines(session) -> list:
+    """
+    Gauges over the stage_metrics retention window, from a single grouped query. They cover
+    spans of every process sharing the database (e.g. cron-run workers), and drop as old spans
+    are pruned.
+    """
+    rows = session.query(StageMetric.stage, func.count(StageMetric.id), func.sum(case((StageMetric.ok.is_(False), 1), else_=0)),
+                         func.avg(StageMetric.duration_seconds), func.avg(StageMetric.real_time_factor))\
+                  .group_by(StageMetric.stage).all()
+    values = {stage: stage_values for stage, *stage_values in rows}
+    gauges = (
+        ("podclean_stage_recent_runs", "Stage runs recorded within the metrics retention window."),
+        ("podclean_stage_recent_failures", "Failed stage runs recorded within the metrics retention window."),
+        ("podclean_stage_recent_duration_seconds_avg", "Mean stage duration within the metrics retention window."),
+        ("podclean_stage_recent_real_time_factor_avg", "Mean real-time factor within the metrics retention window."),
+    )
+    lines = []
+    for i, (name, help_text) in enumerate(gauges):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        for stage, stage_values in values.items():
+            if stage_values[i] is not None:
+                lines.append(f'{name}{{stage="{_label(stage)}"}} {_number(stage_values[i])}')
+    return lines
+
+
+def _queue_lines() -> list:
+    stats = queue_stats.as_dict()
+    bounds = [math.inf if b == "inf" else b for b in stats["bucket_upper_bounds_seconds"]]
+    lines = ["# HELP podclean_queue_depth Jobs waiting in the last queue built, per priority class.",
+             "# TYPE podclean_queue_depth gauge"]
+    for priority_class, entry in stats["classes"].items():
+        lines.append(f'podclean_queue_depth{{class="{priority_class}"}} {entry["depth"]}')
+    lines += ["# HELP podclean_queue_wait_seconds Time jobs waited before starting, per priority class.",
+              "# TYPE podclean_queue_wait_seconds histogram"]
+    for priority_class, entry in stats["classes"].items():
+        cumulative = 0
+        for bound, count in zip(bounds, entry["started_wait_buckets"]):
+            cumulative += count
+            lines.append(f'podclean_queue_wait_seconds_bucket{{class="{priority_class}",le="{_number(bound)}"}} {cumulative}')
+        lines.append(f'podclean_queue_wait_seconds_sum{{class="{priority_class}"}} {_number(float(entry["started_wait_seconds_sum"]))}')
+        lines.append(f'podclean_queue_wait_seconds_count{{class="{priority_class}"}} {cumulative}')
+    return lines
+
+
+def render_prometheus(session) -> str:
+    """
+    Prometheus text exposition of the stage spans finished in this process (monotonic counters
+    and histograms), gauges over the recorded spans' retention window, episode counts by status
+    and the job queue of this process.
+    """
+    stages = stage_stats.as_dict()
+    lines = _histogram_lines("podclean_stage_duration_seconds", "Wall-clock time of each pipeline stage.", 'duration_seconds', stages)
+    lines += _histogram_lines("podclean_stage_real_time_factor", "Seconds of audio processed per second of wall-clock time.", 'real_time_factor', stages)
+    lines += _counter_lines("podclean_stage_audio_seconds_total", "Audio processed per stage.", 'audio_seconds', stages)
+    lines += _counter_lines("podclean_stage_bytes_in_total", "Bytes read per stage.", 'bytes_in', stages)
+    lines += _counter_lines("podclean_stage_bytes_out_total", "Bytes written per stage.", 'bytes_out', stages)
+    lines += _counter_lines("podclean_stage_failures_total", "Failed stage runs.", 'failures', stages)
+    lines += _recent_stage_lines(session)
+
+    lines += ["# HELP podclean_episodes Episodes by status.", "# TYPE podclean_episodes gauge"]
+    for status, count in session.query(Episode.status, func.count(Episode.id)).group_by(Episode.status):
+        lines.append(f'podclean_episodes{{status="{_label(status)}"}} {count}')
+    lines += _queue_lines()
+    return "\n".join(lines) + "\n"
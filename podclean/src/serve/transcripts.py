@@ -0,0 +1,39 @@
+import os
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+from src.serve.audio import etag_matches
+from src.serve.audio_cache import make_etag
+from src.store.transcripts import iter_transcript_bytes
+
+
+def accepts_gzip(request_headers: Headers) -> bool:
+    for coding in request_headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*") and params.replace(" ", "") != "q=0":
+            return True
+    return False
+
+
+def build_gzip_artifact_response(request, gz_path: str, media_type: str) -> Response:
+    """
+    Serves a precompressed artifact: the .gz file as-is when the client accepts gzip,
+    otherwise a decompressing stream. Both variants carry their own ETag and honour If-None-Match.
+    """
+    st = os.stat(gz_path)
+    request_headers = Headers(scope=request.scope)
+    use_gzip = accepts_gzip(request_headers)
+
+    etag = make_etag(st.st_size, st.st_mtime_ns)
+    if use_gzip:
+        etag = etag[:-1] + '-gz"'
+    headers = {"etag": etag, "vary": "Accept-Encoding"}
+
+    if etag_matches(request_headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if use_gzip:
+        headers["content-encoding"] = "gzip"
+        return FileResponse(gz_path, media_type=media_type, headers=headers, stat_result=st)
+    return StreamingResponse(iter_transcript_bytes(gz_path), media_type=media_type, headers=headers)
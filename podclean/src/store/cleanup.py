@@ -1,13 +1,148 @@
 import os
+import queue
 import logging
+import threading
+from collections import defaultdict
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, func, or_
 from src.store.db import get_session
-from src.store.models import Episode
+from src.store.models import Episode, ArtifactUsage, DetectionCache
+from src.store.paths import episode_artifact_paths
+from src.store.usage import total_usage_bytes, forget_artifacts, forget_episode_artifacts, link_counts, usage_file_key
 from src.config.config_loader import load_app_config
+from src.serve.audio_cache import invalidate_audio_cache
 
 logger = logging.getLogger(__name__)
 
+DELETE_CHUNK_SIZE = 500
+
+# Columns needed to locate an episode's files; never loads transcripts or other blobs
+ARTIFACT_COLUMNS = (
+    Episode.id,
+    Episode.source_guid,
+    Episode.original_file_path,
+    Episode.cleaned_file_path,
+    Episode.transcript_file_path,
+    Episode.md_transcript_file_path,
+    Episode.content_hash,
+)
+
+class BackgroundUnlinker:
+    """
+    Deletes files on a background thread so DB transactions never wait on the filesystem.
+    Each batch is grouped by directory and unlinked relative to one open directory fd,
+    which saves a full path lookup per file on large directories.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, paths):
+        paths = [p for p in paths if p]
+        if not paths:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="podclean-unlinker", daemon=True)
+                self._thread.start()
+        self._queue.put(paths)
+
+    def drain(self):
+        """
+        Blocks until every submitted path has been processed (for one-shot CLI runs).
+        """
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            paths = self._queue.get()
+            try:
+                self.unlink_batch(paths)
+            except Exception as e:
+                logger.error(f"Error deleting files: {e}")
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def unlink_batch(paths) -> int:
+        by_dir = defaultdict(list)
+        for path in paths:
+            directory, name = os.path.split(os.path.abspath(path))
+            by_dir[directory].append(name)
+
+        deleted = 0
+        for directory, names in by_dir.items():
+            try:
+                dir_fd = os.open(directory, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                for name in names:
+                    try:
+                        os.unlink(name, dir_fd=dir_fd)
+                        deleted += 1
+                    except FileNotFoundError:
+                        pass
+            finally:
+                os.close(dir_fd)
+        logger.info(f"Deleted {deleted} files in {len(by_dir)} directories.")
+        return deleted
+
+file_unlinker = BackgroundUnlinker()
+
+def find_expired_episode_ids(session, max_episodes_per_show: int, max_days_per_episode: int, now: datetime = None) -> list:
+    """
+    Returns the IDs of episodes past the per-show count limit or the age limit, in one windowed query.
+    """
+    cutoff_date = (now or datetime.now()) - timedelta(days=max_days_per_episode)
+    ranked = select(
+        Episode.id,
+        Episode.pub_date,
+        func.row_number().over(
+            partition_by=Episode.show_name,
+            order_by=(Episode.pub_date.desc(), Episode.id.desc()),
+        ).label('show_rank'),
+    ).subquery()
+    query = select(ranked.c.id).where(or_(ranked.c.show_rank > max_episodes_per_show, ranked.c.pub_date < cutoff_date))
+    return list(session.execute(query).scalars())
+
+def _forget_orphaned_detection_results(session, content_hashes: set):
+    """
+    Drops cached detection results for audio no remaining episode uses. Does not commit.
+    """
+    if not content_hashes:
+        return
+    still_used = set(session.execute(select(Episode.content_hash).where(Episode.content_hash.in_(content_hashes))).scalars())
+    orphaned = content_hashes - still_used
+    if orphaned:
+        session.execute(delete(DetectionCache).where(DetectionCache.content_hash.in_(orphaned)))
+
+def delete_episodes(session, episode_ids: list, media_base_path: str = None) -> int:
+    """
+    Deletes episodes in chunks, one short transaction each, and hands their files to the
+    background unlinker once the rows are gone.
+    """
+    deleted = 0
+    for i in range(0, len(episode_ids), DELETE_CHUNK_SIZE):
+        chunk = episode_ids[i:i + DELETE_CHUNK_SIZE]
+        rows = session.query(*ARTIFACT_COLUMNS).filter(Episode.id.in_(chunk)).all()
+        # Recorded artifacts include files with no column on the episode (e.g. profiles)
+        recorded = [path for (path,) in session.query(ArtifactUsage.path).filter(ArtifactUsage.episode_id.in_(chunk))]
+        session.execute(delete(Episode).where(Episode.id.in_(chunk)))
+        forget_episode_artifacts(session, chunk)
+        _forget_orphaned_detection_results(session, {row.content_hash for row in rows if row.content_hash})
+        session.commit()
+
+        paths = recorded
+        for row in rows:
+            paths.extend(episode_artifact_paths(row, media_base_path))
+            invalidate_audio_cache(row.source_guid)
+        file_unlinker.submit(paths)
+        deleted += len(rows)
+    return deleted
+
 def cleanup_old_episodes():
     app_config = load_app_config()
     if not app_config.retention_policy.enabled:
@@ -20,60 +155,108 @@ def cleanup_old_episodes():
     logger.info(f"Running cleanup job: max_episodes_per_show={max_episodes_per_show}, max_days_per_episode={max_days_per_episode} days.")
 
     with get_session() as session:
-        # Group episodes by show
-        shows = session.query(Episode.show_name).distinct().all()
-
-        for show_name_tuple in shows:
-            show_name = show_name_tuple[0]
-            logger.info(f"Processing show: {show_name}")
-
-            # Order episodes by publication date (newest first)
-            episodes_for_show = session.query(Episode).filter_by(show_name=show_name).order_by(Episode.pub_date.desc()).all()
-
-            # Apply max_episodes_per_show policy
-            if len(episodes_for_show) > max_episodes_per_show:
-                episodes_to_delete_by_count = episodes_for_show[max_episodes_per_show:]
-                logger.info(f"  - Marking {len(episodes_to_delete_by_count)} episodes for deletion based on max_episodes_per_show policy.")
-            else:
-                episodes_to_delete_by_count = []
-
-            # Apply max_days_per_episode policy
-            cutoff_date = datetime.now() - timedelta(days=max_days_per_episode)
-            episodes_to_delete_by_age = [e for e in episodes_for_show if e.pub_date < cutoff_date]
-            logger.info(f"  - Marking {len(episodes_to_delete_by_age)} episodes for deletion based on max_days_per_episode policy.")
-
-            # Combine and deduplicate episodes to delete
-            all_episodes_to_delete = list(set(episodes_to_delete_by_count + episodes_to_delete_by_age))
-
-            if all_episodes_to_delete:
-                for episode in all_episodes_to_delete:
-                    logger.info(f"  - Deleting episode: {episode.title} (ID: {episode.id})")
-                    # Delete associated files
-                    if episode.original_file_path and os.path.exists(episode.original_file_path):
-                        os.remove(episode.original_file_path)
-                        logger.info(f"    - Deleted original file: {episode.original_file_path}")
-                    if episode.cleaned_file_path and os.path.exists(episode.cleaned_file_path):
-                        os.remove(episode.cleaned_file_path)
-                        logger.info(f"    - Deleted cleaned file: {episode.cleaned_file_path}")
-                    if episode.md_transcript_file_path and os.path.exists(episode.md_transcript_file_path):
-                        os.remove(episode.md_transcript_file_path)
-                        logger.info(f"    - Deleted Markdown transcript: {episode.md_transcript_file_path}")
-                    if episode.transcript_json: # Assuming JSON transcript is saved as a file
-                        # Construct JSON transcript path (similar logic as episode_processor)
-                        cleaned_filename_base = os.path.splitext(os.path.basename(episode.cleaned_file_path).split('?')[0])[0]
-                        json_transcript_path = os.path.join(load_app_config().PODCLEAN_MEDIA_BASE_PATH, 'transcripts', f"{cleaned_filename_base}.json")
-                        if os.path.exists(json_transcript_path):
-                            os.remove(json_transcript_path)
-                            logger.info(f"    - Deleted JSON transcript: {json_transcript_path}")
-
-                    session.delete(episode)
-                session.commit()
-                logger.info(f"  - Deleted {len(all_episodes_to_delete)} episodes for show {show_name}.")
-            else:
-                logger.info(f"  - No episodes to delete for show {show_name}.")
+        expired_ids = find_expired_episode_ids(session, max_episodes_per_show, max_days_per_episode)
+        if not expired_ids:
+            logger.info("No episodes to delete.")
+        else:
+            deleted = delete_episodes(session, expired_ids, app_config.PODCLEAN_MEDIA_BASE_PATH)
+            logger.info(f"Deleted {deleted} episodes; their files are being removed in the background.")
 
     logger.info("Cleanup job complete.")
 
+def _take_until(session, query, needed_bytes: int, unit_column: str):
+    """
+    Streams candidate artifact rows (with file_key, links and size_bytes) in eviction order and
+    returns the rows of the shortest prefix of units (a file, or a whole episode) that frees
+    needed_bytes, with the bytes freed. A hardlinked file only frees its bytes once every link
+    to it is taken.
+    """
+    taken, freed = [], 0
+    links_left = {}
+    unit = None
+    result = session.execute(query.execution_options(yield_per=500))
+    try:
+        for row in result:
+            if getattr(row, unit_column) != unit:
+                if freed >= needed_bytes:
+                    break
+                unit = getattr(row, unit_column)
+            taken.append(row)
+            links_left[row.file_key] = links_left.get(row.file_key, row.links) - 1
+            if links_left[row.file_key] == 0:
+                freed += row.size_bytes or 0
+    finally:
+        result.close()
+    return taken, freed
+
+def _with_links(*columns):
+    links = link_counts()
+    return select(*columns, ArtifactUsage.path, ArtifactUsage.size_bytes, links.c.file_key, links.c.links)\
+        .select_from(ArtifactUsage).join(links, links.c.file_key == usage_file_key())
+
+def enforce_storage_budget(session, max_bytes: int, evict_originals: bool = True, media_base_path: str = None) -> dict:
+    """
+    Deletes artifacts until recorded usage fits in max_bytes, cheapest to recreate first:
+    originals of episodes that already have a cleaned copy, then PCM analysis caches,
+    then whole episodes, oldest first. Returns bytes freed per tier. Usage counts each inode
+    once, so deleting one of several hardlinks frees nothing until the last one goes.
+    """
+    freed = {"original": 0, "pcm": 0, "episodes": 0}
+    excess = total_usage_bytes(session) - max_bytes
+    if excess <= 0:
+        return freed
+
+    if evict_originals:
+        query = _with_links(Episode.id, Episode.source_guid)\
+            .join(Episode, Episode.id == ArtifactUsage.episode_id)\
+            .where(ArtifactUsage.kind == 'original', Episode.cleaned_file_path.isnot(None), Episode.original_file_path == ArtifactUsage.path)\
+            .order_by(Episode.pub_date.asc(), Episode.id.asc())
+        rows, freed["original"] = _take_until(session, query, excess, 'path')
+        if rows:
+            session.query(Episode).filter(Episode.id.in_([r.id for r in rows])).update({Episode.original_file_path: None}, synchronize_session=False)
+            forget_artifacts(session, [r.path for r in rows])
+            session.commit()
+            for row in rows:
+                invalidate_audio_cache(row.source_guid)
+            file_unlinker.submit([r.path for r in rows])
+            excess -= freed["original"]
+
+    if excess > 0:
+        query = _with_links().where(ArtifactUsage.kind == 'pcm').order_by(ArtifactUsage.recorded_at.asc())
+        rows, freed["pcm"] = _take_until(session, query, excess, 'path')
+        if rows:
+            forget_artifacts(session, [r.path for r in rows])
+            session.commit()
+            file_unlinker.submit([r.path for r in rows])
+            excess -= freed["pcm"]
+
+    if excess > 0:
+        query = _with_links(Episode.id)\
+            .join(Episode, Episode.id == ArtifactUsage.episode_id)\
+            .order_by(Episode.pub_date.asc(), Episode.id.asc())
+        rows, freed["episodes"] = _take_until(session, query, excess, 'id')
+        if rows:
+            delete_episodes(session, list(dict.fromkeys(r.id for r in rows)), media_base_path)
+            excess -= freed["episodes"]
+
+    if excess > 0:
+        logger.warning(f"Storage still {excess} bytes over budget after eviction.")
+    return freed
+
+def apply_storage_budget():
+    app_config = load_app_config()
+    max_bytes = app_config.storage.max_bytes
+    if not max_bytes:
+        logger.info("No storage budget configured. Skipping eviction.")
+        return
+
+    with get_session() as session:
+        freed = enforce_storage_budget(session, max_bytes, app_config.storage.evict_originals_after_cut, app_config.PODCLEAN_MEDIA_BASE_PATH)
+        if any(freed.values()):
+            logger.info(f"Storage eviction freed {sum(freed.values())} bytes: {freed}")
+        else:
+            logger.info(f"Storage usage is within the {max_bytes} byte budget.")
+
 if __name__ == "__main__":
     # Example usage (requires a populated database and app.yaml configured)
     # from src.store.db import init_db
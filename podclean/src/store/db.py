@@ -1,24 +1,62 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 from src.store.models import Base
 from src.config.config_loader import load_app_config
 from src.config.config import AppConfig
 import os
 from contextlib import contextmanager
-
-app_config: AppConfig = load_app_config()
-MEDIA_BASE_PATH = app_config.PODCLEAN_MEDIA_BASE_PATH
-DATABASE_URL = f"sqlite:///{os.path.join(MEDIA_BASE_PATH, 'db.sqlite3')}"
+from datetime import datetime
 
 engine = None
 SessionLocal = None
 
-def init_db(database_url: str = DATABASE_URL):
+# Values given to existing rows when these columns are added, instead of NULL
+COLUMN_BACKFILLS = {
+    ('episodes', 'status_changed_at'): datetime.now, # queue aging of old backlog starts at the upgrade
+}
+
+def get_database_url() -> str:
+    """
+    Returns the SQLite URL under PODCLEAN_MEDIA_BASE_PATH. Resolved on demand so importing
+    this module does not load the app config.
+    """
+    app_config: AppConfig = load_app_config()
+    os.makedirs(app_config.PODCLEAN_MEDIA_BASE_PATH, exist_ok=True)
+    return f"sqlite:///{os.path.join(app_config.PODCLEAN_MEDIA_BASE_PATH, 'db.sqlite3')}"
+
+def init_db(database_url: str = None):
     global engine, SessionLocal
+    if database_url is None:
+        database_url = get_database_url()
     engine = create_engine(database_url, connect_args={"check_same_thread": False})
     Base.metadata.create_all(engine)
+    _add_missing_columns(engine)
+    # create_all skips indexes on tables that already exist; add any that are missing
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _add_missing_columns(engine):
+    """
+    create_all never alters existing tables, so columns added to the models after a
+    database was created are appended here (SQLite supports ADD COLUMN for nullable columns).
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                    backfill = COLUMN_BACKFILLS.get((table.name, column.name))
+                    if backfill is not None:
+                        conn.execute(table.update().values({column.name: backfill()}))
+
 @contextmanager
 def get_session():
     if SessionLocal is None:
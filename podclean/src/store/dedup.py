@@ -0,0 +1,97 @@
+import os
+import logging
+from datetime import datetime
+
+from sqlalchemy import case
+
+from src.dl.fetcher import hash_file
+from src.store.models import AdMark, Episode
+from src.store.paths import EpisodePaths, link_or_copy
+from src.store.usage import record_artifact
+
+logger = logging.getLogger(__name__)
+
+# Statuses whose cut (and possibly transcript) can be handed to a duplicate as-is
+REUSABLE_STATUSES = ('cut_ready_for_serving', 'transcribed')
+
+# Results of detection and cutting that only depend on the audio content
+COPIED_FIELDS = (
+    'original_duration',
+    'ad_segments_json',
+    'cleaned_chapters_json',
+    'cleaned_duration',
+    'cleaned_file_size',
+)
+
+
+def find_duplicate(session, episode):
+    """
+    Returns another episode with the same content hash, preferring one that is already processed.
+    """
+    if not episode.content_hash:
+        return None
+    return session.query(Episode)\
+        .filter(Episode.content_hash == episode.content_hash, Episode.id != episode.id)\
+        .order_by(case((Episode.status.in_(REUSABLE_STATUSES), 0), else_=1), Episode.id)\
+        .first()
+
+
+def _share_original(session, episode, donor):
+    # Replace this episode's own copy with a hardlink to the donor's, so the audio is stored once
+    if not (donor.original_file_path and os.path.exists(donor.original_file_path) and episode.original_file_path):
+        return
+    if os.path.abspath(donor.original_file_path) != os.path.abspath(episode.original_file_path):
+        link_or_copy(donor.original_file_path, episode.original_file_path)
+        record_artifact(session, episode, 'original', episode.original_file_path)
+
+
+def _reuse_processed_artifacts(session, episode, donor) -> bool:
+    # Marks made on this episode have to be applied by its own detection stage
+    if session.query(AdMark.id).filter_by(episode_id=episode.id).first() is not None:
+        return False
+    if donor.status not in REUSABLE_STATUSES or not donor.cleaned_file_path or not os.path.exists(donor.cleaned_file_path):
+        return False
+
+    paths = EpisodePaths.for_episode(episode)
+    link_or_copy(donor.cleaned_file_path, paths.cleaned)
+    episode.cleaned_file_path = paths.cleaned
+    record_artifact(session, episode, 'cleaned', paths.cleaned)
+    for field in COPIED_FIELDS:
+        setattr(episode, field, getattr(donor, field))
+
+    if donor.transcript_file_path and os.path.exists(donor.transcript_file_path):
+        link_or_copy(donor.transcript_file_path, paths.transcript)
+        episode.transcript_file_path = paths.transcript
+        record_artifact(session, episode, 'transcript', paths.transcript)
+    elif donor.transcript_json:
+        episode.transcript_json = donor.transcript_json
+
+    transcribed = bool(episode.transcript_file_path or episode.transcript_json)
+    # Same outcome as running the stages (see src/store/states.py)
+    episode.status = 'transcribed' if transcribed else 'cut_ready_for_serving'
+    episode.checkpoint = 'transcribed' if transcribed else 'chapters'
+    episode.checkpoint_at = episode.status_changed_at = datetime.now()
+    episode.cleaned_ready_at = datetime.now()
+    return True
+
+
+def reuse_duplicate_artifacts(session, episode) -> bool:
+    """
+    Links an episode to an existing copy of identical audio (by content hash) and takes over its
+    detection, cut and transcript results. Hashes the original first if that was never done.
+    Returns True when the episode needs no processing of its own (never when it has marks of its
+    own); the caller commits.
+    """
+    if not episode.content_hash and episode.original_file_path and os.path.exists(episode.original_file_path):
+        episode.content_hash = hash_file(episode.original_file_path)
+
+    donor = find_duplicate(session, episode)
+    if donor is None:
+        return False
+
+    logger.info(f"Episode {episode.id} has the same audio as episode {donor.id} ({donor.show_name}: {donor.title}).")
+    _share_original(session, episode, donor)
+    if _reuse_processed_artifacts(session, episode, donor):
+        logger.info(f"Reused processed artifacts of episode {donor.id} for episode {episode.id}.")
+        return True
+    return False
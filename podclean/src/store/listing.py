@@ -0,0 +1,102 @@
+import base64
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+from src.store.models import Episode
+
+# Only the columns the dashboard and CLI display. Large text columns (transcripts,
+# chapters, ad segments) are reduced to presence flags so their blobs are never loaded.
+EPISODE_LIST_COLUMNS = (
+    Episode.id,
+    Episode.source_guid,
+    Episode.title,
+    Episode.show_name,
+    Episode.pub_date,
+    Episode.status,
+    Episode.cleaned_file_path.isnot(None).label('has_cleaned_audio'),
+    or_(Episode.transcript_file_path.isnot(None), Episode.md_transcript_file_path.isnot(None)).label('has_md_transcript'),
+    or_(Episode.transcript_file_path.isnot(None), Episode.transcript_json.isnot(None)).label('has_transcript'),
+)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(pub_date: datetime, episode_id: int) -> str:
+    """
+    Encodes the (pub_date, id) position of the last row on a page as an opaque cursor.
+    """
+    raw = f"{pub_date.isoformat()}|{episode_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodes a cursor produced by encode_cursor. Raises ValueError if it is malformed.
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        pub_date_str, episode_id = base64.urlsafe_b64decode(padded.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(pub_date_str), int(episode_id)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def episode_listing_query(session, status: Optional[str] = None, show_name: Optional[str] = None):
+    """
+    Builds the newest-first listing query over display columns.
+    `status` may be a single status or a comma-separated list.
+    """
+    query = session.query(*EPISODE_LIST_COLUMNS)
+    if status:
+        statuses = [s.strip() for s in status.split(",") if s.strip()]
+        query = query.filter(Episode.status.in_(statuses))
+    if show_name:
+        query = query.filter(Episode.show_name == show_name)
+    return query.order_by(Episode.pub_date.desc(), Episode.id.desc())
+
+
+def list_episodes_page(session, status: Optional[str] = None, show_name: Optional[str] = None,
+                       cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List, Optional[str]]:
+    """
+    Returns one keyset-paginated page of episode rows and the cursor for the next page
+    (None on the last page). Each page is an index range scan regardless of depth.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = episode_listing_query(session, status=status, show_name=show_name)
+    if cursor:
+        after_pub_date, after_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Episode.pub_date < after_pub_date,
+            and_(Episode.pub_date == after_pub_date, Episode.id < after_id),
+        ))
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].pub_date, rows[-1].id)
+    return rows, next_cursor
+
+
+def iter_episodes(session, status: Optional[str] = None, show_name: Optional[str] = None, batch_size: int = 500) -> Iterator:
+    """
+    Streams every matching episode row in batches without materializing the full result.
+    """
+    return episode_listing_query(session, status=status, show_name=show_name).yield_per(batch_size)
+
+
+def episode_row_to_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "source_guid": row.source_guid,
+        "title": row.title,
+        "show_name": row.show_name,
+        "pub_date": row.pub_date.isoformat() if row.pub_date else None,
+        "status": row.status,
+        "has_cleaned_audio": bool(row.has_cleaned_audio),
+        "has_md_transcript": bool(row.has_md_transcript),
+        "has_transcript": bool(row.has_transcript),
+    }
@@ -0,0 +1,161 @@
+import bisect
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from src.store import db
+from src.store.models import StageMetric
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar('podclean_span', default=None)
+
+# Upper bounds of the exported histograms; the last one catches everything
+DURATION_BUCKETS_SECONDS = (0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, math.inf)
+REAL_TIME_FACTOR_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, math.inf)
+
+
+def file_size(path: str | None) -> int | None:
+    try:
+        return os.path.getsize(path) if path else None
+    except OSError:
+        return None
+
+
+class Span:
+    """
+    One timed stage. Set bytes_in, bytes_out and audio_seconds on it while the stage runs;
+    ok is cleared automatically when the stage raises, or by the stage itself.
+    """
+
+    def __init__(self, stage: str, episode=None, parent=None):
+        self.stage = stage
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.parent_stage = parent.stage if parent else None
+        self.episode_id = getattr(episode, 'id', None) or (parent.episode_id if parent else None)
+        self.show_name = getattr(episode, 'show_name', None) or (parent.show_name if parent else None)
+        self.started_at = datetime.now()
+        self.duration_seconds = 0.0
+        self.bytes_in = None
+        self.bytes_out = None
+        self.audio_seconds = None
+        self.ok = True
+        self.error = None
+
+    @property
+    def real_time_factor(self) -> float | None:
+        if self.audio_seconds and self.duration_seconds > 0:
+            return self.audio_seconds / self.duration_seconds
+        return None
+
+
+class StageStats:
+    """
+    Counters and histograms per stage of every span finished in this process, for /metrics.
+    Unlike the stage_metrics table, which is pruned, they only grow until the process restarts,
+    as Prometheus expects of counters.
+    """
+
+    HISTOGRAMS = {'duration_seconds': DURATION_BUCKETS_SECONDS, 'real_time_factor': REAL_TIME_FACTOR_BUCKETS}
+    COUNTERS = ('audio_seconds', 'bytes_in', 'bytes_out', 'failures')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def _new_entry(self) -> dict:
+        entry = {name: 0 for name in self.COUNTERS}
+        for name, buckets in self.HISTOGRAMS.items():
+            entry[name] = {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+        return entry
+
+    def observe(self, current: "Span"):
+        values = {'duration_seconds': current.duration_seconds, 'real_time_factor': current.real_time_factor}
+        with self._lock:
+            entry = self._stages.setdefault(current.stage, self._new_entry())
+            for name, buckets in self.HISTOGRAMS.items():
+                if values[name] is not None:
+                    histogram = entry[name]
+                    histogram['buckets'][bisect.bisect_left(buckets, values[name])] += 1
+                    histogram['sum'] += values[name]
+                    histogram['count'] += 1
+            entry['audio_seconds'] += current.audio_seconds or 0
+            entry['bytes_in'] += current.bytes_in or 0
+            entry['bytes_out'] += current.bytes_out or 0
+            entry['failures'] += 0 if current.ok else 1
+
+    def as_dict(self) -> dict:
+        """
+        {stage: entry}, where histogram buckets hold per-bucket (not cumulative) counts.
+        """
+        with self._lock:
+            return {stage: {name: dict(value, buckets=list(value['buckets'])) if isinstance(value, dict) else value
+                            for name, value in entry.items()}
+                    for stage, entry in self._stages.items()}
+
+
+stage_stats = StageStats()
+
+
+@contextmanager
+def span(stage: str, episode=None, **fields):
+    """
+    Times a pipeline stage and records it in stage_metrics. Spans opened inside another span
+    (in the same thread) share its trace id and inherit its episode.
+    """
+    parent = _current_span.get()
+    current = Span(stage, episode, parent)
+    for name, value in fields.items():
+        setattr(current, name, value)
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.ok = False
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration_seconds = time.perf_counter() - started
+        _current_span.reset(token)
+        record_span(current)
+
+
+def record_span(current: Span):
+    """
+    Counts a finished span in stage_stats and writes it in its own short transaction. Metrics
+    never fail the pipeline: without a database, or on a write error, the span is only logged.
+    """
+    stage_stats.observe(current)
+    rtf = current.real_time_factor
+    logger.info(f"Span {current.stage} (episode {current.episode_id}): {current.duration_seconds:.2f}s"
+                + (f", {rtf:.1f}x real time" if rtf else "") + ("" if current.ok else " [failed]"))
+    if db.SessionLocal is None:
+        return
+    try:
+        with db.get_session() as session:
+            session.add(StageMetric(
+                trace_id=current.trace_id, parent_stage=current.parent_stage, stage=current.stage,
+                episode_id=current.episode_id, show_name=current.show_name, started_at=current.started_at,
+                duration_seconds=current.duration_seconds, bytes_in=current.bytes_in, bytes_out=current.bytes_out,
+                audio_seconds=current.audio_seconds, real_time_factor=rtf, ok=current.ok, error=current.error,
+            ))
+            session.commit()
+    except Exception as e:
+        logger.warning(f"Could not record metrics for stage '{current.stage}': {e}")
+
+
+def prune_stage_metrics(session, retention_days: int) -> int:
+    """
+    Deletes spans older than the retention window. Returns the number of rows removed.
+    """
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    removed = session.query(StageMetric).filter(StageMetric.started_at < cutoff).delete(synchronize_session=False)
+    session.commit()
+    return removed
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean, Float
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean, Float, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -7,6 +7,12 @@ Base = declarative_base()
 
 class Episode(Base):
     __tablename__ = 'episodes'
+    __table_args__ = (
+        # Keyset pagination for the dashboard and listing APIs (newest first, optionally per show/status)
+        Index('ix_episodes_pub_date_id', 'pub_date', 'id'),
+        Index('ix_episodes_show_pub_date', 'show_name', 'pub_date'),
+        Index('ix_episodes_status_pub_date', 'status', 'pub_date'),
+    )
 
     id = Column(Integer, primary_key=True)
     source_guid = Column(String, unique=True, nullable=False, index=True)
@@ -17,23 +23,122 @@ class Episode(Base):
     original_file_path = Column(String, unique=True)
     original_duration = Column(Float)
     original_file_size = Column(Integer)
+    probe_json = Column(Text) # JSON stream metadata of the original (codec, sample rate, bit rate, duration, tags, chapters)
+    content_hash = Column(String, index=True) # sha256 of the downloaded original; identical audio under other GUIDs is reused
     cleaned_file_path = Column(String, unique=True)
     cleaned_duration = Column(Float)
     cleaned_file_size = Column(Integer)
     cleaned_ready_at = Column(DateTime)
-    status = Column(String, default='pending_download') # e.g., pending_download, downloaded, pending_cut, cut, pending_transcribe, transcribed, error
+    status = Column(String, default='pending_download') # pending_download, downloaded, probed, detected, cut, cut_ready_for_serving, transcribed or a failure (see src/store/states.py)
+    checkpoint = Column(String) # Last processing stage that completed; retries resume after it
+    checkpoint_at = Column(DateTime)
+    profile_requested = Column(Boolean) # Profile the next processing or transcription run (set from the admin API)
+    status_changed_at = Column(DateTime) # When the episode entered its current status; the job queue measures waiting time from here
     image_url = Column(String)
     show_image_url = Column(String)
     show_author = Column(String)
     description = Column(Text)
     ad_segments_json = Column(Text) # JSON string of detected ad segments
-    transcript_json = Column(Text) # JSON string of the full transcript
+    transcript_json = Column(Text) # Legacy: JSON string of the full transcript (new transcripts live in transcript_file_path)
+    transcript_file_path = Column(String) # Path to the gzip-compressed JSON transcript artifact
     fast_transcript_json = Column(Text) # JSON string of the fast transcript
     cleaned_chapters_json = Column(Text) # JSON string of adjusted chapters after cutting
-    chapters_json = Column(Text) # Raw chapters JSON from RSS feed
+    chapters_json = Column(Text) # Chapters from podcast:chapters, ID3 CHAP frames or the probe, as [{'start', 'end', 'title'}]
+    chapters_url = Column(String) # podcast:chapters JSON URL from the feed item
     md_transcript_file_path = Column(String) # Path to the Markdown transcript file
     retry_count = Column(Integer, default=0) # Number of times processing has been retried
     last_error = Column(Text) # Stores the last error message
 
     def __repr__(self):
         return f"<Episode(title='{self.title}', show='{self.show_name}', status='{self.status}')>"
+
+class ArtifactUsage(Base):
+    __tablename__ = 'artifact_usage'
+    __table_args__ = (
+        Index('ix_artifact_usage_kind_show', 'kind', 'show_name'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    path = Column(String, unique=True, nullable=False)
+    episode_id = Column(Integer, index=True) # Owning episode (kept in step by cleanup, not enforced by a FK)
+    show_name = Column(String, nullable=False)
+    kind = Column(String, nullable=False) # original, cleaned, transcript, chapters, pcm
+    size_bytes = Column(Integer, nullable=False, default=0)
+    file_id = Column(String) # "st_dev:st_ino"; hardlinks (deduplicated episodes) share it and are counted once
+    recorded_at = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f"<ArtifactUsage(kind='{self.kind}', show='{self.show_name}', size={self.size_bytes})>"
+
+class AdMark(Base):
+    __tablename__ = 'ad_marks'
+    __table_args__ = (
+        Index('ix_ad_marks_show_label', 'show_name', 'label'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    episode_id = Column(Integer, nullable=False, index=True)
+    show_name = Column(String, nullable=False)
+    start = Column(Float, nullable=False) # Original-audio time, whatever timebase the mark was made in
+    end = Column(Float, nullable=False)
+    label = Column(String, nullable=False) # ad, not_ad
+    created_at = Column(DateTime, default=datetime.now)
+    mined_at = Column(DateTime, index=True) # Set once the mining job has learned from this mark
+
+    def __repr__(self):
+        return f"<AdMark(episode={self.episode_id}, {self.start:.1f}-{self.end:.1f}, label='{self.label}')>"
+
+class LearnedRules(Base):
+    __tablename__ = 'learned_rules'
+
+    id = Column(Integer, primary_key=True)
+    show_name = Column(String, unique=True, nullable=False)
+    phrases_json = Column(Text, nullable=False, default='[]') # Phrases mined from ad-labelled marks
+    domains_json = Column(Text, nullable=False, default='[]') # Sponsor domains mined from ad-labelled marks
+    marks_used = Column(Integer, nullable=False, default=0)
+    version = Column(Integer, nullable=False, default=0) # Bumped whenever the learned rules change
+    updated_at = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f"<LearnedRules(show='{self.show_name}', version={self.version})>"
+
+class DetectionCache(Base):
+    __tablename__ = 'detection_cache'
+    __table_args__ = (
+        UniqueConstraint('content_hash', 'stage', 'detector_hash', 'rules_hash', name='uq_detection_cache_key'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    content_hash = Column(String, nullable=False, index=True) # sha256 of the original audio
+    stage = Column(String, nullable=False) # transcript, cuts
+    detector_hash = Column(String, nullable=False) # Fingerprint of the settings the stage depends on
+    rules_hash = Column(String, nullable=False, default='') # Show rules fingerprint ('' for stages rules do not affect)
+    result_json = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f"<DetectionCache(stage='{self.stage}', content_hash='{self.content_hash[:10]}')>"
+
+class StageMetric(Base):
+    __tablename__ = 'stage_metrics'
+    __table_args__ = (
+        Index('ix_stage_metrics_stage_started', 'stage', 'started_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    trace_id = Column(String, nullable=False, index=True) # Shared by every span of one job run
+    parent_stage = Column(String) # Enclosing span, if any
+    stage = Column(String, nullable=False) # ingest, probe, detect, fast_transcribe, pcm_decode, cut, chapters, full_transcribe
+    episode_id = Column(Integer, index=True)
+    show_name = Column(String)
+    started_at = Column(DateTime, nullable=False, default=datetime.now)
+    duration_seconds = Column(Float, nullable=False)
+    bytes_in = Column(Integer)
+    bytes_out = Column(Integer)
+    audio_seconds = Column(Float) # Audio processed by the stage
+    real_time_factor = Column(Float) # audio_seconds / duration_seconds (higher is faster)
+    ok = Column(Boolean, nullable=False, default=True)
+    error = Column(Text)
+
+    def __repr__(self):
+        return f"<StageMetric(stage='{self.stage}', episode_id={self.episode_id}, duration={self.duration_seconds:.2f})>"
@@ -0,0 +1,283 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from typing import List
+from urllib.parse import urlparse
+
+from src.config.config_loader import load_app_config
+from src.store.transcripts import md_cache_path, write_transcript, TRANSCRIPT_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+# Directory (under PODCLEAN_MEDIA_BASE_PATH) for every artifact type an episode can own.
+ARTIFACT_DIRS = {
+    'original': 'originals',
+    'cleaned': 'cleaned',
+    'transcript': 'transcripts',
+    'chapters': 'chapters',
+    'pcm': 'pcm',
+    'profile': 'profiles',
+}
+
+# Two levels of 256 shards keep every directory small (~1 entry per 65k episodes per level)
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+MAX_NAME_PART = 60
+
+
+def get_media_base_path() -> str:
+    return load_app_config().PODCLEAN_MEDIA_BASE_PATH
+
+
+def artifact_dir(kind: str, media_base_path: str = None) -> str:
+    """
+    Returns the top-level directory that holds artifacts of the given kind.
+    """
+    return os.path.join(media_base_path or get_media_base_path(), ARTIFACT_DIRS[kind])
+
+
+def guid_key(source_guid: str) -> str:
+    """
+    Filesystem-safe, fixed-length key for an episode guid.
+    """
+    return hashlib.sha1(source_guid.encode('utf-8')).hexdigest()
+
+
+def shard_dir(kind: str, key: str, media_base_path: str = None) -> str:
+    """
+    Returns the hash-sharded directory for a key, e.g. originals/3f/a2.
+    """
+    parts = [key[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_LEVELS)]
+    return os.path.join(artifact_dir(kind, media_base_path), *parts)
+
+
+def sanitize_name(value: str) -> str:
+    sanitized = "".join(c for c in (value or "") if c.isalnum() or c in (' ', '-')).strip().replace(' ', '_')
+    return sanitized[:MAX_NAME_PART]
+
+
+def audio_extension(url: str) -> str:
+    return os.path.splitext(os.path.basename(urlparse(url or "").path))[1] or ".mp3"
+
+
+class EpisodePaths:
+    """
+    Deterministic, hash-sharded locations for every artifact of one episode.
+
+    File names stay human-readable (show-title-key) while the shard directories come from
+    the guid hash, so the same episode always maps to the same paths.
+    """
+
+    def __init__(self, source_guid: str, show_name: str, title: str, extension: str = ".mp3", media_base_path: str = None):
+        self.media_base_path = media_base_path or get_media_base_path()
+        self.key = guid_key(source_guid)
+        self.extension = extension
+        self.stem = f"{sanitize_name(show_name)}-{sanitize_name(title)}-{self.key[:10]}"
+
+    @classmethod
+    def for_episode(cls, episode, media_base_path: str = None) -> "EpisodePaths":
+        return cls(episode.source_guid, episode.show_name, episode.title, audio_extension(episode.original_audio_url), media_base_path)
+
+    def _path(self, kind: str, filename: str) -> str:
+        return os.path.join(shard_dir(kind, self.key, self.media_base_path), filename)
+
+    @property
+    def original(self) -> str:
+        return self._path('original', f"{self.stem}{self.extension}")
+
+    @property
+    def cleaned(self) -> str:
+        return self._path('cleaned', f"{self.stem}_CLEAN{self.extension}")
+
+    @property
+    def transcript(self) -> str:
+        return self._path('transcript', f"{self.stem}{TRANSCRIPT_SUFFIX}")
+
+    @property
+    def md_cache(self) -> str:
+        return md_cache_path(self.transcript)
+
+    @property
+    def legacy_md_transcript(self) -> str:
+        return self._path('transcript', f"{self.stem}.md")
+
+    @property
+    def pcm(self) -> str:
+        return pcm_cache_path(None, self.media_base_path, key=self.key)
+
+    @property
+    def chapters(self) -> str:
+        return chapters_cache_path(None, self.media_base_path, key=self.key)
+
+    def profile(self, label: str) -> str:
+        """
+        Path prefix (no extension) for one profiling run's artifacts.
+        """
+        return self._path('profile', f"{self.stem}-{label}")
+
+
+def pcm_cache_path(source_guid: str, media_base_path: str = None, key: str = None) -> str:
+    """
+    Decoded mono PCM cache used by audio analysis.
+    """
+    key = key or guid_key(source_guid)
+    return os.path.join(shard_dir('pcm', key, media_base_path), f"{key}.pcm")
+
+
+def chapters_cache_path(source_guid: str, media_base_path: str = None, key: str = None) -> str:
+    """
+    Chapter data fetched or extracted for an episode.
+    """
+    key = key or guid_key(source_guid)
+    return os.path.join(shard_dir('chapters', key, media_base_path), f"{key}.json")
+
+
+def _flat_cache_paths(source_guid: str, media_base_path: str) -> dict:
+    # Where the PCM/chapter caches lived before the sharded layout
+    key = guid_key(source_guid)
+    return {
+        'pcm': os.path.join(artifact_dir('pcm', media_base_path), f"{key}.pcm"),
+        'chapters': os.path.join(artifact_dir('chapters', media_base_path), f"{key}.json"),
+    }
+
+
+def legacy_transcript_paths(cleaned_file_path: str, media_base_path: str = None) -> List[str]:
+    """
+    JSON/Markdown transcripts written next to each other by older versions, named after the cleaned file.
+    """
+    if not cleaned_file_path:
+        return []
+    cleaned_filename_base = os.path.splitext(os.path.basename(cleaned_file_path).split('?')[0])[0]
+    transcripts_dir = artifact_dir('transcript', media_base_path)
+    return [os.path.join(transcripts_dir, f"{cleaned_filename_base}{ext}") for ext in ('.json', '.md')]
+
+
+def episode_artifact_paths(episode, media_base_path: str = None) -> List[str]:
+    """
+    Every file an episode may own on disk, existing or not. `episode` is an Episode or any row
+    with source_guid, original_file_path, cleaned_file_path, transcript_file_path and
+    md_transcript_file_path.
+    """
+    media_base_path = media_base_path or get_media_base_path()
+    paths = [episode.original_file_path, episode.cleaned_file_path, episode.md_transcript_file_path]
+    if episode.transcript_file_path:
+        paths += [episode.transcript_file_path, md_cache_path(episode.transcript_file_path)]
+    paths += legacy_transcript_paths(episode.cleaned_file_path, media_base_path)
+    paths += [pcm_cache_path(episode.source_guid, media_base_path), chapters_cache_path(episode.source_guid, media_base_path)]
+    paths += list(_flat_cache_paths(episode.source_guid, media_base_path).values())
+
+    seen = set()
+    return [p for p in paths if p and not (p in seen or seen.add(p))]
+
+
+def link_or_copy(source: str, target: str):
+    """
+    Hardlinks source to target (replacing target atomically), copying when links are not possible.
+    """
+    if os.path.exists(target) and os.path.samefile(source, target):
+        return # Already linked; rename() onto the same inode would leave the temp name behind
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_target = f"{target}.link"
+    try:
+        os.link(source, tmp_target)
+    except OSError:
+        shutil.copy2(source, tmp_target) # Cross-device or unsupported; fall back to copying
+    os.replace(tmp_target, target)
+
+
+def _place(source: str, target: str, mode: str):
+    if mode == "link":
+        link_or_copy(source, target)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(source, target)
+
+
+def migrate_to_sharded_layout(mode: str = "rename", dry_run: bool = False, batch_size: int = 200) -> int:
+    """
+    One-shot migration of existing episodes from the flat layout to the sharded one.
+
+    mode="rename" moves files in place. mode="link" hardlinks them to the new location,
+    updates the DB, and only then removes the old name, so every committed path always exists.
+    Uncompressed JSON transcripts of older versions (see legacy_transcript_paths) are converted
+    to the compressed transcript artifact, or dropped when the episode already has one.
+    Returns the number of files moved.
+    """
+    from src.store.db import get_session
+    from src.store.models import Episode
+    from src.serve.audio_cache import invalidate_audio_cache
+    from src.store.usage import forget_artifacts, record_artifact, rename_artifact
+
+    media_base_path = get_media_base_path()
+    moved = 0
+    with get_session() as session:
+        episode_ids = [row.id for row in session.query(Episode.id).order_by(Episode.id)]
+        for i in range(0, len(episode_ids), batch_size):
+            episodes = session.query(Episode).filter(Episode.id.in_(episode_ids[i:i + batch_size])).all()
+            pending_unlinks = []
+            for episode in episodes:
+                paths = EpisodePaths.for_episode(episode, media_base_path)
+                # Named after the cleaned file, so resolve them before its path is rewritten
+                legacy_transcripts = [p for p in legacy_transcript_paths(episode.cleaned_file_path, media_base_path)
+                                      if os.path.exists(p) and p != episode.md_transcript_file_path]
+                moves = [
+                    ('original_file_path', paths.original),
+                    ('cleaned_file_path', paths.cleaned),
+                    ('transcript_file_path', paths.transcript),
+                    ('md_transcript_file_path', paths.legacy_md_transcript),
+                ]
+                for column, target in moves:
+                    source = getattr(episode, column)
+                    if not source or os.path.abspath(source) == os.path.abspath(target) or not os.path.exists(source):
+                        continue
+                    logger.info(f"{'Would move' if dry_run else 'Moving'} {source} -> {target}")
+                    moved += 1
+                    if dry_run:
+                        continue
+                    _place(source, target, mode)
+                    rename_artifact(session, source, target)
+                    if column == 'transcript_file_path' and os.path.exists(md_cache_path(source)):
+                        _place(md_cache_path(source), md_cache_path(target), mode)
+                        rename_artifact(session, md_cache_path(source), md_cache_path(target))
+                        if mode == "link":
+                            pending_unlinks.append(md_cache_path(source))
+                    if mode == "link":
+                        pending_unlinks.append(source)
+                    setattr(episode, column, target)
+
+                for legacy_path in legacy_transcripts:
+                    convert = legacy_path.endswith('.json') and not episode.transcript_file_path
+                    if convert:
+                        logger.info(f"{'Would convert' if dry_run else 'Converting'} {legacy_path} -> {paths.transcript}")
+                    else:
+                        logger.info(f"{'Would remove' if dry_run else 'Removing'} superseded transcript {legacy_path}")
+                    moved += 1
+                    if dry_run:
+                        continue
+                    if convert:
+                        with open(legacy_path) as f:
+                            write_transcript(paths.transcript, json.load(f))
+                        episode.transcript_file_path = paths.transcript
+                        episode.transcript_json = None # The file is the transcript's only copy, as for new ones
+                        record_artifact(session, episode, 'transcript', paths.transcript)
+                    forget_artifacts(session, [legacy_path])
+                    pending_unlinks.append(legacy_path) # Removed once the new path is committed
+
+                for kind, flat_path in _flat_cache_paths(episode.source_guid, media_base_path).items():
+                    if os.path.exists(flat_path) and not dry_run:
+                        _place(flat_path, getattr(paths, kind), "rename")
+                        rename_artifact(session, flat_path, getattr(paths, kind))
+                        moved += 1
+
+            if not dry_run:
+                session.commit()
+                for path in pending_unlinks:
+                    if os.path.exists(path):
+                        os.remove(path)
+                for episode in episodes:
+                    invalidate_audio_cache(episode.source_guid)
+
+    logger.info(f"{'Would migrate' if dry_run else 'Migrated'} {moved} files to the sharded layout.")
+    return moved
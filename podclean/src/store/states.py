@@ -0,0 +1,117 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from src.store.models import Episode
+
+logger = logging.getLogger(__name__)
+
+# Processing stages in order. Each one persists its output on the episode (probe_json,
+# ad_segments_json, the cleaned file, cleaned_chapters_json, the transcript file) and then
+# records itself as the episode's checkpoint, so a retry resumes after the last stage that
+# succeeded instead of starting over.
+STAGES = ('probed', 'detected', 'cut', 'chapters', 'transcribed')
+
+# Status shown once a stage completes
+STAGE_STATUS = {
+    'probed': 'probed',
+    'detected': 'detected',
+    'cut': 'cut',
+    'chapters': 'cut_ready_for_serving',
+    'transcribed': 'transcribed',
+}
+
+# Failures keep the checkpoint; the worker retries these until MAX_PROCESSING_RETRIES
+RETRYABLE_FAILURES = ('processing_failed', 'probe_failed', 'cut_failed')
+FAILURE_STATUSES = RETRYABLE_FAILURES + ('original_missing', 'full_transcription_failed', 'failed_permanently')
+
+# Statuses of episodes waiting for (or part way through) the initial processing stages
+PENDING_PROCESSING_STATUSES = ('downloaded', 'probed', 'detected', 'cut')
+# Episodes whose cleaned audio can be served
+SERVABLE_STATUSES = ('cut_ready_for_serving', 'transcribed', 'full_transcription_failed')
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+def stage_index(stage: str) -> int:
+    return STAGES.index(stage) if stage in STAGES else -1
+
+
+def infer_checkpoint(episode: Episode) -> str | None:
+    """
+    Checkpoint of an episode processed before checkpoints were recorded, from its status.
+    """
+    if episode.checkpoint:
+        return episode.checkpoint
+    if episode.status == 'transcribed':
+        return 'transcribed'
+    if episode.status in ('cut_ready_for_serving', 'full_transcription_failed'):
+        return 'chapters'
+    return None
+
+
+def next_stage(episode: Episode) -> str | None:
+    index = stage_index(infer_checkpoint(episode)) + 1
+    return STAGES[index] if index < len(STAGES) else None
+
+
+def remaining_stages(episode: Episode, through: str) -> list:
+    """
+    Stages still to run, in order, up to and including `through`.
+    """
+    return list(STAGES[stage_index(infer_checkpoint(episode)) + 1:stage_index(through) + 1])
+
+
+def has_reached(episode: Episode, stage: str) -> bool:
+    return stage_index(infer_checkpoint(episode)) >= stage_index(stage)
+
+
+def complete_stage(session: Session, episode: Episode, stage: str, **fields):
+    """
+    Records a finished stage and its outputs in one short transaction. Stages must complete
+    in order; use rewind() to run earlier stages again.
+    """
+    expected = next_stage(episode)
+    if stage != expected:
+        raise InvalidTransition(f"Episode {episode.id} cannot complete '{stage}' (next stage is '{expected}').")
+    for name, value in fields.items():
+        setattr(episode, name, value)
+    episode.checkpoint = stage
+    episode.checkpoint_at = episode.status_changed_at = datetime.now()
+    episode.status = STAGE_STATUS[stage]
+    episode.last_error = None
+    session.add(episode)
+    session.commit()
+    logger.info(f"Episode {episode.id} completed stage '{stage}'.")
+
+
+def fail_stage(session: Session, episode: Episode, status: str, error: str = None, **fields):
+    """
+    Records a failure without moving the checkpoint, in one short transaction.
+    """
+    if status not in FAILURE_STATUSES:
+        raise InvalidTransition(f"'{status}' is not a failure status.")
+    for name, value in fields.items():
+        setattr(episode, name, value)
+    episode.status = status
+    episode.status_changed_at = datetime.now()
+    episode.last_error = error
+    session.add(episode)
+    session.commit()
+    logger.warning(f"Episode {episode.id} failed at stage '{next_stage(episode)}': {status} ({error}).")
+
+
+def rewind(session: Session, episode: Episode, stage: str):
+    """
+    Moves the checkpoint back so every stage after `stage` runs again (e.g. after a /mark).
+    """
+    if not has_reached(episode, stage):
+        return
+    episode.checkpoint = stage
+    episode.checkpoint_at = episode.status_changed_at = datetime.now()
+    episode.status = STAGE_STATUS[stage]
+    session.add(episode)
+    session.commit()
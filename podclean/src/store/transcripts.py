@@ -0,0 +1,90 @@
+import gzip
+import json
+import os
+from typing import Iterable, Iterator
+
+from src.transcribe.md_formatter import iter_transcript_md
+
+# Transcripts are stored once, as gzip-compressed JSON arrays with one segment per line.
+# The layout stays valid JSON for clients while letting readers stream segment by segment.
+TRANSCRIPT_SUFFIX = ".json.gz"
+MD_CACHE_SUFFIX = ".md.gz"
+
+
+def _atomic_gzip_writer(path: str):
+    tmp_path = f"{path}.tmp"
+    return tmp_path, gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6)
+
+
+def write_transcript(path: str, segments: Iterable[dict]) -> int:
+    """
+    Writes the canonical compressed transcript artifact and returns its size in bytes.
+    Any cached Markdown rendering of a previous transcript at the same path is dropped.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path, f = _atomic_gzip_writer(path)
+    with f:
+        f.write("[")
+        for i, segment in enumerate(segments):
+            f.write("\n" if i == 0 else ",\n")
+            f.write(json.dumps(segment, separators=(",", ":"), ensure_ascii=False))
+        f.write("\n]\n")
+    os.replace(tmp_path, path)
+
+    md_path = md_cache_path(path)
+    if os.path.exists(md_path):
+        os.remove(md_path)
+    return os.path.getsize(path)
+
+
+def iter_transcript_segments(path: str) -> Iterator[dict]:
+    """
+    Streams segments from a transcript written by write_transcript without loading the whole file.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip().rstrip(",")
+            if not line or line in ("[", "]"):
+                continue
+            yield json.loads(line)
+
+
+def iter_transcript_bytes(path: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Streams the decompressed contents of a gzip artifact, for clients that don't accept gzip.
+    """
+    with gzip.open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def md_cache_path(transcript_path: str) -> str:
+    """
+    Returns where the Markdown rendering of a transcript is cached (next to the transcript).
+    """
+    if transcript_path.endswith(TRANSCRIPT_SUFFIX):
+        return transcript_path[:-len(TRANSCRIPT_SUFFIX)] + MD_CACHE_SUFFIX
+    return os.path.splitext(transcript_path)[0] + MD_CACHE_SUFFIX
+
+
+def ensure_md_cache(transcript_path: str) -> str:
+    """
+    Renders the Markdown view of a transcript on first use and caches it compressed next to it.
+    The cache is rebuilt if the transcript is newer than it.
+    """
+    md_path = md_cache_path(transcript_path)
+    try:
+        if os.stat(md_path).st_mtime_ns >= os.stat(transcript_path).st_mtime_ns:
+            return md_path
+    except FileNotFoundError:
+        pass
+
+    tmp_path, f = _atomic_gzip_writer(md_path)
+    with f:
+        for chunk in iter_transcript_md(iter_transcript_segments(transcript_path)):
+            f.write(chunk)
+    os.replace(tmp_path, md_path)
+    return md_path
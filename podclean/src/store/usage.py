@@ -0,0 +1,121 @@
+import os
+import logging
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import func, select
+
+from src.store.models import ArtifactUsage, Episode
+from src.store.transcripts import md_cache_path
+
+logger = logging.getLogger(__name__)
+
+
+def record_artifact(session, episode, kind: str, path: str) -> int:
+    """
+    Records (or refreshes) the on-disk size and inode of one artifact owned by an episode.
+    Joins the caller's transaction; the caller commits. Returns the recorded size.
+    """
+    try:
+        st = os.stat(path)
+        size, file_id = st.st_size, f"{st.st_dev}:{st.st_ino}"
+    except OSError:
+        size, file_id = 0, None
+    usage = session.query(ArtifactUsage).filter_by(path=path).first()
+    if usage is None:
+        usage = ArtifactUsage(path=path)
+        session.add(usage)
+    usage.episode_id = episode.id
+    usage.show_name = episode.show_name
+    usage.kind = kind
+    usage.size_bytes = size
+    usage.file_id = file_id
+    usage.recorded_at = datetime.now()
+    return size
+
+
+def forget_artifacts(session, paths: Iterable[str]):
+    """
+    Drops the usage rows of files that have been (or are about to be) deleted.
+    """
+    paths = [p for p in paths if p]
+    if paths:
+        session.query(ArtifactUsage).filter(ArtifactUsage.path.in_(paths)).delete(synchronize_session=False)
+
+
+def forget_episode_artifacts(session, episode_ids: Iterable[int]):
+    episode_ids = list(episode_ids)
+    if episode_ids:
+        session.query(ArtifactUsage).filter(ArtifactUsage.episode_id.in_(episode_ids)).delete(synchronize_session=False)
+
+
+def rename_artifact(session, old_path: str, new_path: str):
+    session.query(ArtifactUsage).filter_by(path=old_path).update({ArtifactUsage.path: new_path}, synchronize_session=False)
+
+
+def usage_file_key():
+    """
+    The file behind a usage row: its inode, or its path for rows recorded before inodes were.
+    """
+    return func.coalesce(ArtifactUsage.file_id, ArtifactUsage.path)
+
+
+def link_counts():
+    """
+    Subquery of (file_key, links): how many usage rows share each file.
+    """
+    key = usage_file_key()
+    return select(key.label('file_key'), func.count(ArtifactUsage.id).label('links')).group_by(key).subquery()
+
+
+def _counted():
+    # The first row recorded for each file carries its bytes; further hardlinks count as 0
+    return ArtifactUsage.id.in_(select(func.min(ArtifactUsage.id)).group_by(usage_file_key()))
+
+
+def total_usage_bytes(session) -> int:
+    return session.query(func.coalesce(func.sum(ArtifactUsage.size_bytes), 0)).filter(_counted()).scalar()
+
+
+def usage_summary(session) -> dict:
+    """
+    Bytes per artifact kind and per show, from a single grouped query. A file hardlinked between
+    episodes counts once, for the episode that recorded it first.
+    """
+    rows = session.query(ArtifactUsage.show_name, ArtifactUsage.kind, func.sum(ArtifactUsage.size_bytes), func.count(ArtifactUsage.id))\
+                  .filter(_counted()).group_by(ArtifactUsage.show_name, ArtifactUsage.kind).all()
+    summary = {"total_bytes": 0, "file_count": 0, "by_kind": {}, "by_show": {}}
+    for show_name, kind, size, count in rows:
+        summary["total_bytes"] += size
+        summary["file_count"] += count
+        summary["by_kind"][kind] = summary["by_kind"].get(kind, 0) + size
+        show = summary["by_show"].setdefault(show_name, {"total_bytes": 0})
+        show[kind] = size
+        show["total_bytes"] += size
+    return summary
+
+
+def rescan_artifact_usage(session, batch_size: int = 500) -> int:
+    """
+    Rebuilds the usage table from the paths stored on episodes (for databases created before
+    accounting existed, or after files were changed by hand). Returns the number of files recorded.
+    """
+    from src.store.paths import EpisodePaths
+
+    session.query(ArtifactUsage).delete(synchronize_session=False)
+    recorded = 0
+    for episode in session.query(Episode).yield_per(batch_size):
+        candidates = [('original', episode.original_file_path), ('cleaned', episode.cleaned_file_path), ('transcript', episode.md_transcript_file_path)]
+        if episode.transcript_file_path:
+            candidates += [('transcript', episode.transcript_file_path), ('transcript', md_cache_path(episode.transcript_file_path))]
+        paths = EpisodePaths.for_episode(episode)
+        candidates += [('pcm', paths.pcm), ('chapters', paths.chapters)]
+        seen = set()
+        for kind, path in candidates:
+            if path and path not in seen and os.path.exists(path):
+                seen.add(path)
+                record_artifact(session, episode, kind, path)
+                recorded += 1
+    session.commit()
+    logger.info(f"Recorded {recorded} artifacts.")
+    return recorded
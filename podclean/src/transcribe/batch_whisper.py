@@ -0,0 +1,54 @@
+import logging
+import os
+import subprocess
+import tempfile
+
+from src.transcribe.fast_whisper import parse_srt_to_segments
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILES = {
+    "tiny": "ggml-tiny.bin", "base": "ggml-base.bin",
+    "small.en": "ggml-small.en.bin", "small": "ggml-small.en.bin", # Use small.en for small model
+    "medium.en": "ggml-medium.en.bin", "medium": "ggml-medium.bin",
+    "large-v1": "ggml-large-v1.bin", "large-v2": "ggml-large-v2.bin", "large": "ggml-large.bin",
+}
+
+
+def whisper_executable() -> str:
+    for candidate in ("./whisper.cpp/build/bin/whisper-cli", "./whisper.cpp/build/bin/main"):
+        if os.path.exists(candidate):
+            return candidate
+    raise FileNotFoundError("whisper.cpp executable not found in ./whisper.cpp/build/bin. Please ensure it's built.")
+
+
+def model_file(model_size: str) -> str:
+    return f"whisper.cpp/models/{MODEL_FILES.get(model_size, 'ggml-small.en.bin')}"
+
+
+def transcribe_many(audio_paths: list, model_size: str = "small.en", extra_args: list = ()) -> dict:
+    """
+    Transcribes several files with one whisper.cpp process, so the model is loaded once for
+    the whole group. Each input gets its own output prefix (-f/-of pairs are matched by
+    position). Returns {audio_path: segments}; files whisper produced no SRT for are missing.
+    """
+    if not audio_paths:
+        return {}
+    with tempfile.TemporaryDirectory(prefix="wsp_batch_") as out_dir:
+        cmd = [whisper_executable(), "-m", model_file(model_size), "-osrt", *extra_args]
+        prefixes = {}
+        for i, path in enumerate(audio_paths):
+            prefixes[path] = os.path.join(out_dir, str(i))
+            cmd += ["-f", path, "-of", prefixes[path]]
+
+        logger.info(f"Running whisper.cpp on {len(audio_paths)} files with model {model_size}.")
+        subprocess.run(cmd, check=True)
+
+        results = {}
+        for path, prefix in prefixes.items():
+            srt_path = f"{prefix}.srt"
+            if os.path.exists(srt_path):
+                results[path] = parse_srt_to_segments(srt_path)
+            else:
+                logger.error(f"whisper.cpp produced no SRT for {path}.")
+        return results
@@ -3,6 +3,11 @@ import tempfile
 import os
 import json
 import re
+import logging
+
+from src.jobs.governor import whisper_thread_args
+
+logger = logging.getLogger(__name__)
 
 def parse_srt_to_segments(srt_path):
     segments = []
@@ -32,7 +37,7 @@ def parse_srt_to_segments(srt_path):
         })
     return segments
 
-def fast_transcribe(audio_path, model_size="small.en", **_):
+def fast_transcribe(audio_path, model_size="small.en", threads=None, **_):
     model_map = {
         "tiny":"ggml-tiny.bin", "base":"ggml-base.bin",
         "small.en":"ggml-small.en.bin", "small":"ggml-small.en.bin" # Use small.en for small model
@@ -51,11 +56,12 @@ def fast_transcribe(audio_path, model_size="small.en", **_):
     cmd = [
         whisper_cpp_executable, "-m", model_file,
         "-f", audio_path, "-osrt", "-of", out_prefix,
+        *whisper_thread_args(threads), # thread count granted by the resource governor
         # add light VAD to reduce junk segments:
         # "-vtt"  # optional: also write VTT if you prefer
     ]
     
-    print(f"Running whisper.cpp command: {' '.join(cmd)}")
+    logger.info(f"Running whisper.cpp command: {' '.join(cmd)}")
     subprocess.run(cmd, check=True)
     srt_path = f"{out_prefix}.srt"
     
@@ -3,6 +3,11 @@ import tempfile
 import os
 import json
 import re
+import logging
+
+from src.jobs.governor import whisper_thread_args
+
+logger = logging.getLogger(__name__)
 
 def parse_srt_to_segments(srt_path):
     segments = []
@@ -32,7 +37,7 @@ def parse_srt_to_segments(srt_path):
         })
     return segments
 
-def full_transcribe(audio_path: str, model_size: str = "medium", **_):
+def full_transcribe(audio_path: str, model_size: str = "medium", threads: int = None, **_):
     model_map = {
         "tiny":"ggml-tiny.bin", "base":"ggml-base.bin",
         "small.en":"ggml-small.en.bin", "small":"ggml-small.en.bin", # Use small.en for small model
@@ -53,11 +58,12 @@ def full_transcribe(audio_path: str, model_size: str = "medium", **_):
     cmd = [
         whisper_cpp_executable, "-m", model_file,
         "-f", audio_path, "-osrt", "-of", out_prefix,
+        *whisper_thread_args(threads), # thread count granted by the resource governor
         # add light VAD to reduce junk segments:
         # "-vtt"  # optional: also write VTT if you prefer
     ]
     
-    print(f"Running whisper.cpp command for full transcription: {' '.join(cmd)}")
+    logger.info(f"Running whisper.cpp command for full transcription: {' '.join(cmd)}")
     subprocess.run(cmd, check=True)
     srt_path = f"{out_prefix}.srt"
     
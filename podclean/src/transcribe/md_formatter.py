@@ -1,4 +1,33 @@
 import json
+from typing import Iterable, Iterator
+
+def format_segment_md(segment: dict) -> str:
+    """
+    Formats a single transcript segment as a Markdown line with its timestamp range.
+    """
+    start_time = segment.get('start', 0)
+    end_time = segment.get('end', 0)
+    text = segment.get('text', '').strip()
+
+    # Format timestamp (e.g., [00:01:23 - 00:01:28])
+    start_h, start_m, start_s = int(start_time // 3600), int((start_time % 3600) // 60), int(start_time % 60)
+    end_h, end_m, end_s = int(end_time // 3600), int((end_time % 3600) // 60), int(end_time % 60)
+    timestamp = f"[{start_h:02d}:{start_m:02d}:{start_s:02d} - {end_h:02d}:{end_m:02d}:{end_s:02d}]"
+
+    # Add speaker label if available (assuming a 'speaker' key might be added later)
+    speaker = segment.get('speaker', '')
+    if speaker:
+        return f"**{speaker}**: {timestamp} {text}\n"
+    return f"{timestamp} {text}\n"
+
+def iter_transcript_md(segments: Iterable[dict]) -> Iterator[str]:
+    """
+    Streaming counterpart of format_transcript_to_md: yields the Markdown one segment at a time,
+    so large transcripts can be rendered straight to disk or to a response.
+    """
+    for i, segment in enumerate(segments):
+        line = format_segment_md(segment)
+        yield line if i == 0 else "\n" + line
 
 def format_transcript_to_md(transcript_json: str) -> str:
     """
@@ -13,25 +42,7 @@ def format_transcript_to_md(transcript_json: str) -> str:
     except json.JSONDecodeError:
         return "Error: Invalid JSON transcript."
 
-    md_content = []
-    for segment in segments:
-        start_time = segment.get('start', 0)
-        end_time = segment.get('end', 0)
-        text = segment.get('text', '').strip()
-        
-        # Format timestamp (e.g., [00:01:23 - 00:01:28])
-        start_h, start_m, start_s = int(start_time // 3600), int((start_time % 3600) // 60), int(start_time % 60)
-        end_h, end_m, end_s = int(end_time // 3600), int((end_time % 3600) // 60), int(end_time % 60)
-        timestamp = f"[{start_h:02d}:{start_m:02d}:{start_s:02d} - {end_h:02d}:{end_m:02d}:{end_s:02d}]"
-
-        # Add speaker label if available (assuming a 'speaker' key might be added later)
-        speaker = segment.get('speaker', '')
-        if speaker:
-            md_content.append(f"**{speaker}**: {timestamp} {text}\n")
-        else:
-            md_content.append(f"{timestamp} {text}\n")
-
-    return "\n".join(md_content)
+    return "".join(iter_transcript_md(segments))
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,16 @@
+import pytest
+
+from src.config.config_loader import config_service
+
+
+@pytest.fixture(autouse=True)
+def media_base_path(tmp_path, monkeypatch):
+    """
+    Points the media directory of every test at tmp_path, so pipeline code can never write
+    into the real data directory.
+    """
+    path = tmp_path / "media"
+    monkeypatch.setenv("PODCLEAN_MEDIA_BASE_PATH", str(path))
+    config_service.invalidate()
+    yield path
+    config_service.invalidate()
@@ -0,0 +1,40 @@
+import os
+from datetime import datetime
+
+from src.serve.audio_cache import audio_cache, resolve_audio
+from src.store.db import get_session, init_db
+from src.store.models import Episode
+from src.store.paths import EpisodePaths
+
+
+def test_entries_follow_changes_made_by_other_processes(tmp_path):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    audio_cache.invalidate()
+    original = tmp_path / "original.mp3"
+    original.write_bytes(b"\0" * 1000)
+    with get_session() as session:
+        episode = Episode(source_guid="g1", title="Ep", show_name="Show", pub_date=datetime(2026, 1, 1),
+                          original_audio_url="http://x/a.mp3", original_file_path=str(original), status='downloaded')
+        session.add(episode)
+        session.commit()
+        cleaned = EpisodePaths.for_episode(episode).cleaned
+
+    assert resolve_audio("g1").path == str(original)
+    assert resolve_audio("g1") is audio_cache.get("g1")
+
+    # A worker in another process cuts the episode; nothing invalidates this process's cache
+    os.makedirs(os.path.dirname(cleaned))
+    with open(cleaned, "wb") as f:
+        f.write(b"\1" * 600)
+    with get_session() as session:
+        session.query(Episode).update({Episode.cleaned_file_path: cleaned})
+        session.commit()
+    entry = resolve_audio("g1")
+    assert (entry.path, entry.size) == (cleaned, 600)
+
+    # ... and later re-cuts it in place
+    with open(cleaned + ".part", "wb") as f:
+        f.write(b"\2" * 500)
+    os.replace(cleaned + ".part", cleaned)
+    recut = resolve_audio("g1")
+    assert recut.size == 500 and recut.etag != entry.etag
@@ -0,0 +1,33 @@
+import numpy as np
+
+from src.detect.audio_cues import PCM_SAMPLE_RATE, FRAME_SECONDS, load_pcm, refine_cut_boundaries, rms_envelope
+
+
+def _speech_with_pauses(path, duration, pauses):
+    """Writes a noisy 'speech' PCM file with near-silent pauses at the given (start, end) times."""
+    rng = np.random.default_rng(41)
+    samples = rng.normal(0, 6000, int(duration * PCM_SAMPLE_RATE))
+    for start, end in pauses:
+        samples[int(start * PCM_SAMPLE_RATE):int(end * PCM_SAMPLE_RATE)] *= 0.01
+    samples.astype('<i2').tofile(path)
+
+
+def test_edges_snap_to_nearby_pauses(tmp_path):
+    pcm_path = str(tmp_path / "episode.pcm")
+    _speech_with_pauses(pcm_path, 120, [(28.0, 28.4), (61.5, 62.0)])
+    envelope = rms_envelope(load_pcm(pcm_path))
+    assert len(envelope) == int(120 / FRAME_SECONDS)
+
+    cuts = [{'start': 30.0, 'end': 60.0, 'confidence': 0.8}, {'start': 90.0, 'end': 100.0}]
+    refined = refine_cut_boundaries(cuts, envelope, radius_seconds=3)
+    assert 28.0 <= refined[0]['start'] <= 28.4
+    assert 61.5 <= refined[0]['end'] <= 62.0
+    assert refined[0]['confidence'] == 0.8
+    # No pause within reach: edges move at most the search radius
+    assert abs(refined[1]['start'] - 90.0) <= 3 and abs(refined[1]['end'] - 100.0) <= 3
+
+
+def test_envelope_has_one_value_per_frame(tmp_path):
+    pcm_path = str(tmp_path / "long.pcm")
+    np.zeros(60 * PCM_SAMPLE_RATE, dtype='<i2').tofile(pcm_path)
+    assert len(rms_envelope(load_pcm(pcm_path))) == 60 / FRAME_SECONDS
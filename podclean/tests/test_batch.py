@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import src.detect.fusion as fusion
+import src.jobs.batch as batch
+import src.processor.episode_processor as processor
+from src.store.db import get_session, init_db
+from src.store.models import Episode
+
+SEGMENTS = [{"start": 100.0, "end": 130.0, "text": "this episode is brought to you by acme, go to acme.com"}]
+
+
+def test_fast_batch_loads_the_model_once_per_chunk(tmp_path, monkeypatch):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    whisper_calls = []
+    monkeypatch.setattr(batch, "transcribe_many", lambda paths, **k: whisper_calls.append(list(paths)) or {p: SEGMENTS for p in paths})
+    monkeypatch.setattr(fusion, "fast_transcribe", lambda *a, **k: (_ for _ in ()).throw(AssertionError("per-episode whisper run")))
+    monkeypatch.setattr(fusion, "boundary_envelope", lambda *a: None)
+    monkeypatch.setattr(processor, "collect_chapters", lambda *a: [])
+
+    def fake_cut(source, keeps, output, **kwargs):
+        with open(output, "wb") as f:
+            f.write(b"cleaned")
+        return True
+    monkeypatch.setattr(processor, "cut_with_ffmpeg", fake_cut)
+
+    with get_session() as session:
+        for i in range(5):
+            original = tmp_path / f"{i}.mp3"
+            original.write_bytes(bytes([i]) * 512)
+            session.add(Episode(source_guid=f"g{i}", title=f"Ep {i}", show_name="Show", pub_date=datetime(2026, 1, i + 1),
+                                original_audio_url="http://x/a.mp3", original_file_path=str(original), content_hash=f"h{i}",
+                                original_duration=1800.0, probe_json="{}", status='downloaded'))
+        session.commit()
+
+    report = batch.run_batch(stages=('fast',), batch_size=3)['fast']
+    assert [len(paths) for paths in whisper_calls] == [3, 2]
+    assert report["episodes"] == 5 and report["transcribed_files"] == 5
+    assert report["audio_seconds"] == 5 * 1800.0
+    with get_session() as session:
+        assert {e.status for e in session.query(Episode)} == {'cut_ready_for_serving'}
+
+
+def test_batch_failures_are_recorded_per_episode(tmp_path, monkeypatch):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    monkeypatch.setattr(batch, "transcribe_many", lambda paths, **k: (_ for _ in ()).throw(RuntimeError("whisper crashed")))
+    monkeypatch.setattr(processor, "full_transcribe", lambda path, **k: SEGMENTS)
+    real_process_episode = batch.process_episode
+
+    def flaky_process_episode(episode_id, through='chapters'):
+        if episode_id == 1:
+            raise RuntimeError("disk full")
+        real_process_episode(episode_id, through)
+    monkeypatch.setattr(batch, "process_episode", flaky_process_episode)
+
+    with get_session() as session:
+        for i in range(3):
+            cleaned = tmp_path / f"{i}_CLEAN.mp3"
+            cleaned.write_bytes(b"cleaned")
+            session.add(Episode(source_guid=f"g{i}", title=f"Ep {i}", show_name="Show", pub_date=datetime(2026, 1, i + 1),
+                                original_audio_url="http://x/a.mp3", cleaned_file_path=str(cleaned), cleaned_duration=600.0,
+                                status='cut_ready_for_serving', checkpoint='chapters'))
+        session.add(Episode(source_guid="g3", title="Ep 3", show_name="Show", pub_date=datetime(2026, 1, 4),
+                            original_audio_url="http://x/a.mp3", status='downloaded'))
+        session.commit()
+
+    # The failed group run falls back to one whisper.cpp run per episode
+    report = batch.run_full_batch([1, 2, 3])
+    assert report["episodes"] == 3 and report["transcribed_files"] == 0
+    # An error in one episode is recorded on it and the batch carries on
+    batch.run_fast_batch([1, 4])
+    with get_session() as session:
+        failed = session.get(Episode, 1)
+        assert (failed.status, failed.retry_count, failed.last_error) == ('processing_failed', 2, "disk full")
+        assert session.get(Episode, 4).status == 'original_missing'
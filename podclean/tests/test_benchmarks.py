@@ -0,0 +1,11 @@
+from benchmarks.suite import compare_results, run_suite
+
+
+def test_suite_runs_and_compares(tmp_path):
+    results = run_suite(["keep_segments", "chapters_remap", "slide", "interval_algebra"], scale=0.01, repeat=1, workdir=str(tmp_path))
+    assert set(results["results"]) == {"keep_segments", "chapters_remap", "slide", "interval_algebra"}
+    assert all(r["median_s"] >= 0 for r in results["results"].values())
+
+    slower = {"scale": 0.01, "results": {name: dict(r, median_s=r["median_s"] * 2 + 1) for name, r in results["results"].items()}}
+    comparison = compare_results(slower, results)
+    assert {row["case"] for row in comparison if row["regression"]} == {"keep_segments", "chapters_remap", "slide", "interval_algebra"}
@@ -0,0 +1,51 @@
+import struct
+
+from src.ingest.chapters import read_id3_chapters, normalize_podcast_chapters
+
+
+def _syncsafe(n: int) -> bytes:
+    return bytes([(n >> 21) & 0x7F, (n >> 14) & 0x7F, (n >> 7) & 0x7F, n & 0x7F])
+
+
+def _frame(frame_id: bytes, body: bytes) -> bytes:
+    return frame_id + _syncsafe(len(body)) + b"\x00\x00" + body
+
+
+def _chap(element_id: bytes, start_ms: int, end_ms: int, title: str) -> bytes:
+    tit2 = _frame(b"TIT2", b"\x03" + title.encode("utf-8"))
+    return _frame(b"CHAP", element_id + b"\x00" + struct.pack(">IIII", start_ms, end_ms, 0xFFFFFFFF, 0xFFFFFFFF) + tit2)
+
+
+def _ctoc(children) -> bytes:
+    body = b"toc\x00" + bytes([0x3, len(children)]) + b"".join(c + b"\x00" for c in children)
+    return _frame(b"CTOC", body)
+
+
+def test_reads_chap_frames_in_ctoc_order(tmp_path):
+    frames = _chap(b"ch1", 60_000, 90_000, "Sponsor break") + _chap(b"ch0", 0, 60_000, "Intro") + _ctoc([b"ch0", b"ch1"])
+    tag = b"ID3\x04\x00\x00" + _syncsafe(len(frames) + 32) + frames + b"\x00" * 32
+    path = tmp_path / "episode.mp3"
+    path.write_bytes(tag + b"\xFF\xFB\x90\x00" * 10)
+
+    assert read_id3_chapters(str(path)) == [
+        {"start": 0.0, "end": 60.0, "title": "Intro"},
+        {"start": 60.0, "end": 90.0, "title": "Sponsor break"},
+    ]
+
+
+def test_file_without_tag_has_no_chapters(tmp_path):
+    path = tmp_path / "plain.mp3"
+    path.write_bytes(b"\xFF\xFB\x90\x00" * 10)
+    assert read_id3_chapters(str(path)) == []
+
+
+def test_podcast_chapters_get_end_times():
+    doc = {"version": "1.2.0", "chapters": [
+        {"startTime": 120, "title": "Ad"},
+        {"startTime": 0, "title": "Intro"},
+        {"startTime": 150, "title": "Hidden", "toc": False},
+    ]}
+    assert normalize_podcast_chapters(doc, duration=600) == [
+        {"start": 0.0, "end": 120.0, "title": "Intro"},
+        {"start": 120.0, "end": 600, "title": "Ad"},
+    ]
@@ -0,0 +1,49 @@
+import os
+from datetime import datetime
+
+from src.store.cleanup import enforce_storage_budget, file_unlinker
+from src.store.db import get_session, init_db
+from src.store.models import Episode
+from src.store.usage import record_artifact, total_usage_bytes, usage_summary
+
+
+def test_budget_counts_deduplicated_files_once(tmp_path):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    with get_session() as session:
+        episodes = []
+        for i, name in enumerate(("donor", "duplicate")):
+            files = {kind: str(tmp_path / f"{name}.{kind}") for kind in ("original", "cleaned", "pcm")}
+            if i == 0:
+                for kind, size in (("original", 1000), ("cleaned", 500)):
+                    with open(files[kind], "wb") as f:
+                        f.write(b"\0" * size)
+            else: # Same audio: both files are hardlinks to the donor's
+                for kind in ("original", "cleaned"):
+                    os.link(episodes[0][1][kind], files[kind])
+            with open(files["pcm"], "wb") as f:
+                f.write(b"\0" * 100)
+            episode = Episode(source_guid=name, title=name, show_name=name, pub_date=datetime(2026, 1, 1 + i),
+                              original_audio_url=f"http://x/{name}.mp3", original_file_path=files["original"],
+                              cleaned_file_path=files["cleaned"], status='cut_ready_for_serving')
+            session.add(episode)
+            session.flush()
+            for kind, path in files.items():
+                record_artifact(session, episode, kind, path)
+            episodes.append((episode, files))
+        session.commit()
+
+        assert total_usage_bytes(session) == 1700
+        summary = usage_summary(session)
+        assert summary["by_show"]["donor"]["total_bytes"] == 1600
+        assert summary["by_show"]["duplicate"] == {"total_bytes": 100, "pcm": 100}
+
+        # Unlinking only the donor's original would free nothing, so both links go
+        assert enforce_storage_budget(session, 600) == {"original": 1000, "pcm": 100, "episodes": 0}
+        assert total_usage_bytes(session) == 600
+        file_unlinker.drain()
+        assert not os.path.exists(episodes[0][1]["original"]) and not os.path.exists(episodes[1][1]["original"])
+
+        # Deleting the donor alone would not free the shared cleaned file, so the duplicate goes too
+        assert enforce_storage_budget(session, 400) == {"original": 0, "pcm": 100, "episodes": 500}
+        assert total_usage_bytes(session) == 0
+        assert session.query(Episode).count() == 0
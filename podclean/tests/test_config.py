@@ -0,0 +1,9 @@
+from src.config.config_loader import load_app_config
+
+
+def test_environment_changes_apply_immediately(tmp_path, monkeypatch):
+    monkeypatch.setenv("PODCLEAN_MEDIA_BASE_PATH", str(tmp_path / "a"))
+    assert load_app_config().PODCLEAN_MEDIA_BASE_PATH == str(tmp_path / "a")
+    # Well within the YAML check interval
+    monkeypatch.setenv("PODCLEAN_MEDIA_BASE_PATH", str(tmp_path / "b"))
+    assert load_app_config().PODCLEAN_MEDIA_BASE_PATH == str(tmp_path / "b")
@@ -0,0 +1,87 @@
+import os
+import random
+
+import src.cut.ffmpeg_exec as ffmpeg_exec
+from src.cut.timeline import Timeline, remap_timed_items
+from src.cut.tags_chapters import adjust_chapters_after_cut
+
+KEEP = [[0, 10], [20, 30], [40, 50]]
+
+
+def test_to_cleaned_and_back():
+    timeline = Timeline(KEEP)
+    assert timeline.cleaned_duration == 30
+    assert timeline.to_cleaned(5) == 5
+    assert timeline.to_cleaned(25) == 15
+    assert timeline.to_cleaned(45) == 25
+    for t in (0, 5, 20, 29.5, 40, 49.9):
+        assert timeline.to_original(timeline.to_cleaned(t)) == t
+
+
+def test_times_inside_cuts_snap_to_next_kept_sample():
+    timeline = Timeline(KEEP)
+    assert timeline.to_cleaned(15) == 10 # next kept sample is original 20 -> cleaned 10
+    assert timeline.to_cleaned(35) == 20
+    assert timeline.to_cleaned(60) == 30 # past the end clamps to the cleaned duration
+    assert not timeline.is_kept(15) and timeline.is_kept(20)
+
+
+def test_chapters_starting_inside_a_cut_are_kept():
+    chapters = [
+        {"start": 0, "end": 12, "title": "Intro"},
+        {"start": 15, "end": 35, "title": "Starts in a cut"},
+        {"start": 30, "end": 40, "title": "Entirely cut"},
+        {"start": 42, "end": 50, "title": "Outro"},
+    ]
+    assert adjust_chapters_after_cut(chapters, KEEP) == [
+        {"start": 0, "end": 10, "title": "Intro"},
+        {"start": 10, "end": 20, "title": "Starts in a cut"},
+        {"start": 22, "end": 30, "title": "Outro"},
+    ]
+
+
+def test_words_are_remapped_with_their_segment():
+    segments = [{"start": 8, "end": 22, "text": "a b", "words": [{"start": 8, "end": 9, "word": "a"}, {"start": 21, "end": 22, "word": "b"}]}]
+    remapped = remap_timed_items(segments, Timeline(KEEP))
+    assert [(w["start"], w["end"]) for w in remapped[0]["words"]] == [(8, 9), (11, 12)]
+
+
+def _linear_to_cleaned(keep, t):
+    # Reference implementation: walk every segment
+    offset = 0.0
+    for s, e in keep:
+        if t < s:
+            return offset
+        if t < e:
+            return offset + t - s
+        offset += e - s
+    return offset
+
+
+def test_matches_linear_reference_on_random_timelines():
+    rng = random.Random(38)
+    for _ in range(200):
+        points = sorted(rng.uniform(0, 3600) for _ in range(2 * rng.randint(1, 30)))
+        keep = [[points[i], points[i + 1]] for i in range(0, len(points), 2)]
+        timeline = Timeline(keep)
+        for _ in range(50):
+            t = rng.uniform(-10, 3700)
+            assert abs(timeline.to_cleaned(t) - _linear_to_cleaned(keep, t)) < 1e-6
+            c = rng.uniform(0, timeline.cleaned_duration)
+            assert abs(timeline.to_cleaned(timeline.to_original(c)) - c) < 1e-6
+
+
+def test_recut_leaves_a_hardlinked_duplicate_alone(tmp_path, monkeypatch):
+    def fake_ffmpeg(command, **kwargs):
+        with open(command[-2], "wb") as f: # ffmpeg truncates and writes its output in place
+            f.write(b"new cut")
+        return ffmpeg_exec.subprocess.CompletedProcess(command, 0, "", "")
+    monkeypatch.setattr(ffmpeg_exec.subprocess, "run", fake_ffmpeg)
+
+    output, duplicate = tmp_path / "cleaned.mp3", tmp_path / "duplicate.mp3"
+    output.write_bytes(b"old cut")
+    os.link(output, duplicate)
+    assert ffmpeg_exec.cut_with_ffmpeg("original.mp3", KEEP, str(output))
+    assert output.read_bytes() == b"new cut"
+    assert duplicate.read_bytes() == b"old cut"
+    assert sorted(os.listdir(tmp_path)) == ["cleaned.mp3", "duplicate.mp3"]
@@ -0,0 +1,59 @@
+import os
+
+from src.detect.chapters import ChapterClassifier, get_chapter_classifier
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "chapter_titles.tsv")
+
+
+def _load_corpus():
+    corpus = []
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                title, label = line.rstrip("\n").rsplit("\t", 1)
+                corpus.append((title, label == "1"))
+    return corpus
+
+
+def _legacy_matches(title: str) -> bool:
+    # The substring matcher the classifier replaced, kept as the baseline
+    return any(k in title.lower() for k in ["ad", "sponsor", "promo", "advertisement", "commercial"])
+
+
+def _precision_recall(predict, corpus):
+    tp = sum(1 for title, is_ad in corpus if is_ad and predict(title))
+    fp = sum(1 for title, is_ad in corpus if not is_ad and predict(title))
+    fn = sum(1 for title, is_ad in corpus if is_ad and not predict(title))
+    return tp / ((tp + fp) or 1), tp / ((tp + fn) or 1)
+
+
+def test_classifier_on_labelled_corpus():
+    corpus = _load_corpus()
+    classifier = ChapterClassifier()
+    precision, recall = _precision_recall(classifier.is_ad, corpus)
+    legacy_precision, _ = _precision_recall(_legacy_matches, corpus)
+
+    misclassified = [title for title, is_ad in corpus if classifier.is_ad(title) != is_ad]
+    assert precision == 1.0, misclassified
+    assert recall >= 0.95, misclassified
+    assert precision > legacy_precision
+
+
+def test_word_boundaries_and_scores():
+    classifier = ChapterClassifier()
+    for title in ("Headlines", "Road trip", "Advice"):
+        assert classifier.score(title) == 0.0
+    assert classifier.score("A word from our sponsors") > classifier.score("Promo") > classifier.threshold
+    # Ambiguous on its own: scored, but below the cut threshold
+    assert 0 < classifier.score("Break") < classifier.threshold
+
+
+def test_show_overrides():
+    classifier = ChapterClassifier(extra_ad_terms=["Support the show"], extra_safe_terms=["The Ad Lab"])
+    assert classifier.is_ad("Support the show!")
+    assert not classifier.is_ad("The Ad Lab")
+    assert classifier.is_ad("Ad break")
+
+
+def test_classifier_is_cached_per_show():
+    assert get_chapter_classifier("some-show") is get_chapter_classifier("some-show")
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import src.detect.fusion as fusion
+from src.config.config import ShowRules
+from src.detect.cache import StageCache
+from src.store.db import get_session, init_db
+from src.store.models import Episode
+
+SEGMENTS = [
+    {"start": 100.0, "end": 110.0, "text": "this episode is brought to you by acme"},
+    {"start": 110.0, "end": 120.0, "text": "go to acme.com for 20% off"},
+]
+
+
+def test_retries_skip_detection_and_rule_changes_keep_the_transcript(tmp_path, monkeypatch):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    calls = []
+    monkeypatch.setattr(fusion, "fast_transcribe", lambda *a, **k: calls.append(a) or SEGMENTS)
+    monkeypatch.setattr(fusion, "boundary_envelope", lambda *a: None)
+    rules = ShowRules(phrases=["brought to you by"], url_patterns=[r"\w+\.com"], price_patterns=[r"\d+% off"])
+    monkeypatch.setattr(fusion, "load_show_rules", lambda slug: rules)
+
+    with get_session() as session:
+        episode = Episode(source_guid="g", title="Ep", show_name="Show", pub_date=datetime(2026, 1, 1),
+                          original_audio_url="http://x/a.mp3", original_duration=600.0, content_hash="abc")
+        cache = StageCache(session, episode.content_hash)
+
+        first = fusion.detect_ads_fast("a.mp3", episode, "Show", cache=cache)
+        assert first and len(calls) == 1
+        assert fusion.detect_ads_fast("a.mp3", episode, "Show", cache=cache) == first
+        assert len(calls) == 1
+
+        # A rules change re-scores from the cached transcript
+        rules = ShowRules(phrases=["brought to you by"])
+        assert fusion.detect_ads_fast("a.mp3", episode, "Show", cache=cache) != first
+        assert len(calls) == 1
+
+        # Without a content hash nothing is cached
+        fusion.detect_ads_fast("a.mp3", episode, "Show", cache=StageCache(session, None))
+        assert len(calls) == 2
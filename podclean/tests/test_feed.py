@@ -0,0 +1,26 @@
+import xml.etree.ElementTree as ET
+
+import src.ingest.opml_import as opml_import
+from benchmarks.fixtures import populate_db, write_opml
+from src.feed.meta_feed import build_meta_feed
+from src.store.db import get_session, init_db
+
+
+def test_meta_feed_lists_newest_episodes_first(tmp_path):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    with get_session() as session:
+        populate_db(session, shows=3, episodes_per_show=10)
+    channel = ET.fromstring(build_meta_feed("http://pod.test", max_items=12)).find('channel')
+    items = channel.findall('item')
+    assert len(items) == 12
+    assert items[0].find('enclosure').get('url').startswith("http://pod.test/audio/")
+    assert items[0].find('{http://podcastindex.org/namespace/1.0}chapters') is not None
+
+
+def test_opml_import_polls_nested_outlines(tmp_path, monkeypatch):
+    polled = []
+    monkeypatch.setattr(opml_import, "poll_feed", lambda url, limit=None: polled.append((url, limit)))
+    opml_path = tmp_path / "feeds.opml"
+    write_opml(str(opml_path), ["http://a.test/rss", "http://b.test/rss"])
+    opml_import.import_opml(str(opml_path), poll_limit=2)
+    assert polled == [("http://a.test/rss", 2), ("http://b.test/rss", 2)]
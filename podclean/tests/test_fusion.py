@@ -0,0 +1,63 @@
+from src.cut.intervals import IntervalSet
+from src.detect.fusion import filter_by_policy
+from src.detect.scoring import (
+    build_tracks, compile_alternation, compile_patterns, fuse_tracks, get_profile,
+    interval_track, segment_scores,
+)
+
+DURATION = 600.0
+SEGMENTS = [
+    {"start": 0.0, "end": 40.0, "text": "welcome back to the show"},
+    {"start": 100.0, "end": 110.0, "text": "this episode is brought to you by acme"},
+    {"start": 110.0, "end": 120.0, "text": "go to acme.com slash pod for 20% off"},
+    {"start": 300.0, "end": 310.0, "text": "we talked about the sponsor of the bill"},
+]
+
+
+def _detect(aggressiveness, chapters=()):
+    profile = get_profile(aggressiveness)
+    tracks = build_tracks(
+        DURATION, profile, chapters=chapters, segments=SEGMENTS,
+        phrase_pattern=compile_alternation(["brought to you by", "promo code"]),
+        url_price_pattern=compile_patterns([r"\w+\.com", r"\d+% off"]),
+    )
+    cuts = segment_scores(fuse_tracks(tracks, profile["weights"]), tracks, profile["threshold"])
+    return filter_by_policy(cuts, profile)
+
+
+def test_phrase_and_url_reinforce_each_other():
+    cuts = _detect("conservative")
+    assert len(cuts) == 1
+    assert cuts[0]["start"] <= 100 and cuts[0]["end"] >= 120
+    assert set(cuts[0]["signals"]) == {"phrase", "url_price"}
+    assert 0.7 <= cuts[0]["confidence"] < 1.0
+
+
+def test_single_weak_signal_is_not_cut_when_conservative():
+    segments = [{"start": 100.0, "end": 110.0, "text": "brought to you by acme"}]
+    profile = get_profile("conservative")
+    tracks = build_tracks(DURATION, profile, segments=segments, phrase_pattern=compile_alternation(["brought to you by"]))
+    assert segment_scores(fuse_tracks(tracks, profile["weights"]), tracks, profile["threshold"]) == []
+
+
+def test_ambiguous_chapter_plus_phrase_is_cut():
+    chapters = [{"start": 95.0, "end": 130.0, "confidence": 0.5}]
+    cuts = _detect("conservative", chapters)
+    assert "chapter" in cuts[0]["signals"] and cuts[0]["confidence"] > 0.8
+
+
+def test_policy_drops_short_cuts_but_keeps_chapters():
+    profile = get_profile("conservative")
+    cuts = [
+        {"start": 10.0, "end": 14.0, "confidence": 0.8, "signals": ["phrase"]},
+        {"start": 200.0, "end": 204.0, "confidence": 1.0, "signals": ["chapter"]},
+        {"start": 300.0, "end": 310.0, "confidence": 0.75, "signals": ["phrase"]},
+        {"start": 315.0, "end": 325.0, "confidence": 0.9, "signals": ["url_price"]},
+    ]
+    kept = filter_by_policy(cuts, profile)
+    assert [(c["start"], c["end"]) for c in kept] == [(200.0, 204.0), (300.0, 325.0)]
+    assert kept[1]["confidence"] == 0.9 and kept[1]["signals"] == ["phrase", "url_price"]
+
+
+def test_interval_track_marks_covered_seconds():
+    assert interval_track(10, IntervalSet.from_pairs([(2.5, 4)])).tolist() == [0, 0, 1, 1, 0, 0, 0, 0, 0, 0]
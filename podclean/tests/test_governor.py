@@ -0,0 +1,72 @@
+import threading
+
+from src.config.config import GovernorConfig
+from src.jobs.governor import ResourceGovernor, ffmpeg_thread_args, whisper_thread_args
+
+
+def _governor(memory=None, load=None, **cfg):
+    return ResourceGovernor(GovernorConfig(poll_seconds=0.01, **cfg), max_parallel_transcribe=2, cpu_count=8,
+                            memory_probe=lambda: memory, load_probe=lambda: load)
+
+
+def _try_slot(governor, stage, model=None, timeout=0.2):
+    """
+    Starts a stage on another thread; returns (admitted event, release event).
+    """
+    admitted, release = threading.Event(), threading.Event()
+
+    def run():
+        with governor.slot(stage, model):
+            admitted.set()
+            release.wait(5)
+    threading.Thread(target=run, daemon=True).start()
+    admitted.wait(timeout)
+    return admitted, release
+
+
+def test_stages_are_admitted_against_the_core_budget():
+    governor = _governor(fast_whisper_threads=3, full_whisper_threads=4, ffmpeg_threads=1)
+    fast, release_fast = _try_slot(governor, 'fast_transcribe', 'small')
+    full, release_full = _try_slot(governor, 'full_transcribe', 'medium')
+    cut, release_cut = _try_slot(governor, 'cut')
+    assert fast.is_set() and full.is_set() and cut.is_set() # 3 + 4 + 1 threads fit 8 cores
+    assert governor.snapshot()["threads_in_use"] == 8
+
+    second_cut, release_second_cut = _try_slot(governor, 'cut')
+    assert not second_cut.is_set()
+    release_fast.set()
+    assert second_cut.wait(1)
+    for release in (release_full, release_cut, release_second_cut):
+        release.set()
+
+
+def test_large_model_backs_off_when_memory_is_short():
+    governor = _governor(memory=2500, memory_reserve_mb=1000)
+    cut, release_cut = _try_slot(governor, 'cut')
+    full, release_full = _try_slot(governor, 'full_transcribe', 'large')
+    assert cut.is_set() and not full.is_set()
+    release_cut.set()
+    # Alone, an oversized stage still runs rather than waiting forever
+    assert full.wait(1)
+    release_full.set()
+
+
+def test_high_load_average_delays_admission():
+    governor = _governor(load=20.0)
+    first, release_first = _try_slot(governor, 'cut')
+    second, release_second = _try_slot(governor, 'cut')
+    assert first.is_set() and not second.is_set()
+    release_first.set()
+    assert second.wait(1)
+    release_second.set()
+
+
+def test_footprint_is_clamped_to_the_budget():
+    governor = ResourceGovernor(GovernorConfig(core_budget=2, full_whisper_threads=8), cpu_count=8)
+    assert governor.footprint('full_transcribe', 'medium').threads == 2
+
+
+def test_granted_threads_become_tool_arguments():
+    assert whisper_thread_args(None) == [] and ffmpeg_thread_args(0) == []
+    assert whisper_thread_args(4) == ["-t", "4"]
+    assert ffmpeg_thread_args(2, filter_graph=True) == ["-threads", "2", "-filter_complex_threads", "2"]
@@ -0,0 +1,83 @@
+import os
+import struct
+
+import src.dl.integrity as integrity
+import src.ingest.rss_poll as rss_poll
+from benchmarks.fixtures import write_rss
+from src.dl.integrity import read_mp3_info, check_audio_complete
+from src.store.db import get_session, init_db
+from src.store.models import Episode
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo: 417-byte frames of 1152 samples
+FRAME_HEADER = b"\xFF\xFB\x90\x00"
+FRAME_LENGTH = 417
+
+
+def _frame(payload: bytes = b"") -> bytes:
+    return FRAME_HEADER + payload + b"\x00" * (FRAME_LENGTH - 4 - len(payload))
+
+
+def _write_mp3(path, frames: int, xing_frames: int = None, xing_bytes: int = None, id3_size: int = 0):
+    data = b""
+    if id3_size:
+        syncsafe = bytes([(id3_size >> 21) & 0x7F, (id3_size >> 14) & 0x7F, (id3_size >> 7) & 0x7F, id3_size & 0x7F])
+        data += b"ID3\x04\x00\x00" + syncsafe + b"\x00" * id3_size
+    if xing_frames is not None:
+        xing = b"\x00" * 32 + b"Xing" + struct.pack(">III", 0x3, xing_frames, xing_bytes)
+        data += _frame(xing)
+    data += b"".join(_frame() for _ in range(frames))
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_cbr_duration_from_frame_header(tmp_path):
+    path = _write_mp3(tmp_path / "cbr.mp3", frames=100, id3_size=300)
+    info = read_mp3_info(path)
+    assert info["sample_rate"] == 44100
+    assert info["channels"] == 2
+    assert info["vbr_header"] is None
+    assert abs(info["duration"] - 100 * FRAME_LENGTH * 8 / 128000) < 0.01
+
+
+def test_xing_header_gives_exact_duration(tmp_path):
+    path = _write_mp3(tmp_path / "vbr.mp3", frames=200, xing_frames=200, xing_bytes=201 * FRAME_LENGTH)
+    info = read_mp3_info(path)
+    assert info["vbr_header"] == "xing"
+    assert abs(info["duration"] - 200 * 1152 / 44100) < 1e-6
+
+
+def test_truncated_file_is_rejected(tmp_path):
+    path = _write_mp3(tmp_path / "cut.mp3", frames=100, xing_frames=1000, xing_bytes=1001 * FRAME_LENGTH)
+    probe = {"duration": 26.1, "file_size": 101 * FRAME_LENGTH, "mp3": read_mp3_info(path)}
+    ok, reason = check_audio_complete(path, probe)
+    assert not ok and "truncated" in reason
+
+
+def test_non_mp3_is_not_misread(tmp_path):
+    path = tmp_path / "noise.bin"
+    path.write_bytes(bytes(range(256)) * 64)
+    assert read_mp3_info(str(path)) is None
+
+
+def test_undecodable_download_is_retried_a_bounded_number_of_times(tmp_path, monkeypatch):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    downloads = []
+
+    def fake_download(url, folder, filename=None):
+        downloads.append(url)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, filename)
+        with open(path, "wb") as f:
+            f.write(bytes(range(256)) * 64) # Not MP3, and no ffprobe to fall back on
+        return path, "hash"
+    monkeypatch.setattr(rss_poll, "download_file_with_hash", fake_download)
+    monkeypatch.setattr(integrity, "run_ffprobe", lambda path: None)
+    feed_path = tmp_path / "feed.xml"
+    write_rss(str(feed_path), "Show", 1, lambda i: "http://example.com/ep.mp3")
+
+    for _ in range(5):
+        rss_poll.poll_feed(str(feed_path))
+    assert len(downloads) == 3
+    with get_session() as session:
+        episode = session.query(Episode).one()
+        assert (episode.status, episode.original_file_path) == ('failed_permanently', None)
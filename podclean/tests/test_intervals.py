@@ -0,0 +1,89 @@
+import random
+
+import numpy as np
+
+from src.cut.intervals import IntervalSet
+from src.cut.plan import build_keep_segments
+from src.detect.fusion import merge_and_pad
+
+# Property tests: random integer intervals on a small grid, checked against a boolean mask
+# where mask[t] means the unit cell [t, t + 1) is covered.
+GRID = 200
+TRIALS = 300
+
+
+def _random_set(rng):
+    pairs = []
+    for _ in range(rng.randint(0, 25)):
+        start = rng.randrange(GRID)
+        pairs.append((start, min(GRID, start + rng.randint(0, 30))))
+    return pairs
+
+
+def _mask(pairs):
+    mask = np.zeros(GRID, dtype=bool)
+    for s, e in pairs:
+        mask[int(s):int(e)] = True
+    return mask
+
+
+def _assert_normalized(interval_set):
+    assert np.all(interval_set.ends > interval_set.starts)
+    assert np.all(interval_set.starts[1:] > interval_set.ends[:-1])
+
+
+def test_set_algebra_matches_mask_reference():
+    rng = random.Random(39)
+    for _ in range(TRIALS):
+        a_pairs, b_pairs = _random_set(rng), _random_set(rng)
+        a, b = IntervalSet.from_pairs(a_pairs), IntervalSet.from_pairs(b_pairs)
+        mask_a, mask_b = _mask(a_pairs), _mask(b_pairs)
+
+        for result, expected in (
+            (a, mask_a),
+            (a.union(b), mask_a | mask_b),
+            (a.intersection(b), mask_a & mask_b),
+            (a.difference(b), mask_a & ~mask_b),
+            (a.complement(0, GRID), ~mask_a),
+        ):
+            _assert_normalized(result)
+            assert np.array_equal(_mask(result), expected)
+            assert result.total_length == expected.sum()
+
+
+def test_pad_bridge_and_filter_properties():
+    rng = random.Random(390)
+    for _ in range(TRIALS):
+        a = IntervalSet.from_pairs(_random_set(rng))
+        pad, gap, min_length = rng.randint(0, 5), rng.randint(0, 10), rng.randint(0, 20)
+
+        padded = a.pad(pad, lo=0, hi=GRID)
+        _assert_normalized(padded)
+        assert a.difference(padded).total_length == 0 # padding only grows the set
+        assert padded.starts.min(initial=0) >= 0 and padded.ends.max(initial=0) <= GRID
+
+        bridged = a.bridge_gaps(gap)
+        _assert_normalized(bridged)
+        assert np.all(bridged.starts[1:] - bridged.ends[:-1] > gap)
+        assert a.difference(bridged).total_length == 0
+
+        filtered = a.filter_min_length(min_length)
+        assert np.all(filtered.ends - filtered.starts >= min_length)
+        assert filtered.difference(a).total_length == 0
+
+
+def test_contains_is_vectorized():
+    a = IntervalSet.from_pairs([(0, 10), (20, 30)])
+    assert a.contains([0, 9.9, 10, 15, 20, 30]).tolist() == [True, True, False, False, True, False]
+    assert IntervalSet().contains([1.0]).tolist() == [False]
+
+
+def test_keep_segments_with_overlapping_cuts():
+    cuts = [{'start': 10.0, 'end': 20.0}, {'start': 18.0, 'end': 25.0}, {'start': 100.0, 'end': 120.0}]
+    assert build_keep_segments(300.0, cuts) == [[0.0, 10.0], [25.0, 100.0], [120.0, 300.0]]
+    assert build_keep_segments(300.0, []) == [[0.0, 300.0]]
+
+
+def test_merge_and_pad_clamps_at_zero():
+    cuts = [{'start': 2.0, 'end': 10.0, 'type': 'chapter'}, {'start': 20.0, 'end': 30.0, 'type': 'text'}]
+    assert merge_and_pad(cuts, 8) == [{'start': 0.0, 'end': 38.0}]
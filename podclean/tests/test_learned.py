@@ -0,0 +1,68 @@
+import json
+from datetime import datetime
+
+from src.config.config_loader import load_app_config
+from src.detect.cache import StageCache, transcript_fingerprint
+from src.detect.fusion import apply_marks
+from src.detect.learned import extract_candidates, get_learned_rules, mark_to_original, mine_marks, record_mark
+from src.store.db import get_session, init_db
+from src.store.models import AdMark, Episode
+
+AD_READS = [
+    "this episode is brought to you by acme. go to acme dot com slash pod",
+    "thanks to acme for supporting the show, visit acme.com slash pod today",
+    "support for the show comes from zeta, zeta.io, and acme.com slash pod",
+]
+
+
+def test_extract_candidates_needs_repeated_support():
+    phrases, domains = extract_candidates(AD_READS, ["we read the acme.com slash pod terms of service"])
+    assert domains == []  # also said outside an ad
+    assert "com slash pod" not in phrases
+    phrases, domains = extract_candidates(AD_READS)
+    assert domains == ["acme.com"]
+    assert "zeta.io" not in domains  # only one mark mentions it
+
+    phrases, _ = extract_candidates(["use promo code podcast at checkout", "just use promo code podcast"])
+    assert phrases == ["use promo code podcast"]
+
+
+def test_apply_marks_adds_and_removes_spans():
+    marks = [AdMark(start=100.0, end=130.0, label='ad'), AdMark(start=20.0, end=25.0, label='not_ad')]
+    cuts = [{'start': 10.0, 'end': 40.0, 'confidence': 0.7, 'signals': ['phrase']}, {'start': 50.0, 'end': 60.0}]
+    result = apply_marks(cuts, marks)
+    assert [(c['start'], c['end']) for c in result] == [(10.0, 20.0), (25.0, 40.0), (50.0, 60.0), (100.0, 130.0)]
+    # Both pieces of the split cut keep its confidence and signals
+    assert [(c['confidence'], c['signals']) for c in result[:2]] == [(0.7, ['phrase'])] * 2
+    assert result[3]['confidence'] == 1.0
+
+    trimmed = apply_marks(cuts[:1], [AdMark(start=5.0, end=12.0, label='not_ad')])
+    assert trimmed == [{'start': 12.0, 'end': 40.0, 'confidence': 0.7, 'signals': ['phrase']}]
+    assert apply_marks(cuts, []) == cuts
+
+
+def test_marks_in_cleaned_time_map_to_original():
+    episode = Episode(cleaned_file_path="x.mp3", original_duration=300.0,
+                      ad_segments_json=json.dumps([{'start': 0.0, 'end': 60.0}]))
+    assert mark_to_original(episode, 10.0, 20.0) == (70.0, 80.0)
+    assert mark_to_original(episode, 10.0, 20.0, 'original') == (10.0, 20.0)
+
+
+def test_mining_builds_versioned_show_rules(tmp_path):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    with get_session() as session:
+        for i, read in enumerate(AD_READS):
+            episode = Episode(source_guid=f"g{i}", title=f"Ep {i}", show_name="Show", pub_date=datetime(2026, 1, i + 1),
+                              original_audio_url="http://x/a.mp3", original_duration=600.0, content_hash=f"h{i}")
+            session.add(episode)
+            session.flush()
+            StageCache(session, episode.content_hash).put("transcript", transcript_fingerprint(load_app_config()),
+                                                          [{'start': 0.0, 'end': 100.0, 'text': "intro"},
+                                                           {'start': 100.0, 'end': 130.0, 'text': read}])
+            record_mark(session, episode, 100.0, 130.0, 'ad', 'original')
+        session.commit()
+
+        assert mine_marks(session) == {"Show": 1}
+        rules = get_learned_rules(session, "Show")
+        assert rules['domains'] == ["acme.com"]
+        assert mine_marks(session) == {}  # nothing new to mine
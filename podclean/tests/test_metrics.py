@@ -0,0 +1,55 @@
+import pytest
+
+import src.serve.metrics as serve_metrics
+import src.store.metrics as store_metrics
+from src.serve.metrics import render_prometheus
+from src.store.db import get_session, init_db
+from src.store.metrics import StageStats, prune_stage_metrics, span
+from src.store.models import StageMetric
+
+
+@pytest.fixture
+def stage_stats(monkeypatch):
+    stats = StageStats() # Spans of other tests would otherwise add to the counters
+    monkeypatch.setattr(store_metrics, "stage_stats", stats)
+    monkeypatch.setattr(serve_metrics, "stage_stats", stats)
+    return stats
+
+
+def test_spans_are_recorded_and_exported(tmp_path, stage_stats):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    with span('detect', bytes_in=1000, audio_seconds=600.0) as detect:
+        with span('fast_transcribe', audio_seconds=600.0):
+            pass
+    with pytest.raises(RuntimeError):
+        with span('cut'):
+            raise RuntimeError("ffmpeg exploded")
+
+    with get_session() as session:
+        rows = {row.stage: row for row in session.query(StageMetric)}
+        assert rows['fast_transcribe'].trace_id == detect.trace_id
+        assert rows['fast_transcribe'].parent_stage == 'detect'
+        assert rows['detect'].real_time_factor > 1
+        assert (rows['cut'].ok, rows['cut'].error) == (False, "RuntimeError: ffmpeg exploded")
+
+        text = render_prometheus(session)
+    assert 'podclean_stage_duration_seconds_bucket{stage="detect",le="0.1"} 1' in text
+    assert 'podclean_stage_duration_seconds_count{stage="cut"} 1' in text
+    assert 'podclean_stage_failures_total{stage="cut"} 1' in text
+    assert 'podclean_stage_bytes_in_total{stage="detect"} 1000' in text
+    assert 'podclean_queue_wait_seconds_bucket{class="new",le="+Inf"}' in text
+    assert 'podclean_stage_recent_failures{stage="cut"} 1' in text
+
+
+def test_counters_survive_pruning(tmp_path, stage_stats):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    for _ in range(2):
+        with span('cut', bytes_out=500):
+            pass
+    with get_session() as session:
+        assert prune_stage_metrics(session, retention_days=-1) == 2
+        text = render_prometheus(session)
+    assert 'podclean_stage_duration_seconds_count{stage="cut"} 2' in text
+    assert 'podclean_stage_duration_seconds_bucket{stage="cut",le="+Inf"} 2' in text
+    assert 'podclean_stage_bytes_out_total{stage="cut"} 1000' in text
+    assert 'podclean_stage_recent_runs{stage="cut"}' not in text
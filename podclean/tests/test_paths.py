@@ -0,0 +1,43 @@
+import json
+import os
+from datetime import datetime
+
+from src.store.db import get_session, init_db
+from src.store.models import Episode
+from src.store.paths import EpisodePaths, artifact_dir, migrate_to_sharded_layout
+from src.store.transcripts import iter_transcript_segments
+
+SEGMENTS = [{'start': 0.0, 'end': 2.5, 'text': 'hello'}, {'start': 2.5, 'end': 4.0, 'text': 'world'}]
+
+
+def test_migration_converts_flat_json_transcripts(tmp_path):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    cleaned_dir, transcripts_dir = artifact_dir('cleaned'), artifact_dir('transcript')
+    os.makedirs(cleaned_dir)
+    os.makedirs(transcripts_dir)
+    with get_session() as session:
+        for guid in ("g1", "g2"):
+            cleaned = os.path.join(cleaned_dir, f"{guid}_CLEAN.mp3")
+            with open(cleaned, "wb") as f:
+                f.write(b"cleaned")
+            with open(os.path.join(transcripts_dir, f"{guid}_CLEAN.json"), "w") as f:
+                json.dump(SEGMENTS, f)
+            session.add(Episode(source_guid=guid, title=guid, show_name="Show", pub_date=datetime(2026, 1, 1),
+                                original_audio_url=f"http://x/{guid}.mp3", cleaned_file_path=cleaned,
+                                transcript_json=json.dumps(SEGMENTS), status='transcribed'))
+        session.commit()
+        current = session.query(Episode).filter_by(source_guid="g2").one() # Already has the compressed transcript
+        current.transcript_file_path = os.path.join(transcripts_dir, "g2.json.gz")
+        with open(current.transcript_file_path, "wb") as f:
+            f.write(b"gz")
+        session.commit()
+
+    assert migrate_to_sharded_layout(dry_run=True) == 5
+    assert migrate_to_sharded_layout() == 5
+    with get_session() as session:
+        converted, current = session.query(Episode).order_by(Episode.source_guid).all()
+        assert converted.transcript_file_path == EpisodePaths.for_episode(converted).transcript
+        assert list(iter_transcript_segments(converted.transcript_file_path)) == SEGMENTS
+        assert converted.transcript_json is None
+        assert current.transcript_file_path == EpisodePaths.for_episode(current).transcript
+    assert not [name for name in os.listdir(transcripts_dir) if name.endswith(".json")]
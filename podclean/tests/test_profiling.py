@@ -0,0 +1,54 @@
+import json
+import os
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from src.config.config import ProfilingConfig
+from src.jobs.profiling import list_profiles, profile_job, should_profile
+from src.serve.api import app
+from src.store.db import get_session, init_db
+from src.store.metrics import span
+from src.store.models import ArtifactUsage, Episode
+
+
+def test_profile_job_saves_and_records_artifacts(tmp_path):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    with get_session() as session:
+        episode = Episode(source_guid="g1", title="Ep 1", show_name="Show", pub_date=datetime(2026, 1, 1), original_audio_url="http://example.com/1.mp3",
+                          status="downloaded", profile_requested=True)
+        session.add(episode)
+        session.commit()
+        assert should_profile(episode, ProfilingConfig())
+
+        with profile_job(session, episode, "process", ProfilingConfig(top_functions=5)) as profiler:
+            assert profiler is not None
+            with span("detect", episode):
+                sum(i * i for i in range(10000))
+
+        paths = [row.path for row in session.query(ArtifactUsage).filter_by(episode_id=episode.id, kind='profile')]
+        assert sorted(os.path.splitext(p)[1] for p in paths) == [".json", ".prof"]
+        assert all(os.path.exists(p) for p in paths)
+        with open(next(p for p in paths if p.endswith(".json"))) as f:
+            summary = json.load(f)
+        assert summary["kind"] == "process"
+        assert [s["stage"] for s in summary["stage_spans"]] == ["detect"]
+        assert len(summary["top_functions"]) <= 5
+
+        profiles = list_profiles(session, episode_id=episode.id)
+        assert len(profiles) == 1 and profiles[0]["profile_artifact_id"] is not None
+        session.refresh(episode)
+        assert not episode.profile_requested
+        assert not should_profile(episode, ProfilingConfig())
+
+
+def test_admin_endpoints_need_admin_credentials(tmp_path, monkeypatch):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    client = TestClient(app)
+    assert client.get("/admin/profiles").status_code == 403  # no admin_password configured
+
+    monkeypatch.setenv("admin_password", "secret")
+    assert client.get("/admin/profiles").status_code == 401
+    assert client.get("/admin/profiles", auth=("admin", "wrong")).status_code == 401
+    response = client.get("/admin/profiles", auth=("admin", "secret"))
+    assert response.status_code == 200 and response.json() == {"profiles": []}
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import src.jobs.worker as worker
+from src.config.config import AppConfig, GovernorConfig, SchedulerConfig
+from src.jobs.queue import WAIT_BUCKETS_SECONDS, QueueStats, build_queue, job_priority
+from src.store.db import get_session, init_db
+from src.store.models import Episode
+
+NOW = datetime(2026, 3, 1, 12, 0)
+
+
+def _episode(episode_id, published_hours_ago, waiting_hours=None, show_name="Show"):
+    pub_date = NOW - timedelta(hours=published_hours_ago)
+    changed = NOW - timedelta(hours=waiting_hours) if waiting_hours is not None else None
+    return SimpleNamespace(id=episode_id, pub_date=pub_date, status_changed_at=changed, checkpoint_at=None, show_name=show_name)
+
+
+def test_new_episode_jumps_ahead_of_backlog():
+    app_cfg = AppConfig()
+    queue = build_queue([(_episode(1, 24 * 90, waiting_hours=2), 'process'),
+                         (_episode(2, 3, waiting_hours=2), 'process')], app_cfg, now=NOW)
+    first = queue.pop()
+    assert (first.episode_id, first.priority_class) == (2, 'new')
+    assert queue.pop().priority_class == 'backlog'
+
+
+def test_cut_ready_work_outranks_full_transcription():
+    app_cfg = AppConfig()
+    queue = build_queue([(_episode(1, 5, waiting_hours=1), 'transcribe'),
+                         (_episode(2, 5, waiting_hours=1), 'process')], app_cfg, now=NOW)
+    assert [job.kind for job in queue.drain()] == ['process', 'transcribe']
+
+
+def test_aging_lifts_long_waiting_backlog():
+    app_cfg = AppConfig()
+    fresh = job_priority(_episode(1, 1, waiting_hours=0), 'process', NOW, app_cfg)
+    stale = job_priority(_episode(2, 24 * 365, waiting_hours=1), 'process', NOW, app_cfg)
+    starving = job_priority(_episode(3, 24 * 365, waiting_hours=24 * 5), 'process', NOW, app_cfg)
+    assert stale.priority < fresh.priority < starving.priority
+
+
+def test_rows_without_timestamps_do_not_age_from_publication():
+    # Backlog rows from before status_changed_at existed have it NULL
+    legacy = job_priority(_episode(1, 24 * 365), 'process', NOW, AppConfig())
+    new = job_priority(_episode(2, 3, waiting_hours=0), 'process', NOW, AppConfig())
+    assert legacy.waited_seconds == 0
+    assert legacy.priority < new.priority
+
+
+def test_wait_histograms_per_class():
+    stats = QueueStats()
+    jobs = [job_priority(_episode(i, hours, waiting_hours=hours), 'process', NOW, AppConfig())
+            for i, hours in enumerate([0.01, 2, 24 * 30])]
+    stats.snapshot(jobs)
+    report = stats.as_dict()
+    assert len(report['bucket_upper_bounds_seconds']) == len(WAIT_BUCKETS_SECONDS)
+    assert report['classes']['new']['depth'] == 2
+    assert report['classes']['backlog']['depth'] == 1
+    assert report['classes']['new']['queued_wait_buckets'][0] == 1
+
+    stats.observe_start(jobs[0])
+    assert stats.as_dict()['classes']['new']['depth'] == 1
+    for job in jobs[1:]:
+        stats.observe_start(job)
+    report = stats.as_dict()
+    assert [report['classes'][c]['depth'] for c in ('new', 'backlog')] == [0, 0]
+    assert sum(report['classes']['new']['queued_wait_buckets']) == 0
+    assert report['classes']['backlog']['started_wait_buckets'][-1] == 1
+
+
+def test_episodes_polled_during_a_run_overtake_the_backlog(tmp_path, monkeypatch):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    app_cfg = AppConfig(scheduler=SchedulerConfig(requeue_after_jobs=1), governor=GovernorConfig(enabled=False))
+    monkeypatch.setattr(worker, "load_app_config", lambda: app_cfg)
+
+    def add(session, guid, pub_date):
+        session.add(Episode(source_guid=guid, title=guid, show_name="Show", pub_date=pub_date,
+                            original_audio_url=f"http://x/{guid}.mp3", status='downloaded'))
+        session.commit()
+
+    with get_session() as session:
+        for i in range(3):
+            add(session, f"old{i}", datetime(2024, 1, 1 + i))
+    ran = []
+
+    def fake_process(episode_id):
+        with get_session() as session:
+            episode = session.get(Episode, episode_id)
+            ran.append(episode.source_guid)
+            episode.status = 'cut_ready_for_serving'
+            session.commit()
+            if len(ran) == 1:
+                add(session, "new", datetime.now()) # Polled while the backlog is being worked off
+    monkeypatch.setitem(worker.JOB_RUNNERS, 'process', (fake_process, 'processing_failed'))
+    monkeypatch.setitem(worker.JOB_RUNNERS, 'transcribe', (lambda episode_id: ran.append(f"transcribe {episode_id}"), 'full_transcription_failed'))
+
+    worker.scheduled_job_part(process_episodes=True)
+    assert ran[:2] == ["old0", "new"]
+    assert sorted(r for r in ran if not r.startswith("transcribe")) == ["new", "old0", "old1", "old2"]
+    assert len([r for r in ran if r.startswith("transcribe")]) == 4 # Each once, although they stay cut-ready
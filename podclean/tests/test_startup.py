@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+
+PODCLEAN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budget for `import src.main` (cumulative, microseconds). Typical runs are well under 50ms;
+# the headroom absorbs slow CI machines while still catching a heavy import sneaking back in.
+MAIN_IMPORT_BUDGET_US = 150_000
+HEAVY_MODULES = ("uvicorn", "fastapi", "apscheduler", "jinja2", "sqlalchemy", "starlette")
+WEB_MODULES = ("uvicorn", "fastapi", "apscheduler", "jinja2", "starlette")
+
+# Modules each cron-style subcommand imports lazily, with a budget for the whole process
+# (sum of self times, microseconds). They need SQLAlchemy and pydantic, but never the web stack.
+SUBCOMMAND_IMPORTS = {
+    "add-feed": ("src.config.config_loader", 500_000),
+    "list-episodes": ("src.store.db, src.store.listing", 1_000_000),
+    "storage-usage": ("src.store.db, src.store.usage", 1_000_000),
+    "migrate-layout": ("src.store.db, src.store.paths", 1_000_000),
+    "poll-feed": ("src.ingest.rss_poll", 1_500_000),
+    "run-jobs": ("src.jobs.worker", 1_500_000),
+}
+
+
+def _importtime(code: str, field: int = 1) -> dict:
+    """
+    Runs `code` under -X importtime and returns {module: cumulative_us}
+    ({module: self_us} with field=0).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PODCLEAN_ROOT, capture_output=True, text=True, check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        columns = line[len("import time:"):].split("|")
+        timings[columns[2].strip()] = int(columns[field])
+    return timings
+
+
+def test_cli_import_stays_within_budget():
+    timings = _importtime("import src.main")
+    assert timings["src.main"] < MAIN_IMPORT_BUDGET_US, f"src.main took {timings['src.main']}us to import"
+
+
+def test_cli_import_skips_heavy_dependencies():
+    timings = _importtime("import src.main")
+    loaded = sorted(m for m in timings if m.split(".")[0] in HEAVY_MODULES)
+    assert not loaded, f"CLI startup imported: {loaded}"
+
+
+def test_cron_subcommand_imports_stay_within_budget():
+    for command, (modules, budget_us) in SUBCOMMAND_IMPORTS.items():
+        self_times = _importtime(f"import src.main, {modules}", field=0)
+        total = sum(self_times.values())
+        assert total < budget_us, f"{command} took {total}us to import"
+        loaded = sorted(m for m in self_times if m.split(".")[0] in WEB_MODULES)
+        assert not loaded, f"{command} imported: {loaded}"
+
+
+def test_pipeline_modules_do_not_load_config_at_import():
+    code = (
+        "import src.store.db, src.ingest.rss_poll, src.processor.episode_processor\n"
+        "from src.config.config_loader import config_service\n"
+        "assert config_service._app_config is None\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=PODCLEAN_ROOT, check=True)
@@ -0,0 +1,118 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import src.jobs.worker as worker
+import src.processor.episode_processor as processor
+from src.detect.learned import record_mark
+from src.store.db import get_session, init_db
+from src.store.models import Episode
+from src.store.states import InvalidTransition, complete_stage, remaining_stages, rewind
+
+
+def _episode(session, tmp_path):
+    original = tmp_path / "original.mp3"
+    original.write_bytes(b"\0" * 1024)
+    episode = Episode(source_guid="g1", title="Ep", show_name="Show", pub_date=datetime(2026, 1, 1),
+                      original_audio_url="http://x/a.mp3", original_file_path=str(original),
+                      original_duration=600.0, probe_json="{}", status='downloaded')
+    session.add(episode)
+    session.commit()
+    return episode
+
+
+def test_stages_complete_in_order(tmp_path):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    with get_session() as session:
+        episode = _episode(session, tmp_path)
+        assert remaining_stages(episode, through='chapters') == ['probed', 'detected', 'cut', 'chapters']
+        with pytest.raises(InvalidTransition):
+            complete_stage(session, episode, 'cut')
+        complete_stage(session, episode, 'probed')
+        complete_stage(session, episode, 'detected', ad_segments_json="[]")
+        assert (episode.status, episode.checkpoint) == ('detected', 'detected')
+        rewind(session, episode, 'probed')
+        assert remaining_stages(episode, through='chapters') == ['detected', 'cut', 'chapters']
+
+
+def test_rewind_waits_for_the_running_job(tmp_path):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    with get_session() as session:
+        episode = _episode(session, tmp_path)
+        complete_stage(session, episode, 'probed')
+        with worker._tracked(episode.id):
+            assert worker.request_rewind(session, episode, 'probed')
+            complete_stage(session, episode, 'detected', ad_segments_json="[]") # the job carries on
+        session.refresh(episode)
+        assert (episode.status, episode.checkpoint) == ('probed', 'probed')
+        assert not worker.request_rewind(session, episode, 'probed')
+
+
+def test_retry_after_failed_cut_resumes_at_cut(tmp_path, monkeypatch):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    detections, cut_results = [], [False, True]
+    monkeypatch.setattr(processor, "detect_ads_fast", lambda *a, **k: detections.append(1) or [{'start': 0.0, 'end': 60.0}])
+    monkeypatch.setattr(processor, "collect_chapters", lambda *a: [])
+
+    def fake_cut(source, keeps, output, **kwargs):
+        if cut_results.pop(0):
+            with open(output, "wb") as f:
+                f.write(b"cleaned")
+            return True
+        return False
+    monkeypatch.setattr(processor, "cut_with_ffmpeg", fake_cut)
+
+    with get_session() as session:
+        episode_id = _episode(session, tmp_path).id
+
+    processor.process_episode(episode_id)
+    with get_session() as session:
+        episode = session.get(Episode, episode_id)
+        assert (episode.status, episode.checkpoint) == ('cut_failed', 'detected')
+
+    processor.process_episode(episode_id)
+    with get_session() as session:
+        episode = session.get(Episode, episode_id)
+        assert (episode.status, episode.checkpoint) == ('cut_ready_for_serving', 'chapters')
+        assert episode.cleaned_duration == 540.0
+        assert json.loads(episode.ad_segments_json) == [{'start': 0.0, 'end': 60.0}]
+    assert len(detections) == 1
+
+
+def test_marking_a_deduplicated_episode_reprocesses_it(tmp_path, monkeypatch):
+    init_db(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    monkeypatch.setattr(processor, "detect_ads_fast", lambda *a, **k: [{'start': 0.0, 'end': 60.0}])
+    monkeypatch.setattr(processor, "collect_chapters", lambda *a: [])
+
+    def fake_cut(source, keeps, output, **kwargs):
+        with open(output, "wb") as f:
+            f.write(b"cleaned")
+        return True
+    monkeypatch.setattr(processor, "cut_with_ffmpeg", fake_cut)
+
+    with get_session() as session:
+        donor = _episode(session, tmp_path)
+        duplicate = Episode(source_guid="g2", title="Ep (rerun)", show_name="Other", pub_date=datetime(2026, 2, 1),
+                            original_audio_url="http://y/a.mp3", original_file_path=str(tmp_path / "duplicate.mp3"),
+                            original_duration=600.0, probe_json="{}", status='downloaded', content_hash="same")
+        donor.content_hash = "same"
+        session.add(duplicate)
+        session.commit()
+        (tmp_path / "duplicate.mp3").write_bytes(b"\0" * 1024)
+        donor_id, duplicate_id = donor.id, duplicate.id
+
+    processor.process_episode(donor_id)
+    processor.process_episode(duplicate_id)
+    with get_session() as session:
+        episode = session.get(Episode, duplicate_id)
+        assert json.loads(episode.ad_segments_json) == [{'start': 0.0, 'end': 60.0}]
+        record_mark(session, episode, 300.0, 330.0, 'ad', timebase='original')
+        assert not worker.request_rewind(session, episode, 'probed')  # what POST /mark does
+
+    processor.process_episode(duplicate_id)
+    with get_session() as session:
+        episode = session.get(Episode, duplicate_id)
+        assert episode.status == 'cut_ready_for_serving'
+        assert [(c['start'], c['end']) for c in json.loads(episode.ad_segments_json)] == [(0.0, 60.0), (300.0, 330.0)]
+        assert episode.cleaned_duration == 510.0